@@ -4,25 +4,54 @@ Simple web-based prompt management system
 """
 
 import os
+import json
+import base64
+import asyncio
+import hashlib
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from dotenv import load_dotenv
+from pydantic import ValidationError
 
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from models import (
     PromptCategory, 
     PromptTestRequest, 
     PromptTestResponse,
+    PromptBatchRenderRequest,
+    PromptBatchRenderResponse,
+    PromptBulkRequest,
+    PromptBulkResponse,
     PromptListResponse,
     PromptUpdateRequest
 )
-from storage import PromptStorage
+from storage import LIST_FIELDS, AsyncPromptStorage, PromptStorage
+from backends import TEMPLATE_FIELDS, SqliteBackend
+from content_encoding import CompressionMiddleware, negotiate_encoding
+from render_stats import SORT_KEYS as RENDER_STATS_SORT_KEYS
+from tracing import JsonLogFormatter, SpanFileExporter, TraceIdLogFilter, Tracer, TracingMiddleware, span
+from profiler import (
+    MAX_PROFILE_SECONDS,
+    ProfilingMiddleware,
+    RequestProfileStore,
+    dump_stats,
+    format_collapsed,
+    format_stats,
+    profile_event_loop,
+    release as release_profiler,
+    sample_stacks,
+    try_acquire as acquire_profiler
+)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS, MetricsMiddleware
+from patching import PatchError, apply_json_patch, merge_template
+from watcher import PromptWatcher
 
 load_dotenv('.env.local')
 
@@ -33,15 +62,142 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Structured logs: one JSON object per line, with the request's trace ID
+if os.getenv("PROMPT_STUDIO_LOG_FORMAT", "text").lower() == "json":
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(TraceIdLogFilter())
+        handler.setFormatter(JsonLogFormatter())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the prompts directory watcher and flush pending storage writes on shutdown"""
+    if watcher:
+        watcher.start()
+    
+    yield
+    
+    if watcher:
+        watcher.stop()
+    storage.close()
+    tracer.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Prompt Studio",
     description="Simple prompt management system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Compress dynamic responses; cached prompt bodies arrive precompressed and pass through
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("PROMPT_STUDIO_COMPRESSION_MIN_BYTES", "1024"))
+)
+
+# Requests sending X-Profile (with a valid API key) are profiled with cProfile
+request_profiles = RequestProfileStore(keep=int(os.getenv("PROMPT_STUDIO_PROFILE_KEEP", "20")))
+app.add_middleware(
+    ProfilingMiddleware,
+    store=request_profiles,
+    authorize=lambda scope: authorized_scope(scope)
 )
 
+# Wraps compression (and profiling), so request latency includes them
+app.add_middleware(MetricsMiddleware)
+
+# Every request gets a trace; slow ones are logged with their span breakdown
+tracer = Tracer(
+    slow_threshold_ms=float(os.getenv("PROMPT_STUDIO_SLOW_REQUEST_MS", "500")),
+    log_mode=os.getenv("PROMPT_STUDIO_TRACE_LOG", "slow").lower(),
+    exporter=(
+        SpanFileExporter(Path(os.getenv("PROMPT_STUDIO_TRACE_EXPORT_FILE")))
+        if os.getenv("PROMPT_STUDIO_TRACE_EXPORT_FILE") else None
+    )
+)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
+# Persistence backend: one JSON file per category (default) or SQLite
+STORAGE_BACKEND = os.getenv("PROMPT_STUDIO_BACKEND", "json").lower()
+if STORAGE_BACKEND == "sqlite":
+    prompt_backend = SqliteBackend(os.getenv("PROMPT_STUDIO_SQLITE_PATH", "prompts/prompts.db"))
+elif STORAGE_BACKEND == "json":
+    prompt_backend = None
+else:
+    raise ValueError(f"Unknown PROMPT_STUDIO_BACKEND: {STORAGE_BACKEND}")
+
 # Initialize storage
-storage = PromptStorage()
+prompt_storage = PromptStorage(
+    cache_size=int(os.getenv("PROMPT_STUDIO_CACHE_SIZE", "128")),
+    backup_dir=os.getenv("PROMPT_STUDIO_BACKUP_DIR"),
+    backup_keep_last=int(os.getenv("PROMPT_STUDIO_BACKUP_KEEP", "20")),
+    backup_max_age_days=(
+        float(os.getenv("PROMPT_STUDIO_BACKUP_MAX_AGE_DAYS"))
+        if os.getenv("PROMPT_STUDIO_BACKUP_MAX_AGE_DAYS") else None
+    ),
+    history_keyframe_interval=int(os.getenv("PROMPT_STUDIO_HISTORY_KEYFRAME_INTERVAL", "20")),
+    fsync_interval=float(os.getenv("PROMPT_STUDIO_FSYNC_INTERVAL", "1.0")),
+    snapshot=os.getenv("PROMPT_STUDIO_SNAPSHOT", "off").lower() in ("1", "true", "on"),
+    backend=prompt_backend,
+    response_cache_bytes=int(float(os.getenv("PROMPT_STUDIO_RESPONSE_CACHE_MB", "32")) * 1024 * 1024)
+)
+
+# Routes use the async facade so blocking file I/O runs on a bounded thread pool
+storage = AsyncPromptStorage(
+    prompt_storage,
+    max_workers=int(os.getenv("PROMPT_STUDIO_IO_WORKERS", "8"))
+)
+
+# Cache statistics are read from storage when /metrics is scraped
+METRICS.callback(
+    "prompt_studio_cache_hits_total",
+    "Cache lookups answered from memory",
+    "counter",
+    ("cache",),
+    lambda: {
+        ("category",): storage.cache_stats()["hits"],
+        ("response",): storage.response_cache_stats()["hits"]
+    }
+)
+METRICS.callback(
+    "prompt_studio_cache_misses_total",
+    "Cache lookups that had to load or build the value",
+    "counter",
+    ("cache",),
+    lambda: {
+        ("category",): storage.cache_stats()["misses"],
+        ("response",): storage.response_cache_stats()["misses"]
+    }
+)
+METRICS.callback(
+    "prompt_studio_cache_hit_ratio",
+    "Share of cache lookups answered from memory",
+    "gauge",
+    ("cache",),
+    lambda: {
+        ("category",): storage.cache_stats()["hit_ratio"],
+        ("response",): storage.response_cache_stats()["hit_ratio"]
+    }
+)
+METRICS.callback(
+    "prompt_studio_response_cache_bytes",
+    "Bytes held by the response cache",
+    "gauge",
+    (),
+    lambda: {(): storage.response_cache_stats()["bytes"]}
+)
+
+# Optional watcher that pushes external edits of prompts/*.json into the cache
+WATCH_MODE = os.getenv("PROMPT_STUDIO_WATCH", "off").lower()
+if WATCH_MODE != "off" and STORAGE_BACKEND != "json":
+    logger.warning("⚠️ PROMPT_STUDIO_WATCH only applies to the json backend, ignoring it")
+    WATCH_MODE = "off"
+watcher = PromptWatcher(
+    prompt_storage,
+    mode=WATCH_MODE,
+    poll_interval=float(os.getenv("PROMPT_STUDIO_WATCH_POLL_INTERVAL", "1.0"))
+) if WATCH_MODE != "off" else None
 
 # Setup static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -52,13 +208,216 @@ API_KEY = os.getenv("PROMPT_STUDIO_API_KEY", "prompt-studio-dev-key")
 security = HTTPBearer()
 
 
+def authorized_scope(scope: Dict[str, Any]) -> bool:
+    """Check the API key of a raw ASGI request, for middleware running before routing"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            return scheme.lower() == "bearer" and credentials == API_KEY
+    return False
+
+
 def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Simple API key verification"""
-    if credentials.credentials != API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid API key")
+    with span("auth"):
+        if credentials.credentials != API_KEY:
+            raise HTTPException(status_code=401, detail="Invalid API key")
     return credentials.credentials
 
 
+JSON_PATCH_MEDIA_TYPE = "application/json-patch+json"
+MERGE_PATCH_MEDIA_TYPES = ("application/merge-patch+json", "application/json")
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+NDJSON_MAX_LINE_BYTES = int(os.getenv("PROMPT_STUDIO_NDJSON_MAX_LINE_BYTES", str(1024 * 1024)))
+
+
+def encode_cursor(after: str, revision: int) -> str:
+    """Opaque page cursor: the last category listed and the revision of the first page"""
+    raw = json.dumps([after, revision]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a page cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after, revision = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    
+    if not isinstance(after, str) or not isinstance(revision, int):
+        raise ValueError("Invalid cursor")
+    return after, revision
+
+
+def make_etag(*parts: str) -> str:
+    """Build a strong ETag from content hashes and names"""
+    return '"' + hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of a content-encoded representation (strong ETags differ per encoding)"""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check If-None-Match against an ETag or any of its encoded variants
+    
+    Uses weak comparison, as RFC 9110 requires for GET.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == etag or (tag.startswith(etag[:-1] + "-") and tag.endswith('"')):
+            return True
+    return False
+
+
+def not_modified(etag: str, encoding: Optional[str] = None) -> Response:
+    """Empty 304 response for a matching conditional GET"""
+    return Response(status_code=304, headers={
+        "ETag": variant_etag(etag, encoding),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    })
+
+
+def cached_json_response(body: bytes, etag: str, encoding: Optional[str]) -> Response:
+    """Send a pre-serialized (and possibly pre-compressed) JSON body"""
+    headers = {
+        "ETag": variant_etag(etag, encoding),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Attach a validator that clients must revalidate before reuse"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def is_ndjson_request(request: Request) -> bool:
+    """Check whether the request body is newline-delimited JSON"""
+    return media_type(request) in NDJSON_MEDIA_TYPES
+
+
+def media_type(request: Request) -> str:
+    """Get the request's Content-Type without parameters"""
+    return request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+
+async def read_json_body(request: Request) -> Any:
+    """Parse a JSON request body, rejecting malformed JSON with a 400"""
+    try:
+        return json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+
+
+def parse_ndjson_variables(body: bytes) -> List[Dict[str, Any]]:
+    """Parse an NDJSON body into a list of variable dicts (blank lines are skipped)"""
+    items = []
+    
+    for line_number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            variables = json.loads(line)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_number}: {str(e)}")
+        if not isinstance(variables, dict):
+            raise HTTPException(status_code=400, detail=f"Line {line_number} is not a JSON object")
+        items.append(variables)
+    
+    return items
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for bodies that are produced while the request is still being read
+    
+    Starlette's StreamingResponse watches for disconnects by calling receive()
+    concurrently, which would steal request body chunks from the body iterator.
+    Here the iterator reads the request itself and sees disconnects through it.
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        
+        if self.background is not None:
+            await self.background()
+
+
+async def stream_rendered_ndjson(request: Request, plan) -> AsyncIterator[bytes]:
+    """
+    Render NDJSON request lines as they arrive and yield NDJSON result lines
+    
+    Input is consumed chunk by chunk and each chunk's results are yielded
+    before the next chunk is read, so memory stays bounded by the chunk size
+    and NDJSON_MAX_LINE_BYTES regardless of the job size.
+    """
+    buffer = b""
+    line_number = 0
+    skipping = False
+    
+    def render_line(line: bytes) -> Optional[str]:
+        if not line.strip():
+            return None
+        try:
+            variables = json.loads(line)
+            if not isinstance(variables, dict):
+                raise ValueError("line is not a JSON object")
+            result = storage.render_with_plan(plan, variables)
+        except ValueError as e:
+            result = {"success": False, "error": f"Invalid line: {str(e)}"}
+        result["line"] = line_number
+        return json.dumps(result, ensure_ascii=False)
+    
+    async for chunk in request.stream():
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        output = []
+        
+        for line in lines:
+            line_number += 1
+            if skipping:
+                skipping = False
+                continue
+            rendered = render_line(line)
+            if rendered is not None:
+                output.append(rendered)
+        
+        if len(buffer) > NDJSON_MAX_LINE_BYTES:
+            # Drop the oversized line; its tail is skipped once the newline arrives
+            if not skipping:
+                output.append(json.dumps({
+                    "success": False,
+                    "error": f"Line exceeds {NDJSON_MAX_LINE_BYTES} bytes",
+                    "line": line_number + 1
+                }))
+                skipping = True
+            buffer = b""
+        
+        if output:
+            yield ("\n".join(output) + "\n").encode("utf-8")
+    
+    if buffer and not skipping:
+        line_number += 1
+        rendered = render_line(buffer)
+        if rendered is not None:
+            yield (rendered + "\n").encode("utf-8")
+
+
 # === WEB ROUTES ===
 
 @app.get("/", response_class=HTMLResponse)
@@ -70,32 +429,88 @@ async def admin_interface(request: Request):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    categories = storage.list_categories()
+    categories = list((await storage.refresh_catalog()).keys())
     
     return {
         "status": "healthy",
         "service": "prompt-studio",
         "version": "1.0.0",
         "categories_count": len(categories),
-        "available_categories": categories
+        "available_categories": categories,
+        "cache": storage.cache_stats(),
+        "response_cache": storage.response_cache_stats()
     }
 
 
+@app.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus metrics for this worker process"""
+    return Response(METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 # === API ROUTES ===
 
 @app.get("/api/prompts", response_model=PromptListResponse)
-async def list_all_prompts(api_key: str = Depends(verify_api_key)):
+async def list_all_prompts(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    since_revision: Optional[int] = Query(None, ge=0),
+    api_key: str = Depends(verify_api_key)
+):
     """
     List all available prompts with summary information
+    
+    - limit / cursor: page through categories in name order; pass the
+      returned next_cursor to get the following page
+    - fields: comma-separated summary fields to return
+      (version, description, template_count, template_names, revision)
+    - since_revision: only categories changed after a revision returned by
+      an earlier listing, plus the names of those deleted since
+    
+    Every page of a listing reports the revision of its first page, so it
+    is safe to use as the next since_revision once all pages are fetched.
+    Supports conditional GETs: the ETag is derived from the catalog's content
+    hashes and the query.
     """
+    field_list = None
+    if fields is not None:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(field_list) - set(LIST_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown summary fields: {', '.join(sorted(unknown))}")
+    
+    after, first_revision = None, None
+    if cursor is not None:
+        try:
+            after, first_revision = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        all_prompts = storage.get_all_prompts()
+        all_prompts = await storage.get_all_prompts(field_list, since_revision, after, limit)
+        
+        # The compression middleware tags the 200's ETag with its encoding; the 304 must match it
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        etag = make_etag("catalog", all_prompts["digest"], request.url.query)
+        if etag_matches(request, etag):
+            return not_modified(etag, encoding)
+        set_etag(response, etag)
+        
+        revision = all_prompts["revision"] if first_revision is None else first_revision
+        next_after = all_prompts["next_after"]
         
         return PromptListResponse(
             success=True,
             categories=all_prompts["categories"],
             total_categories=all_prompts["total_categories"],
-            total_templates=all_prompts["total_templates"]
+            total_templates=all_prompts["total_templates"],
+            revision=revision,
+            next_cursor=encode_cursor(next_after, revision) if next_after is not None else None,
+            deleted=all_prompts["deleted"],
+            resync_required=not all_prompts["complete"]
         )
     
     except Exception as e:
@@ -106,22 +521,33 @@ async def list_all_prompts(api_key: str = Depends(verify_api_key)):
 @app.get("/api/prompts/{category}")
 async def get_prompt_category(
     category: str, 
+    request: Request,
     api_key: str = Depends(verify_api_key)
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get a specific prompt category with all templates
+    
+    Supports conditional GETs: an unchanged category is answered with a 304
+    from its known content hash, before the category is loaded. Bodies are
+    served pre-serialized (and pre-compressed) from the response cache.
     """
     try:
-        prompt_category = storage.get_category(category)
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        
+        digest = storage.category_digest(category)
+        if digest is not None and etag_matches(request, make_etag(digest)):
+            return not_modified(make_etag(digest), encoding)
         
-        if not prompt_category:
+        body, digest = await storage.get_category_response(category, encoding)
+        
+        if body is None:
             raise HTTPException(status_code=404, detail=f"Category '{category}' not found")
         
-        # Convert to dictionary for JSON response
-        return {
-            "success": True,
-            "category": prompt_category.dict()
-        }
+        etag = make_etag(digest)
+        if etag_matches(request, etag):
+            return not_modified(etag, encoding)
+        
+        return cached_json_response(body, etag, encoding)
     
     except HTTPException:
         raise
@@ -140,11 +566,8 @@ async def update_prompt_category(
     Update a prompt category
     """
     try:
-        # Create backup before updating
-        storage.backup_category(category)
-        
-        # Save the updated category
-        success = storage.save_category(category, request.data)
+        # Save the updated category (the previous version is backed up by the storage)
+        success = await storage.save_category(category, request.data)
         
         if not success:
             raise HTTPException(status_code=500, detail="Failed to save category")
@@ -163,6 +586,130 @@ async def update_prompt_category(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.patch("/api/prompts/{category}")
+async def patch_prompt_category(
+    category: str,
+    request: Request,
+    api_key: str = Depends(verify_api_key)
+) -> Dict[str, Any]:
+    """
+    Apply a JSON Patch (application/json-patch+json) to a category
+    
+    Only templates the patch touches are re-validated.
+    """
+    if media_type(request) != JSON_PATCH_MEDIA_TYPE:
+        raise HTTPException(status_code=415, detail=f"Use Content-Type: {JSON_PATCH_MEDIA_TYPE}")
+    
+    operations = await read_json_body(request)
+    
+    try:
+        success = await storage.update_category(
+            category,
+            lambda current: apply_json_patch(current, operations)
+        )
+    except PatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if success is None:
+        raise HTTPException(status_code=404, detail=f"Category '{category}' not found")
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to save category")
+    
+    logger.info(f"✅ Patched category: {category}")
+    
+    return {
+        "success": True,
+        "message": f"Category '{category}' updated successfully"
+    }
+
+
+@app.patch("/api/prompts/{category}/{template_name}")
+async def patch_prompt_template(
+    category: str,
+    template_name: str,
+    request: Request,
+    api_key: str = Depends(verify_api_key)
+) -> Dict[str, Any]:
+    """
+    Update fields of a single template (JSON merge patch)
+    
+    Only the patched template is validated; other templates are left untouched.
+    """
+    if media_type(request) not in MERGE_PATCH_MEDIA_TYPES:
+        raise HTTPException(status_code=415, detail="Use Content-Type: application/merge-patch+json")
+    
+    changes = await read_json_body(request)
+    updated = {}
+    
+    def mutate(current: PromptCategory) -> PromptCategory:
+        template = current.templates.get(template_name)
+        if template is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Template '{template_name}' not found in category '{category}'"
+            )
+        
+        updated["template"] = merge_template(template, changes)
+        return current.copy(update={"templates": {**current.templates, template_name: updated["template"]}})
+    
+    try:
+        success = await storage.update_category(category, mutate)
+    except PatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if success is None:
+        raise HTTPException(status_code=404, detail=f"Category '{category}' not found")
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to save template")
+    
+    logger.info(f"✅ Patched template: {category}.{template_name}")
+    
+    return {
+        "success": True,
+        "category": category,
+        "template_name": template_name,
+        "template": updated["template"].dict()
+    }
+
+
+@app.post("/api/prompts/bulk", response_model=PromptBulkResponse)
+async def bulk_get_templates(
+    request: PromptBulkRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Fetch several templates by "category.template" reference in one call
+    
+    Each category is loaded at most once; unknown references are reported
+    under "errors" instead of failing the whole request.
+    """
+    refs = []
+    for ref in request.refs:
+        category, _, template_name = ref.partition(".")
+        if not category or not template_name:
+            raise HTTPException(status_code=400, detail=f"Invalid template reference '{ref}', expected 'category.template'")
+        refs.append((category, template_name))
+    
+    if request.fields is not None:
+        unknown = set(request.fields) - set(TEMPLATE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown template fields: {', '.join(sorted(unknown))}")
+    
+    try:
+        result = await storage.get_templates(refs, request.fields)
+        
+        return PromptBulkResponse(
+            success=True,
+            templates=result["templates"],
+            errors=result["errors"],
+            total=len(result["templates"])
+        )
+    
+    except Exception as e:
+        logger.error(f"❌ Bulk template fetch failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/prompts/test", response_model=PromptTestResponse)
 async def test_prompt_rendering(
     request: PromptTestRequest,
@@ -172,7 +719,7 @@ async def test_prompt_rendering(
     Test prompt rendering with provided variables
     """
     try:
-        result = storage.test_prompt_rendering(
+        result = await storage.test_prompt_rendering(
             request.category,
             request.template_name,
             request.variables
@@ -193,35 +740,121 @@ async def test_prompt_rendering(
         )
 
 
+@app.post("/api/prompts/render/batch", response_model=PromptBatchRenderResponse)
+async def render_prompt_batch(
+    request: Request,
+    category: Optional[str] = None,
+    template_name: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Render many variable sets against one template in a single request
+    
+    Accepts a JSON PromptBatchRenderRequest body, or an NDJSON body (one
+    variables object per line) with category and template_name as query parameters.
+    """
+    try:
+        if is_ndjson_request(request):
+            if not category or not template_name:
+                raise HTTPException(
+                    status_code=422,
+                    detail="category and template_name query parameters are required for NDJSON input"
+                )
+            batch = PromptBatchRenderRequest(
+                category=category,
+                template_name=template_name,
+                items=parse_ndjson_variables(await request.body())
+            )
+        else:
+            batch = PromptBatchRenderRequest(**await request.json())
+    
+    except HTTPException:
+        raise
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {str(e)}")
+    
+    try:
+        result = await storage.render_batch(
+            batch.category,
+            batch.template_name,
+            batch.items,
+            defaults=batch.variables
+        )
+        
+        if not result["success"]:
+            return PromptBatchRenderResponse(success=False, error=result.get("error"))
+        
+        results = [PromptTestResponse(**item) for item in result["results"]]
+        
+        return PromptBatchRenderResponse(
+            success=True,
+            results=results,
+            total=len(results)
+        )
+    
+    except Exception as e:
+        logger.error(f"❌ Batch render failed: {str(e)}")
+        return PromptBatchRenderResponse(
+            success=False,
+            error=str(e)
+        )
+
+
+@app.post("/api/prompts/render/stream")
+async def render_prompt_stream(
+    request: Request,
+    category: str,
+    template_name: str,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Stream-render an NDJSON body of variable sets against one template
+    
+    Each input line is a variables object; each output line carries the same
+    fields as PromptTestResponse plus the input line number.
+    """
+    plan, error = await storage.resolve_plan(category, template_name)
+    if plan is None:
+        raise HTTPException(status_code=404, detail=error)
+    
+    return DuplexStreamingResponse(
+        stream_rendered_ndjson(request, plan),
+        media_type="application/x-ndjson"
+    )
+
+
 @app.get("/api/prompts/{category}/{template_name}")
 async def get_specific_template(
     category: str,
     template_name: str,
+    request: Request,
     api_key: str = Depends(verify_api_key)
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get a specific template from a category
+    
+    Supports conditional GETs; the ETag follows the containing category's content hash.
+    Bodies are served pre-serialized from the response cache.
     """
     try:
-        prompt_category = storage.get_category(category)
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
         
-        if not prompt_category:
-            raise HTTPException(status_code=404, detail=f"Category '{category}' not found")
+        digest = storage.category_digest(category)
+        if digest is not None and etag_matches(request, make_etag(digest, template_name)):
+            return not_modified(make_etag(digest, template_name), encoding)
         
-        if template_name not in prompt_category.templates:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Template '{template_name}' not found in category '{category}'"
-            )
+        body, error, digest = await storage.get_template_response(category, template_name, encoding)
         
-        template = prompt_category.templates[template_name]
+        if body is None:
+            raise HTTPException(status_code=404, detail=error)
         
-        return {
-            "success": True,
-            "category": category,
-            "template_name": template_name,
-            "template": template.dict()
-        }
+        etag = make_etag(digest, template_name)
+        if etag_matches(request, etag):
+            return not_modified(etag, encoding)
+        
+        return cached_json_response(body, etag, encoding)
     
     except HTTPException:
         raise
@@ -236,7 +869,7 @@ async def get_specific_template(
 async def list_categories(api_key: str = Depends(verify_api_key)):
     """List all category names"""
     try:
-        categories = storage.list_categories()
+        categories = await storage.list_categories()
         return {
             "success": True,
             "categories": categories,
@@ -247,6 +880,111 @@ async def list_categories(api_key: str = Depends(verify_api_key)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/admin/render-stats")
+async def get_render_stats(
+    limit: int = Query(10, ge=1, le=1000),
+    sort: str = "renders",
+    category: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    List the hottest templates of this worker with their render statistics
+    
+    sort is one of renders, render_time (total), p99_render_time, output_size
+    (p99 rendered length in characters) or missing (renders with missing
+    variables). Times and sizes are estimated from histogram buckets.
+    """
+    if sort not in RENDER_STATS_SORT_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sort key '{sort}', expected one of: {', '.join(RENDER_STATS_SORT_KEYS)}"
+        )
+    
+    templates = storage.top_rendered_templates(limit, sort, category)
+    return {
+        "success": True,
+        "sort": sort,
+        "templates": templates,
+        "count": len(templates)
+    }
+
+
+@app.get("/api/admin/profile")
+async def profile_worker(
+    seconds: float = Query(5.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    format: str = "collapsed",
+    include_idle: bool = False,
+    api_key: str = Depends(verify_api_key)
+) -> Response:
+    """
+    Profile this worker for a few seconds
+    
+    - format=collapsed: sample every thread's stack each interval_ms and
+      return collapsed stacks for flamegraph.pl or speedscope
+    - format=cprofile: cProfile the event loop thread and return a pstats
+      dump (load it with pstats.Stats or snakeviz)
+    
+    Only one profile runs per worker at a time.
+    """
+    if format not in ("collapsed", "cprofile"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'cprofile'")
+    
+    if not acquire_profiler():
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+    
+    try:
+        logger.info(f"🔬 Profiling worker for {seconds}s ({format})")
+        
+        if format == "collapsed":
+            stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000, include_idle)
+            return Response(format_collapsed(stacks), media_type="text/plain")
+        
+        stats = await profile_event_loop(seconds)
+        return Response(
+            dump_stats(stats),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="worker.prof"'}
+        )
+    
+    finally:
+        release_profiler()
+
+
+@app.get("/api/admin/profiles")
+async def list_request_profiles(api_key: str = Depends(verify_api_key)):
+    """List the kept profiles of requests sent with an X-Profile header, newest first"""
+    profiles = request_profiles.list()
+    return {
+        "success": True,
+        "profiles": profiles,
+        "count": len(profiles)
+    }
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    format: str = "text",
+    api_key: str = Depends(verify_api_key)
+) -> Response:
+    """Get a request profile as text (top functions by cumulative time) or a pstats dump"""
+    profile = request_profiles.get(profile_id)
+    if profile is None or profile.stats is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    
+    if format == "pstats":
+        return Response(
+            dump_stats(profile.stats),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    if format != "text":
+        raise HTTPException(status_code=400, detail="format must be 'text' or 'pstats'")
+    
+    return Response(format_stats(profile.stats), media_type="text/plain")
+
+
 @app.post("/api/admin/backup/{category}")
 async def create_backup(
     category: str,
@@ -254,7 +992,7 @@ async def create_backup(
 ):
     """Create a timestamped backup of a category"""
     try:
-        success = storage.backup_category(category)
+        success = await storage.backup_category(category)
         
         if not success:
             raise HTTPException(status_code=404, detail=f"Category '{category}' not found")
@@ -271,6 +1009,86 @@ async def create_backup(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/admin/backups")
+async def list_backups(
+    category: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """List backups from the backup store, newest first"""
+    try:
+        backups = await storage.list_backups(category)
+        return {
+            "success": True,
+            "backups": backups,
+            "count": len(backups)
+        }
+    except Exception as e:
+        logger.error(f"❌ Failed to list backups: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/backups/compact")
+async def compact_backups(api_key: str = Depends(verify_api_key)):
+    """Apply the backup retention policy and delete unreferenced backup blobs"""
+    try:
+        result = await storage.compact_backups()
+        return {
+            "success": True,
+            **result
+        }
+    except Exception as e:
+        logger.error(f"❌ Backup compaction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/history/{category}")
+async def list_revisions(
+    category: str,
+    api_key: str = Depends(verify_api_key)
+):
+    """List the saved revisions of a category, oldest first"""
+    try:
+        revisions = await storage.list_revisions(category)
+        return {
+            "success": True,
+            "category": category,
+            "revisions": revisions,
+            "count": len(revisions)
+        }
+    except Exception as e:
+        logger.error(f"❌ Failed to list revisions of {category}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/history/{category}/{revision}")
+async def get_revision(
+    category: str,
+    revision: int,
+    api_key: str = Depends(verify_api_key)
+):
+    """Get a historical revision of a category"""
+    try:
+        historical = await storage.get_revision(category, revision)
+        
+        if historical is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Revision {revision} of category '{category}' not found"
+            )
+        
+        return {
+            "success": True,
+            "category": category,
+            **historical
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Failed to get revision {revision} of {category}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 if __name__ == "__main__":
     import uvicorn
     
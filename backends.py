@@ -0,0 +1,466 @@
+"""
+Prompt Studio - Storage Backends
+Where category content is persisted: one JSON file per category, or SQLite
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models import PromptCategory, PromptTemplate
+from fileio import FsyncBatcher, atomic_write_bytes
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# (version, size) pair that changes whenever a category's content changes
+ContentKey = Tuple[int, int]
+
+TEMPLATE_FIELDS = ("content", "description", "variables", "model", "max_tokens")
+
+
+def category_name_from_file(file_name: str) -> Optional[str]:
+    """Get the category name of a prompts directory entry, or None if it is not a category file"""
+    if not file_name.endswith(".json") or file_name.endswith(".backup.json"):
+        return None
+    return file_name[:-len(".json")]
+
+
+def category_from_data(data: Dict, category: str) -> PromptCategory:
+    """Build a PromptCategory from its JSON representation"""
+    templates = {}
+    for name, template_data in data.get('templates', {}).items():
+        templates[name] = PromptTemplate(**template_data)
+    
+    return PromptCategory(
+        version=data.get('version', '1.0.0'),
+        category=data.get('category', category),
+        description=data.get('description', ''),
+        templates=templates
+    )
+
+
+def serialize_category(prompt_category: PromptCategory) -> bytes:
+    """Serialize a category to the pretty-printed file format"""
+    data = {
+        "version": prompt_category.version,
+        "category": prompt_category.category,
+        "description": prompt_category.description,
+        "templates": {}
+    }
+    
+    for name, template in prompt_category.templates.items():
+        data["templates"][name] = {field: getattr(template, field) for field in TEMPLATE_FIELDS}
+    
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+class PromptBackend(ABC):
+    """
+    Persistence interface behind PromptStorage
+    
+    Backends only store and fetch category content. Caching, backups,
+    version history and cross-worker coherence are layered on top by
+    PromptStorage and work the same for every backend.
+    """
+    
+    name = "abstract"
+    
+    @abstractmethod
+    def list_categories(self) -> List[str]:
+        """List stored category names, sorted"""
+    
+    @abstractmethod
+    def scan(self) -> Iterator[Tuple[str, ContentKey]]:
+        """Yield every category with its content key"""
+    
+    @abstractmethod
+    def stat(self, category: str) -> Optional[ContentKey]:
+        """Get a category's content key, or None if it does not exist"""
+    
+    @abstractmethod
+    def read(self, category: str) -> Optional[Tuple[ContentKey, Dict, str]]:
+        """
+        Read a category
+        
+        Returns:
+            (content key, JSON data, sha256 of the serialized content), or None if not found
+        """
+    
+    @abstractmethod
+    def read_bytes(self, category: str) -> Optional[bytes]:
+        """Get a category's serialized content, or None if it does not exist"""
+    
+    def read_template(self, category: str, template_name: str) -> Optional[Tuple[Dict, str]]:
+        """
+        Get one template's fields
+        
+        Returns:
+            (template fields, category content hash), or None if the category or template does not exist
+        """
+        found = self.read(category)
+        if found is None:
+            return None
+        
+        template = found[1].get("templates", {}).get(template_name)
+        return (template, found[2]) if template is not None else None
+    
+    @abstractmethod
+    def write(self, category: str, prompt_category: PromptCategory, content: bytes, digest: str) -> ContentKey:
+        """
+        Replace a category's content
+        
+        Args:
+            category: Category name
+            prompt_category: Category to store
+            content: Its serialized form (as produced by serialize_category)
+            digest: sha256 of content
+        
+        Returns:
+            The new content key
+        """
+    
+    def flush(self) -> int:
+        """Make completed writes durable; returns the number of items flushed"""
+        return 0
+    
+    def close(self) -> None:
+        """Flush and release resources"""
+
+
+class JsonFileBackend(PromptBackend):
+    """One pretty-printed JSON file per category in the prompts directory"""
+    
+    name = "json"
+    
+    def __init__(self, prompts_dir: Path, fsync_interval: float = 1.0):
+        """
+        Initialize the file backend
+        
+        Args:
+            prompts_dir: Directory containing prompt JSON files
+            fsync_interval: Seconds between batched directory fsyncs of saved categories
+                (0 fsyncs every save); file data is always flushed before the rename
+        """
+        self.prompts_dir = Path(prompts_dir)
+        self._fsync = FsyncBatcher(fsync_interval)
+    
+    def file_path(self, category: str) -> Path:
+        """Get the file path for a category"""
+        return self.prompts_dir / f"{category}.json"
+    
+    def list_categories(self) -> List[str]:
+        return sorted(category for category, _ in self.scan())
+    
+    def scan(self) -> Iterator[Tuple[str, ContentKey]]:
+        with os.scandir(self.prompts_dir) as it:
+            for dir_entry in it:
+                category_name = category_name_from_file(dir_entry.name)
+                if not category_name or not dir_entry.is_file():
+                    continue
+                
+                stat = dir_entry.stat()
+                yield category_name, (stat.st_mtime_ns, stat.st_size)
+    
+    def stat(self, category: str) -> Optional[ContentKey]:
+        try:
+            stat = self.file_path(category).stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def read(self, category: str) -> Optional[Tuple[ContentKey, Dict, str]]:
+        try:
+            with span("file.read", category=category), open(self.file_path(category), 'rb') as f:
+                stat = os.fstat(f.fileno())
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        
+        with span("json.parse", category=category, bytes=len(raw)):
+            data = json.loads(raw)
+        return (stat.st_mtime_ns, stat.st_size), data, hashlib.sha256(raw).hexdigest()
+    
+    def read_bytes(self, category: str) -> Optional[bytes]:
+        try:
+            return self.file_path(category).read_bytes()
+        except FileNotFoundError:
+            return None
+    
+    def write(self, category: str, prompt_category: PromptCategory, content: bytes, digest: str) -> ContentKey:
+        file_path = self.file_path(category)
+        
+        # The data is flushed before the rename; only the directory flush is batched
+        atomic_write_bytes(file_path, content, fsync=True, fsync_dir=not self._fsync.enabled)
+        if self._fsync.enabled:
+            self._fsync.add(file_path.parent)
+        
+        stat = file_path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def flush(self) -> int:
+        return self._fsync.flush()
+    
+    def close(self) -> None:
+        self._fsync.close()
+
+
+class SqliteBackend(PromptBackend):
+    """
+    SQLite database with one row per template
+    
+    Runs in WAL mode so readers never block the writer. Templates are keyed
+    by (category, name), so single-template reads are an index lookup and a
+    save only rewrites the template rows whose content changed.
+    """
+    
+    name = "sqlite"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS categories (
+            name TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT NOT NULL,
+            revision INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            hash TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS templates (
+            category TEXT NOT NULL REFERENCES categories(name) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            description TEXT,
+            variables TEXT NOT NULL,
+            model TEXT,
+            max_tokens INTEGER,
+            hash TEXT NOT NULL,
+            PRIMARY KEY (category, name)
+        ) WITHOUT ROWID;
+    """
+    
+    def __init__(self, db_path: Path):
+        """
+        Open (or create) the database
+        
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # One connection per thread; sqlite3 connections must not be shared across threads
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
+        self._connection().executescript(self.SCHEMA)
+        logger.info(f"🗄️ SQLite prompt backend: {self.db_path}")
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def _transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """Run statements in one transaction (a consistent snapshot for reads)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    
+    def list_categories(self) -> List[str]:
+        rows = self._connection().execute("SELECT name FROM categories ORDER BY name")
+        return [row[0] for row in rows]
+    
+    def scan(self) -> Iterator[Tuple[str, ContentKey]]:
+        rows = self._connection().execute("SELECT name, revision, size FROM categories").fetchall()
+        for name, revision, size in rows:
+            yield name, (revision, size)
+    
+    def stat(self, category: str) -> Optional[ContentKey]:
+        row = self._connection().execute(
+            "SELECT revision, size FROM categories WHERE name = ?", (category,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+    
+    def read(self, category: str) -> Optional[Tuple[ContentKey, Dict, str]]:
+        with span("sqlite.read", category=category), self._transaction() as conn:
+            row = conn.execute(
+                "SELECT version, category, description, revision, size, hash FROM categories WHERE name = ?",
+                (category,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            templates = conn.execute(
+                "SELECT name, content, description, variables, model, max_tokens FROM templates "
+                "WHERE category = ? ORDER BY position",
+                (category,)
+            ).fetchall()
+        
+        version, category_field, description, revision, size, digest = row
+        data = {
+            "version": version,
+            "category": category_field,
+            "description": description,
+            "templates": {template[0]: self._template_from_row(template[1:]) for template in templates}
+        }
+        return (revision, size), data, digest
+    
+    def read_bytes(self, category: str) -> Optional[bytes]:
+        found = self.read(category)
+        if found is None:
+            return None
+        return serialize_category(category_from_data(found[1], category))
+    
+    def read_template(self, category: str, template_name: str) -> Optional[Tuple[Dict, str]]:
+        row = self._connection().execute(
+            "SELECT t.content, t.description, t.variables, t.model, t.max_tokens, c.hash "
+            "FROM templates t JOIN categories c ON c.name = t.category "
+            "WHERE t.category = ? AND t.name = ?",
+            (category, template_name)
+        ).fetchone()
+        return (self._template_from_row(row[:5]), row[5]) if row else None
+    
+    def write(self, category: str, prompt_category: PromptCategory, content: bytes, digest: str) -> ContentKey:
+        with self._transaction(immediate=True) as conn:
+            previous = conn.execute(
+                "SELECT revision FROM categories WHERE name = ?", (category,)
+            ).fetchone()
+            revision = max(time.time_ns(), previous[0] + 1 if previous else 0)
+            
+            conn.execute(
+                "INSERT INTO categories (name, version, category, description, revision, size, hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET version = excluded.version, category = excluded.category, "
+                "description = excluded.description, revision = excluded.revision, "
+                "size = excluded.size, hash = excluded.hash",
+                (
+                    category,
+                    prompt_category.version,
+                    prompt_category.category,
+                    prompt_category.description,
+                    revision,
+                    len(content),
+                    digest
+                )
+            )
+            
+            stale = dict(conn.execute(
+                "SELECT name, hash FROM templates WHERE category = ?", (category,)
+            ).fetchall())
+            
+            for position, (name, template) in enumerate(prompt_category.templates.items()):
+                row = self._template_row(template)
+                row_hash = hashlib.sha256(json.dumps([position, row], ensure_ascii=False).encode('utf-8')).hexdigest()
+                if stale.pop(name, None) == row_hash:
+                    continue
+                
+                conn.execute(
+                    "INSERT OR REPLACE INTO templates "
+                    "(category, name, position, content, description, variables, model, max_tokens, hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (category, name, position, *row, row_hash)
+                )
+            
+            conn.executemany(
+                "DELETE FROM templates WHERE category = ? AND name = ?",
+                [(category, name) for name in stale]
+            )
+        
+        return (revision, len(content))
+    
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    # Connections belong to their threads; closing from another thread may be refused
+                    pass
+            self._connections.clear()
+    
+    @staticmethod
+    def _template_row(template: PromptTemplate) -> List:
+        return [
+            template.content,
+            template.description,
+            json.dumps(template.variables, ensure_ascii=False),
+            template.model,
+            template.max_tokens
+        ]
+    
+    @staticmethod
+    def _template_from_row(row: Tuple) -> Dict:
+        content, description, variables, model, max_tokens = row
+        return {
+            "content": content,
+            "description": description,
+            "variables": json.loads(variables),
+            "model": model,
+            "max_tokens": max_tokens
+        }
+
+
+def migrate_json_to_sqlite(prompts_dir: Path, db_path: Path) -> Dict[str, int]:
+    """
+    Import every category file of a prompts directory into a SQLite database
+    
+    Categories already in the database are overwritten; unreadable files are
+    skipped and reported.
+    
+    Args:
+        prompts_dir: Directory containing prompt JSON files
+        db_path: SQLite database to create or update
+    
+    Returns:
+        Counts of imported and failed categories and imported templates
+    """
+    source = JsonFileBackend(prompts_dir, fsync_interval=0)
+    target = SqliteBackend(db_path)
+    stats = {"categories": 0, "templates": 0, "failed": 0}
+    
+    try:
+        for category in source.list_categories():
+            try:
+                found = source.read(category)
+                if found is None:
+                    continue
+                
+                prompt_category = category_from_data(found[1], category)
+                content = serialize_category(prompt_category)
+                target.write(category, prompt_category, content, hashlib.sha256(content).hexdigest())
+                
+                stats["categories"] += 1
+                stats["templates"] += len(prompt_category.templates)
+                logger.info(f"📥 Imported category: {category}")
+            
+            except Exception as e:
+                stats["failed"] += 1
+                logger.error(f"❌ Failed to import category {category}: {str(e)}")
+    finally:
+        target.close()
+    
+    return stats
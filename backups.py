@@ -0,0 +1,334 @@
+"""
+Prompt Studio - Backup Store
+Content-addressed category backups kept outside the prompts directory
+"""
+
+import json
+import re
+import fcntl
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from fileio import atomic_write_bytes, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+BACKUP_INDEX_FORMAT = 2
+
+# Backup files older versions of the storage wrote into the prompts directory
+LEGACY_TIMESTAMPED_BACKUP = re.compile(r"^(?P<category>.+)_(?P<timestamp>\d{8}_\d{6})\.backup\.json$")
+LEGACY_PRESAVE_SUFFIX = ".json.backup"
+
+
+class BackupStore:
+    """
+    Content-addressed store for category backups
+    
+    Each distinct category file content is stored once as a blob named after
+    its SHA-256 hash (backup_dir/blobs/ab/abcd....json). A backup is a small
+    record in backup_dir/index.json pointing at a blob, and a backup whose
+    content matches the category's latest backup is not recorded at all, so
+    disk use grows with distinct versions rather than with save count.
+    
+    Retention keeps the newest keep_last backups per category and drops
+    backups older than max_age_days (the newest backup is always kept).
+    
+    Changes are made under an flock and the index is reloaded when another
+    process rewrote it, so several workers can share one store.
+    """
+    
+    def __init__(
+        self,
+        backup_dir: Path,
+        keep_last: int = 20,
+        max_age_days: Optional[float] = None
+    ):
+        """
+        Initialize the backup store
+        
+        Args:
+            backup_dir: Directory holding backup blobs and the backup index
+            keep_last: Number of backups kept per category (0 keeps all)
+            max_age_days: Drop backups older than this many days (None keeps all)
+        """
+        self.backup_dir = Path(backup_dir)
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        self.blobs_dir = self.backup_dir / "blobs"
+        self.index_path = self.backup_dir / "index.json"
+        self.keep_last = keep_last
+        self.max_age_days = max_age_days
+        
+        self._records: List[Dict[str, Any]] = []
+        self._index_key = None
+        self._lock = threading.Lock()
+        
+        # Load (and if needed convert) the index under the store lock
+        with self._exclusive():
+            pass
+    
+    @contextmanager
+    def _exclusive(self):
+        """Lock the store against other threads and processes, with the index up to date"""
+        with self._lock, open(self.backup_dir / ".lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._reload_if_changed()
+            yield
+    
+    def _stat_index(self):
+        try:
+            stat = self.index_path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+    
+    def _reload_if_changed(self) -> None:
+        """Reload the index if it changed since this process last read or wrote it"""
+        index_key = self._stat_index()
+        if index_key != self._index_key:
+            self._records = []
+            self._load()
+            self._index_key = self._stat_index()
+    
+    def _load(self) -> None:
+        """Load the backup index, converting path-based (format 1) indexes"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            if data.get("format") == BACKUP_INDEX_FORMAT:
+                self._records = data.get("backups", [])
+            elif data.get("format") == 1:
+                self._convert_path_records(data.get("backups", []))
+                
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable backup index {self.index_path}: {str(e)}")
+    
+    def _convert_path_records(self, records: List[Dict[str, Any]]) -> None:
+        """Move format 1 backups (one full copy per record) into blobs"""
+        for record in records:
+            path = self.backup_dir / record["path"]
+            try:
+                content = path.read_bytes()
+            except OSError:
+                continue
+            
+            self._records.append(self._make_record(
+                record["category"],
+                datetime.fromisoformat(record["created_at"]),
+                record.get("kind", "manual"),
+                self._store_blob(content),
+                len(content)
+            ))
+            path.unlink()
+        
+        self._save_index()
+        logger.info(f"📦 Converted {len(self._records)} backups to content-addressed blobs")
+    
+    def _save_index(self) -> None:
+        """Persist the backup index (caller holds the lock)"""
+        write_json_atomic(self.index_path, {
+            "format": BACKUP_INDEX_FORMAT,
+            "backups": self._records
+        })
+        self._index_key = self._stat_index()
+    
+    def _blob_path(self, digest: str) -> Path:
+        """Path of the blob holding content with the given hash"""
+        return self.blobs_dir / digest[:2] / f"{digest}.json"
+    
+    def _store_blob(self, content: bytes) -> str:
+        """Write a blob unless it already exists and return its hash"""
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(digest)
+        
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_bytes(blob_path, content)
+        
+        return digest
+    
+    @staticmethod
+    def _make_record(category: str, created: datetime, kind: str, digest: str, size: int) -> Dict[str, Any]:
+        """Build a backup index record"""
+        return {
+            "id": f"{category}/{created.strftime('%Y%m%d_%H%M%S_%f')}",
+            "category": category,
+            "kind": kind,
+            "created_at": created.isoformat(),
+            "hash": digest,
+            "size": size
+        }
+    
+    def latest(self, category: str) -> Optional[Dict[str, Any]]:
+        """Get the newest backup record of a category"""
+        for record in reversed(self._records):
+            if record["category"] == category:
+                return record
+        return None
+    
+    def create(self, category: str, content: bytes, kind: str = "manual") -> Dict[str, Any]:
+        """
+        Store a backup of a category file's content
+        
+        Content identical to the category's latest backup is not stored again.
+        
+        Args:
+            category: Category name
+            content: Raw category file content
+            kind: Why the backup was taken ("manual" or "pre-save")
+            
+        Returns:
+            Index record of the new (or identical latest) backup
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        
+        with self._exclusive():
+            latest = self.latest(category)
+            if latest is not None and latest["hash"] == digest:
+                return latest
+            
+            self._store_blob(content)
+            record = self._make_record(category, datetime.now(), kind, digest, len(content))
+            self._records.append(record)
+            
+            self._collect_garbage(self._prune(category))
+            self._save_index()
+        
+        logger.info(f"📦 Created backup: {record['id']}")
+        return record
+    
+    def list(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List backups, newest first
+        
+        Args:
+            category: Only list backups of this category
+        """
+        with self._lock:
+            self._reload_if_changed()
+        
+        records = [r for r in self._records if category is None or r["category"] == category]
+        return sorted(records, key=lambda r: r["created_at"], reverse=True)
+    
+    def read(self, backup_id: str) -> Optional[bytes]:
+        """Read a backup's content by id"""
+        with self._lock:
+            self._reload_if_changed()
+        
+        for record in self._records:
+            if record["id"] == backup_id:
+                return self._blob_path(record["hash"]).read_bytes()
+        return None
+    
+    def _prune(self, category: str) -> List[Dict[str, Any]]:
+        """Apply the retention policy to one category (caller holds the lock)"""
+        records = [r for r in self._records if r["category"] == category]
+        records.sort(key=lambda r: r["created_at"], reverse=True)
+        
+        expired = []
+        if self.keep_last > 0:
+            expired.extend(records[self.keep_last:])
+            records = records[:self.keep_last]
+        
+        if self.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            expired.extend(r for r in records[1:] if r["created_at"] < cutoff)
+        
+        if expired:
+            expired_ids = {r["id"] for r in expired}
+            self._records = [r for r in self._records if r["id"] not in expired_ids]
+        
+        return expired
+    
+    def _collect_garbage(self, removed: Iterable[Dict[str, Any]]) -> int:
+        """Delete blobs no longer referenced by any record (caller holds the lock)"""
+        referenced = {r["hash"] for r in self._records}
+        deleted = 0
+        
+        for digest in {r["hash"] for r in removed} - referenced:
+            try:
+                self._blob_path(digest).unlink()
+                deleted += 1
+            except FileNotFoundError:
+                pass
+        
+        return deleted
+    
+    def compact(self) -> Dict[str, int]:
+        """
+        Apply the retention policy to every category and delete orphaned blobs
+        
+        Returns:
+            Counts of pruned backups and deleted blobs
+        """
+        with self._exclusive():
+            pruned = []
+            for category in {r["category"] for r in self._records}:
+                pruned.extend(self._prune(category))
+            
+            deleted = self._collect_garbage(pruned)
+            
+            # Sweep blobs left behind by interrupted writes or earlier policies
+            referenced = {r["hash"] for r in self._records}
+            if self.blobs_dir.exists():
+                for blob_path in self.blobs_dir.glob("*/*.json"):
+                    if blob_path.stem not in referenced:
+                        blob_path.unlink()
+                        deleted += 1
+            
+            self._save_index()
+        
+        logger.info(f"🧹 Compacted backups: {len(pruned)} pruned, {deleted} blobs deleted")
+        return {
+            "pruned_backups": len(pruned),
+            "deleted_blobs": deleted,
+            "remaining_backups": len(self._records)
+        }
+    
+    def import_legacy(self, prompts_dir: Path) -> int:
+        """
+        Move backups written into the prompts directory into the store
+        
+        Args:
+            prompts_dir: Prompts directory to sweep
+            
+        Returns:
+            Number of backup files imported
+        """
+        imported = 0
+        
+        with self._exclusive():
+            for path in sorted(Path(prompts_dir).iterdir()):
+                match = LEGACY_TIMESTAMPED_BACKUP.match(path.name)
+                if match:
+                    category = match.group("category")
+                    created = datetime.strptime(match.group("timestamp"), "%Y%m%d_%H%M%S")
+                    kind = "manual"
+                elif path.name.endswith(LEGACY_PRESAVE_SUFFIX):
+                    category = path.name[:-len(LEGACY_PRESAVE_SUFFIX)]
+                    created = datetime.fromtimestamp(path.stat().st_mtime)
+                    kind = "pre-save"
+                else:
+                    continue
+                
+                content = path.read_bytes()
+                self._records.append(self._make_record(
+                    category, created, kind, self._store_blob(content), len(content)
+                ))
+                path.unlink()
+                imported += 1
+            
+            if imported:
+                self._records.sort(key=lambda r: r["created_at"])
+                self._save_index()
+        
+        if imported:
+            logger.info(f"📦 Imported {imported} legacy backups into {self.backup_dir}")
+        return imported
@@ -0,0 +1,360 @@
+"""
+Prompt Studio - Storage Benchmark
+Times the storage and render hot paths against a synthetic prompt catalog
+
+Each operation is timed cold (a fresh PromptStorage, nothing parsed or
+cached in memory; the OS page cache stays warm) and warm (repeated on the
+same instance). Every repetition starts from a pristine copy of the
+generated catalog (or database), since saves change it. Results are
+written as JSON so runs can be compared across commits.
+
+Usage:
+    python benchmarks/bench_storage.py [--categories 100] [--templates 10]
+        [--body-size 200:2000] [--samples 200] [--repeat 3]
+        [--backend json|sqlite] [--snapshot] [--seed 1] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backends import SqliteBackend, migrate_json_to_sqlite  # noqa: E402
+from storage import PromptStorage  # noqa: E402
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("bench_storage")
+logger.setLevel(logging.INFO)
+
+WORDS = (
+    "analyze the following input and answer using only the provided context "
+    "classify summarize extract respond concisely in json format with fields "
+    "question answer category reason confidence table column query result"
+).split()
+
+
+def parse_range(value: str) -> tuple:
+    """Parse "min:max" (or a single number) into an inclusive integer range"""
+    low, _, high = value.partition(":")
+    low = int(low)
+    high = int(high) if high else low
+    if low < 0 or high < low:
+        raise argparse.ArgumentTypeError(f"Invalid range: {value}")
+    return low, high
+
+
+def make_content(rng: random.Random, size: int, variables: List[str]) -> str:
+    """Template body of roughly `size` characters with every variable placed in it"""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    
+    for name in variables:
+        words.insert(rng.randrange(len(words) + 1), f"${{{name}}}")
+    return " ".join(words)
+
+
+def generate_catalog(
+    prompts_dir: Path,
+    categories: int,
+    templates: tuple,
+    body_size: tuple,
+    variables: tuple,
+    seed: int
+) -> Dict[str, int]:
+    """
+    Write a synthetic catalog of category JSON files
+    
+    Args:
+        prompts_dir: Directory to write the category files to
+        categories: Number of categories
+        templates: (min, max) templates per category
+        body_size: (min, max) template body size in characters
+        variables: (min, max) variables per template
+        seed: Random seed, so a catalog can be regenerated exactly
+    
+    Returns:
+        Counts of categories, templates and bytes written
+    """
+    rng = random.Random(seed)
+    prompts_dir.mkdir(parents=True, exist_ok=True)
+    stats = {"categories": categories, "templates": 0, "bytes": 0}
+    
+    for index in range(categories):
+        template_count = rng.randint(*templates)
+        category_templates = {}
+        for template_index in range(template_count):
+            names = [f"var_{n}" for n in range(rng.randint(*variables))]
+            category_templates[f"template_{template_index:04d}"] = {
+                "content": make_content(rng, rng.randint(*body_size), names),
+                "description": f"Synthetic template {template_index}",
+                "variables": names,
+                "model": "gpt-4",
+                "max_tokens": rng.choice([256, 512, 1024, 2048])
+            }
+        
+        data = {
+            "version": "1.0.0",
+            "category": f"category_{index:06d}",
+            "description": f"Synthetic category {index}",
+            "templates": category_templates
+        }
+        content = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        (prompts_dir / f"category_{index:06d}.json").write_bytes(content)
+        
+        stats["templates"] += template_count
+        stats["bytes"] += len(content)
+    
+    return stats
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """Latency statistics in milliseconds"""
+    if not timings:
+        return {"n": 0}
+    
+    ordered = sorted(timings)
+    
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    
+    return {
+        "n": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+        "total_s": sum(ordered)
+    }
+
+
+def timed(func: Callable, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+class Benchmark:
+    """Runs each operation cold and warm against one generated catalog"""
+    
+    def __init__(self, workdir: Path, args: argparse.Namespace):
+        self.workdir = workdir
+        self.source_dir = workdir / "source"
+        self.prompts_dir = workdir / "prompts"
+        self.args = args
+        self.rng = random.Random(args.seed)
+    
+    def reset(self) -> None:
+        """Restore the generated catalog (or database) that saves in earlier repetitions changed"""
+        shutil.rmtree(self.prompts_dir, ignore_errors=True)
+        
+        if self.args.backend == "sqlite":
+            self.prompts_dir.mkdir()
+            for suffix in ("", "-wal", "-shm"):
+                (self.workdir / f"prompts.db{suffix}").unlink(missing_ok=True)
+            shutil.copy2(self.workdir / "source.db", self.workdir / "prompts.db")
+        else:
+            shutil.copytree(self.source_dir, self.prompts_dir)
+    
+    def new_storage(self) -> PromptStorage:
+        """A fresh storage instance with nothing in memory and no persisted index, history or backups"""
+        shutil.rmtree(self.prompts_dir / ".studio", ignore_errors=True)
+        
+        backend = SqliteBackend(self.workdir / "prompts.db") if self.args.backend == "sqlite" else None
+        return PromptStorage(
+            prompts_dir=str(self.prompts_dir),
+            snapshot=self.args.snapshot,
+            backend=backend,
+            fsync_interval=self.args.fsync_interval
+        )
+    
+    def sample(self, names: List[str]) -> List[str]:
+        return self.rng.sample(names, min(self.args.samples, len(names)))
+    
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, List[float]]] = {}
+        
+        def record(operation: str, phase: str, seconds: float) -> None:
+            results.setdefault(operation, {"cold": [], "warm": []})[phase].append(seconds)
+        
+        for _ in range(self.args.repeat):
+            self.reset()
+            
+            # Startup includes building the snapshot, which warms the cache, when enabled
+            start = time.perf_counter()
+            storage = self.new_storage()
+            record("startup", "cold", time.perf_counter() - start)
+            
+            # Catalog-wide operations: the first call builds the index from scratch
+            record("list_categories", "cold", timed(storage.list_categories))
+            record("get_all_prompts", "cold", timed(storage.get_all_prompts))
+            for _ in range(self.args.warm_iterations):
+                record("list_categories", "warm", timed(storage.list_categories))
+                record("get_all_prompts", "warm", timed(storage.get_all_prompts))
+            names = storage.list_categories()
+            storage.close()
+            
+            # Category reads and renders: first touch per category, then repeats
+            storage = self.new_storage()
+            sampled = self.sample(names)
+            for name in sampled:
+                record("get_category", "cold", timed(storage.get_category, name))
+            for name in sampled:
+                record("get_category", "warm", timed(storage.get_category, name))
+            
+            render_targets = [
+                (name, self.rng.choice(list(storage.get_category(name).templates)), {"var_0": "benchmark", "var_1": 42})
+                for name in sampled
+            ]
+            storage.close()
+            
+            storage = self.new_storage()
+            for target in render_targets:
+                record("test_prompt_rendering", "cold", timed(storage.test_prompt_rendering, *target))
+            for target in render_targets:
+                record("test_prompt_rendering", "warm", timed(storage.test_prompt_rendering, *target))
+            storage.close()
+            
+            # Writes: the first save or backup of a category seeds its history and blobs
+            storage = self.new_storage()
+            write_sample = sampled[:self.args.write_samples]
+            for phase in ("cold", "warm"):
+                for name in write_sample:
+                    category = storage.get_category(name)
+                    updated = category.copy(update={"description": f"{category.description} ({phase})"})
+                    record("save_category", phase, timed(storage.save_category, name, updated))
+            for name in write_sample:
+                record("backup_category", "cold", timed(storage.backup_category, name))
+            
+            # A backup of content identical to the latest one only takes the dedup shortcut
+            for name in write_sample:
+                record("backup_category_unchanged", "warm", timed(storage.backup_category, name))
+            
+            for name in write_sample:
+                category = storage.get_category(name)
+                storage.save_category(name, category.copy(update={"description": f"{category.description} (backup)"}))
+                record("backup_category", "warm", timed(storage.backup_category, name))
+            storage.close()
+        
+        return {
+            operation: {phase: summarize(timings) for phase, timings in phases.items()}
+            for operation, phases in results.items()
+        }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Prompt Studio storage and render hot paths")
+    parser.add_argument("--categories", type=int, default=100, help="Number of synthetic categories")
+    parser.add_argument("--templates", type=parse_range, default=(1, 20), help="Templates per category, min:max")
+    parser.add_argument("--body-size", type=parse_range, default=(200, 2000), help="Template size in characters, min:max")
+    parser.add_argument("--variables", type=parse_range, default=(0, 5), help="Variables per template, min:max")
+    parser.add_argument("--samples", type=int, default=200, help="Categories sampled for per-category operations")
+    parser.add_argument("--write-samples", type=int, default=50, help="Categories saved and backed up per repetition")
+    parser.add_argument("--warm-iterations", type=int, default=5, help="Warm calls of catalog-wide operations")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of the whole run")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json", help="Persistence backend")
+    parser.add_argument("--snapshot", action="store_true", help="Enable the shared memory-mapped snapshot")
+    parser.add_argument("--fsync-interval", type=float, default=1.0, help="Seconds between batched fsyncs (0 fsyncs every save)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the catalog and samples")
+    parser.add_argument("--workdir", help="Directory for the generated catalog (a temporary one by default)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated catalog")
+    parser.add_argument("--output", help="Write results to this JSON file instead of stdout")
+    args = parser.parse_args()
+    
+    if args.categories < 1 or args.samples < 1 or args.templates[0] < 1:
+        parser.error("--categories, --samples and the minimum of --templates must be positive")
+    
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="prompt-studio-bench-"))
+    try:
+        start = time.perf_counter()
+        catalog = generate_catalog(
+            workdir / "source",
+            args.categories,
+            args.templates,
+            args.body_size,
+            args.variables,
+            args.seed
+        )
+        if args.backend == "sqlite":
+            migrate_json_to_sqlite(workdir / "source", workdir / "source.db")
+        catalog["generation_s"] = time.perf_counter() - start
+        logger.info(
+            f"📦 Generated {catalog['categories']} categories, {catalog['templates']} templates "
+            f"({catalog['bytes'] / 1024 / 1024:.1f} MiB) in {catalog['generation_s']:.1f}s"
+        )
+        
+        results = Benchmark(workdir, args).run()
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "parameters": {
+                key: list(value) if isinstance(value, tuple) else value
+                for key, value in vars(args).items()
+                if key not in ("output", "workdir", "keep")
+            },
+            "catalog": catalog
+        },
+        "results": results
+    }
+    
+    for operation, phases in results.items():
+        for phase, stats in phases.items():
+            if not stats["n"]:
+                continue
+            logger.info(
+                f"⏱️ {operation:<26} {phase:<4} n={stats['n']:<5} "
+                f"p50={stats['p50_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms"
+            )
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
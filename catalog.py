@@ -0,0 +1,218 @@
+"""
+Prompt Studio - Catalog Index
+Persistent summary index of prompt categories
+"""
+
+import fcntl
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fileio import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FORMAT_VERSION = 2
+
+# Deleted categories remembered for since-revision queries
+MAX_TOMBSTONES = 1000
+
+
+class CatalogIndex:
+    """
+    Summary metadata for every category, persisted as a single JSON file
+    
+    Each entry records the category version, description, template names and
+    count, plus the (mtime_ns, size) file key and content hash it was built
+    from, so only files whose key changed need to be parsed again.
+    
+    The index is shared by every worker process. Changes are made inside
+    transaction(), which takes a file lock and reloads the index first, and
+    each content change is stamped with the next value of a catalog-wide
+    revision counter. Removed categories leave a tombstone carrying the
+    revision they were removed at, so clients can ask for everything that
+    changed after a revision they already have.
+    """
+    
+    def __init__(self, index_path: Path):
+        """
+        Initialize the catalog index
+        
+        Args:
+            index_path: JSON file the index is persisted to
+        """
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.lock_path = self.index_path.with_suffix(".lock")
+        
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._deleted: Dict[str, int] = {}
+        self._deleted_floor = 0
+        self._revision = 0
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._index_key = None
+        self._depth = 0
+        
+        self._load()
+        self._index_key = self._stat_index()
+    
+    def _load(self) -> None:
+        """Load the persisted index, starting empty if it is missing or unreadable"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            if data.get("format") == CATALOG_FORMAT_VERSION:
+                self._entries = data.get("categories", {})
+                self._deleted = data.get("deleted", {})
+                self._deleted_floor = data.get("deleted_floor", 0)
+                self._revision = data.get("revision", 0)
+            elif data.get("format") == 1:
+                # Format 1 had no revisions: number the existing entries in name order
+                self._entries = data.get("categories", {})
+                for name in sorted(self._entries):
+                    self._revision += 1
+                    self._entries[name]["revision"] = self._revision
+        
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable catalog index {self.index_path}: {str(e)}")
+    
+    def _stat_index(self):
+        try:
+            stat = self.index_path.stat()
+            return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except FileNotFoundError:
+            return None
+    
+    def _reload_if_changed(self) -> None:
+        """Reload the index if another process saved it since this one last did"""
+        index_key = self._stat_index()
+        if index_key != self._index_key:
+            self._entries, self._deleted = {}, {}
+            self._deleted_floor = self._revision = 0
+            self._load()
+            self._index_key = index_key
+            self._dirty = False
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Lock the index against other threads and processes for a batch of changes
+        
+        The index is reloaded on entry if another process saved it, and saved
+        on exit if it changed. Nested transactions join the outer one.
+        """
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+            
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._depth = 1
+                try:
+                    self._reload_if_changed()
+                    yield self
+                    self.save()
+                finally:
+                    self._depth = 0
+    
+    @property
+    def revision(self) -> int:
+        """Revision of the most recent change to the index"""
+        return self._revision
+    
+    def is_current(self, category: str, file_key: Tuple[int, int]) -> bool:
+        """Check whether a category's entry was built from the given file key"""
+        entry = self._entries.get(category)
+        return entry is not None and (entry["mtime_ns"], entry["size"]) == tuple(file_key)
+    
+    def get(self, category: str) -> Optional[Dict[str, Any]]:
+        """Get the summary entry of a category"""
+        return self._entries.get(category)
+    
+    def names(self) -> List[str]:
+        """List indexed category names"""
+        return sorted(self._entries)
+    
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Get all summary entries in category name order"""
+        return {name: self._entries[name] for name in self.names()}
+    
+    def changes_since(self, revision: int) -> Tuple[List[str], List[str], bool]:
+        """
+        List the categories changed and removed after a revision
+        
+        Args:
+            revision: Catalog revision the caller is up to date with
+        
+        Returns:
+            Changed category names, removed category names, and whether the
+            removals are complete (tombstones older than the oldest one kept
+            have been dropped)
+        """
+        changed = [name for name in self.names() if self._entries[name].get("revision", 0) > revision]
+        deleted = sorted(name for name, removed_at in self._deleted.items() if removed_at > revision)
+        return changed, deleted, revision >= self._deleted_floor
+    
+    def update(self, category: str, summary: Dict[str, Any]) -> None:
+        """Add or replace a category's summary entry, stamping content changes with a new revision"""
+        with self._lock:
+            current = self._entries.get(category)
+            if current is not None and current["hash"] == summary["hash"]:
+                summary["revision"] = current.get("revision", 0)
+            else:
+                self._revision += 1
+                summary["revision"] = self._revision
+            
+            self._entries[category] = summary
+            self._deleted.pop(category, None)
+            self._dirty = True
+    
+    def remove(self, category: str) -> None:
+        """Remove a category's summary entry, leaving a tombstone"""
+        with self._lock:
+            if self._entries.pop(category, None) is None:
+                return
+            
+            self._revision += 1
+            self._deleted[category] = self._revision
+            
+            if len(self._deleted) > MAX_TOMBSTONES:
+                oldest = min(self._deleted, key=self._deleted.get)
+                self._deleted_floor = self._deleted.pop(oldest)
+            
+            self._dirty = True
+    
+    def save(self) -> None:
+        """Persist the index if it changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            
+            data = {
+                "format": CATALOG_FORMAT_VERSION,
+                "revision": self._revision,
+                "categories": self._entries,
+                "deleted": self._deleted,
+                "deleted_floor": self._deleted_floor
+            }
+            
+            try:
+                write_json_atomic(self.index_path, data)
+                self._dirty = False
+                self._index_key = self._stat_index()
+            
+            except Exception as e:
+                logger.error(f"❌ Failed to save catalog index: {str(e)}")
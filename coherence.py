@@ -0,0 +1,103 @@
+"""
+Prompt Studio - Cross-Process Cache Coherence
+Shared generation counters for multi-worker deployments
+"""
+
+import os
+import mmap
+import zlib
+import fcntl
+import struct
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+COUNTER = struct.Struct("<Q")
+
+
+class GenerationTable:
+    """
+    Per-category generation counters in a memory-mapped file
+    
+    Every worker process maps the same file. A save bumps the counter of the
+    category's slot (and the global counter in slot 0) under an exclusive
+    flock; readers compare a cached entry's generation with the slot using a
+    plain memory read, so a save in one worker invalidates the others' caches
+    before the saving request returns. Categories are hashed into a fixed
+    number of slots, so a collision only causes an extra reload.
+    """
+    
+    def __init__(self, path: Path, slots: int = 4096):
+        """
+        Open (or create) the shared generation table
+        
+        Args:
+            path: Backing file, shared by all workers
+            slots: Number of per-category counter slots
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.slots = slots
+        self._size = COUNTER.size * (slots + 1)
+        
+        self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < self._size:
+                os.ftruncate(self._fd, self._size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        
+        self._map = mmap.mmap(self._fd, self._size)
+    
+    def _offset(self, category: str) -> int:
+        return COUNTER.size * (1 + zlib.crc32(category.encode('utf-8')) % self.slots)
+    
+    def get(self, category: str) -> int:
+        """Current generation of a category"""
+        return COUNTER.unpack_from(self._map, self._offset(category))[0]
+    
+    def global_generation(self) -> int:
+        """Generation bumped by every save in any worker"""
+        return COUNTER.unpack_from(self._map, 0)[0]
+    
+    def bump(self, category: str) -> int:
+        """
+        Advance a category's generation after it was saved
+        
+        Returns:
+            The new category generation
+        """
+        offset = self._offset(category)
+        
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            generation = COUNTER.unpack_from(self._map, offset)[0] + 1
+            COUNTER.pack_into(self._map, offset, generation)
+            COUNTER.pack_into(self._map, 0, COUNTER.unpack_from(self._map, 0)[0] + 1)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        
+        return generation
+    
+    def bump_global(self) -> int:
+        """
+        Advance only the global generation, e.g. after files changed outside any save
+        
+        Returns:
+            The new global generation
+        """
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            generation = COUNTER.unpack_from(self._map, 0)[0] + 1
+            COUNTER.pack_into(self._map, 0, generation)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        
+        return generation
+    
+    def close(self) -> None:
+        """Unmap and close the table"""
+        self._map.close()
+        os.close(self._fd)
@@ -0,0 +1,342 @@
+"""
+Prompt Studio - Response Compression
+Content-encoding negotiation, cached precompression and an ASGI middleware
+for dynamic responses (brotli and zstd are optional)
+"""
+
+import zlib
+import gzip
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Server preference, best first; used to break ties between equal q-values
+SUPPORTED_ENCODINGS: Tuple[str, ...] = tuple(
+    encoding for encoding, available in (
+        ("zstd", zstandard is not None),
+        ("br", brotli is not None),
+        ("gzip", True)
+    ) if available
+)
+
+# Cached bodies are compressed once per revision, so they get the strongest levels
+STATIC_LEVELS = {"gzip": 9, "br": 11, "zstd": 19}
+DYNAMIC_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+
+
+def compress(body: bytes, encoding: str, static: bool = True) -> bytes:
+    """
+    Compress a response body
+    
+    Args:
+        body: Uncompressed body
+        encoding: Content-Encoding token ("zstd", "br" or "gzip")
+        static: Use the strong levels meant for bodies that are cached
+    
+    Returns:
+        The encoded body
+    """
+    level = (STATIC_LEVELS if static else DYNAMIC_LEVELS)[encoding]
+    
+    if encoding == "gzip":
+        # mtime=0 keeps the output deterministic for identical content
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=level)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q-value}"""
+    accepted = {}
+    
+    for item in accept_encoding.split(","):
+        token, *params = item.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+        accepted[token] = quality
+    
+    return accepted
+
+
+def negotiate_encoding(
+    accept_encoding: Optional[str],
+    supported: Iterable[str] = SUPPORTED_ENCODINGS
+) -> Optional[str]:
+    """
+    Pick the best supported encoding for an Accept-Encoding header
+    
+    The highest q-value wins; ties go to the server's preference order.
+    "*" covers codings that are not listed explicitly.
+    
+    Returns:
+        The encoding to use, or None for the identity encoding
+    """
+    if not accept_encoding:
+        return None
+    
+    accepted = parse_accept_encoding(accept_encoding)
+    best, best_quality = None, 0.0
+    
+    for encoding in supported:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    
+    # An explicitly preferred identity beats weaker compressed codings
+    if best is not None and accepted.get("identity", 0.0) > best_quality:
+        return None
+    return best
+
+
+class _StreamEncoder:
+    """Incremental compressor that flushes after every chunk so streams stay live"""
+    
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        level = DYNAMIC_LEVELS[encoding]
+        
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "gzip":
+            return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def _untag_etags(headers: List[Tuple[bytes, bytes]]) -> Tuple[List[Tuple[bytes, bytes]], Dict[bytes, bytes]]:
+    """
+    Add the unencoded form of encoding-tagged entity tags to If-None-Match
+    
+    Compressed responses carry the app's ETag with a "-<encoding>" suffix,
+    which the app itself never issued; the bare tag lets it recognize them.
+    
+    Returns:
+        The request headers, and the tagged form of each added tag
+    """
+    tagged: Dict[bytes, bytes] = {}
+    result = []
+    
+    for name, value in headers:
+        if name == b"if-none-match":
+            tags = [tag.strip() for tag in value.split(b",") if tag.strip()]
+            for tag in list(tags):
+                for encoding in STATIC_LEVELS:
+                    suffix = b"-" + encoding.encode("latin-1") + b'"'
+                    if tag.endswith(suffix):
+                        bare = tag[:-len(suffix)] + b'"'
+                        tags.append(bare)
+                        tagged[bare.removeprefix(b"W/")] = tag.removeprefix(b"W/")
+                        break
+            value = b", ".join(tags)
+        result.append((name, value))
+    
+    return result, tagged
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing dynamic responses
+    
+    Responses that already carry a Content-Encoding (such as the cached,
+    precompressed prompt bodies) pass through untouched, as do NDJSON
+    streams, whose consumers read results line by line. Small bodies are
+    sent as-is. Streaming bodies are compressed incrementally.
+    
+    Strong ETags of compressed responses get a "-<encoding>" suffix; such
+    tags in If-None-Match are mapped back for the app, so revalidation
+    (of static files, for instance) still ends in a 304.
+    """
+    
+    def __init__(
+        self,
+        app: Callable,
+        minimum_size: int = 1024,
+        excluded_media_types: Iterable[str] = (
+            "application/x-ndjson",
+            "application/ndjson",
+            "application/jsonl",
+            "text/event-stream"
+        )
+    ):
+        """
+        Initialize the middleware
+        
+        Args:
+            app: ASGI application to wrap
+            minimum_size: Bodies smaller than this are not compressed
+            excluded_media_types: Media types that are never compressed
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_media_types = set(excluded_media_types)
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                encoding = negotiate_encoding(value.decode("latin-1"))
+                break
+        
+        headers, tagged = _untag_etags(scope.get("headers", []))
+        if tagged:
+            scope = {**scope, "headers": headers}
+        
+        if encoding is None or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        
+        await _CompressedResponder(self, encoding, send, tagged)(scope, receive)
+
+
+class _CompressedResponder:
+    """Per-request state of CompressionMiddleware"""
+    
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: str,
+        send: Callable,
+        tagged: Dict[bytes, bytes]
+    ):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.tagged = tagged
+        self.start_message: Optional[Dict[str, Any]] = None
+        self.encoder: Optional[_StreamEncoder] = None
+        self.passthrough = False
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable) -> None:
+        await self.middleware.app(scope, receive, self.send_wrapper)
+    
+    async def send_wrapper(self, message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            if message.get("status") == 304 and self.tagged:
+                message = self._retag_not_modified(message)
+            self.start_message = message
+            self.passthrough = not self._compressible(message)
+            if self.passthrough:
+                await self.send(message)
+            return
+        
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        
+        if self.encoder is None:
+            if not more_body:
+                # Whole body in one message: compress it unless it is too small
+                if len(body) < self.middleware.minimum_size:
+                    await self.send(self.start_message)
+                    await self.send(message)
+                    return
+                
+                compressed = compress(body, self.encoding, static=False)
+                await self.send(self._encoded_start(len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            
+            self.encoder = _StreamEncoder(self.encoding)
+            await self.send(self._encoded_start(None))
+        
+        chunk = self.encoder.compress(body) if body else b""
+        if not more_body:
+            chunk += self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+    
+    def _compressible(self, message: Dict[str, Any]) -> bool:
+        # Partial content is a byte range of the identity encoding; compressing it breaks resumed downloads
+        if message.get("status", 200) < 200 or message.get("status") in (204, 206, 304):
+            return False
+        
+        for name, value in message.get("headers", []):
+            name = name.lower()
+            if name in (b"content-encoding", b"content-range"):
+                return False
+            if name == b"content-type":
+                media_type = value.decode("latin-1").split(";")[0].strip().lower()
+                if media_type in self.middleware.excluded_media_types:
+                    return False
+        return True
+    
+    def _retag_not_modified(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Give a 304 matched through an untagged ETag the tag the client validated with"""
+        headers = []
+        for name, value in message.get("headers", []):
+            if name.lower() == b"etag":
+                weak = value.startswith(b"W/")
+                value = self.tagged.get(value.removeprefix(b"W/"), value.removeprefix(b"W/"))
+                value = b"W/" + value if weak else value
+            headers.append((name, value))
+        return {**message, "headers": headers}
+    
+    def _encoded_start(self, content_length: Optional[int]) -> Dict[str, Any]:
+        headers: List[Tuple[bytes, bytes]] = []
+        vary = None
+        
+        for name, value in self.start_message.get("headers", []):
+            lowered = name.lower()
+            if lowered == b"content-length":
+                continue
+            if lowered == b"vary":
+                vary = value
+                continue
+            if lowered == b"etag" and value.endswith(b'"'):
+                # Strong validators must differ per encoding
+                value = value[:-1] + b"-" + self.encoding.encode("latin-1") + b'"'
+            headers.append((name, value))
+        
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower():
+            vary += b", Accept-Encoding"
+        
+        headers.append((b"vary", vary))
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        
+        return {**self.start_message, "headers": headers}
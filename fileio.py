@@ -0,0 +1,152 @@
+"""
+Prompt Studio - File I/O Helpers
+Atomic file replacement and batched fsync shared by the storage components
+"""
+
+import json
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def fsync_path(path: Path) -> None:
+    """Flush a file or directory to stable storage"""
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(
+    path: Path,
+    content: bytes,
+    fsync: bool = False,
+    fsync_dir: Optional[bool] = None
+) -> None:
+    """
+    Replace a file's content atomically
+    
+    The content is written to a temporary file in the same directory and
+    renamed over the target, so readers see either the old or the new file.
+    
+    Args:
+        path: File to replace
+        content: New file content
+        fsync: Flush the data before the rename, so a crash can never leave a
+            partial file in place of the old one
+        fsync_dir: Flush the directory after the rename, making the rename
+            itself durable (defaults to fsync)
+    """
+    if fsync_dir is None:
+        fsync_dir = fsync
+    
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    if fsync_dir:
+        fsync_path(path.parent)
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Serialize data as compact JSON and replace the file atomically"""
+    atomic_write_bytes(path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+
+class FsyncBatcher:
+    """
+    Flushes the renames of atomically replaced files to stable storage in batches
+    
+    Writers fsync a file's data before renaming it into place, so a crash
+    leaves either the old or the new content; what is batched is the
+    directory fsync that makes the rename itself durable. Directories
+    registered with add() are fsynced by a background thread every interval
+    seconds, so a burst of writes costs one flush per directory rather than
+    one per write. Until then a crash may roll a file back to its previous
+    content. An interval of 0 or less flushes each directory as it is added.
+    """
+    
+    def __init__(self, interval: float = 1.0):
+        """
+        Initialize the batcher
+        
+        Args:
+            interval: Seconds between batched flushes
+        """
+        self.interval = interval
+        
+        self._pending: Set[Path] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether flushes are batched rather than done inline"""
+        return self.interval > 0
+    
+    def add(self, directory: Path) -> None:
+        """Schedule a directory holding renamed files for flushing"""
+        directory = Path(directory)
+        
+        if not self.enabled or self._closed:
+            fsync_path(directory)
+            return
+        
+        with self._lock:
+            self._pending.add(directory)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fsync-batcher", daemon=True)
+                self._thread.start()
+    
+    def flush(self) -> int:
+        """
+        Flush every pending directory now
+        
+        Returns:
+            Number of directories flushed
+        """
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        
+        for path in pending:
+            try:
+                fsync_path(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"❌ fsync failed for {path}: {str(e)}")
+        
+        return len(pending)
+    
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self.flush()
+    
+    def close(self) -> None:
+        """Stop the background thread after a final flush"""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
@@ -0,0 +1,216 @@
+"""
+Prompt Studio - Version History
+Delta-compressed revision history for prompt categories
+"""
+
+import json
+import fcntl
+import hashlib
+import difflib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def compute_delta(old_lines: List[str], new_lines: List[str]) -> List[list]:
+    """
+    Encode new_lines as a line delta against old_lines
+    
+    The delta is a list of ["=", start, end] (copy old lines start:end) and
+    ["+", [lines]] (insert lines) operations.
+    """
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    delta = []
+    
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append(["=", i1, i2])
+        elif tag in ("replace", "insert"):
+            delta.append(["+", new_lines[j1:j2]])
+    
+    return delta
+
+
+def apply_delta(old_lines: List[str], delta: List[list]) -> List[str]:
+    """Rebuild the new lines from the old lines and a delta"""
+    new_lines = []
+    
+    for op in delta:
+        if op[0] == "=":
+            new_lines.extend(old_lines[op[1]:op[2]])
+        else:
+            new_lines.extend(op[1])
+    
+    return new_lines
+
+
+class VersionHistory:
+    """
+    Per-category revision history with periodic keyframes
+    
+    Revisions are numbered from 1. Every keyframe_interval-th revision starts
+    a new segment file (history_dir/<category>/<first revision>.jsonl) holding
+    a full keyframe followed by line deltas, so any revision is rebuilt from
+    the keyframe of its segment and at most keyframe_interval - 1 deltas.
+    Revision metadata is kept in history_dir/<category>/revisions.jsonl.
+    """
+    
+    def __init__(self, history_dir: Path, keyframe_interval: int = 20):
+        """
+        Initialize the version history
+        
+        Args:
+            history_dir: Directory holding per-category history
+            keyframe_interval: Number of revisions per keyframe segment
+        """
+        self.history_dir = Path(history_dir)
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        self.keyframe_interval = max(1, keyframe_interval)
+        
+        # category -> (revisions file size, head revision metadata, head lines)
+        self._heads: Dict[str, Tuple[int, Dict[str, Any], List[str]]] = {}
+        self._lock = threading.Lock()
+    
+    def _category_dir(self, category: str) -> Path:
+        return self.history_dir / category
+    
+    def _segment_start(self, revision: int) -> int:
+        """First revision (the keyframe) of the segment holding a revision"""
+        return ((revision - 1) // self.keyframe_interval) * self.keyframe_interval + 1
+    
+    def _segment_path(self, category: str, revision: int) -> Path:
+        return self._category_dir(category) / f"{self._segment_start(revision):08d}.jsonl"
+    
+    def list(self, category: str) -> List[Dict[str, Any]]:
+        """
+        List revision metadata of a category, oldest first
+        
+        Args:
+            category: Category name
+        """
+        revisions_path = self._category_dir(category) / "revisions.jsonl"
+        
+        try:
+            with open(revisions_path, 'r', encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+    
+    def has_history(self, category: str) -> bool:
+        """Check whether any revision of a category was recorded"""
+        revisions_path = self._category_dir(category) / "revisions.jsonl"
+        return revisions_path.exists() and revisions_path.stat().st_size > 0
+    
+    def _read_lines(self, category: str, revision: int) -> Optional[List[str]]:
+        """Rebuild a revision's lines from its segment keyframe"""
+        try:
+            with open(self._segment_path(category, revision), 'r', encoding='utf-8') as f:
+                lines = None
+                for raw in f:
+                    record = json.loads(raw)
+                    if "keyframe" in record:
+                        lines = record["keyframe"]
+                    else:
+                        lines = apply_delta(lines, record["delta"])
+                    if record["revision"] == revision:
+                        return lines
+        except FileNotFoundError:
+            pass
+        
+        return None
+    
+    def get(self, category: str, revision: int) -> Optional[Dict[str, Any]]:
+        """
+        Reconstruct a historical revision
+        
+        Args:
+            category: Category name
+            revision: Revision number
+            
+        Returns:
+            Revision metadata with the file content under "content", or None
+        """
+        if revision < 1:
+            return None
+        
+        metadata = next((r for r in self.list(category) if r["revision"] == revision), None)
+        if metadata is None:
+            return None
+        
+        lines = self._read_lines(category, revision)
+        if lines is None:
+            return None
+        
+        return {**metadata, "content": "".join(lines)}
+    
+    def record(self, category: str, content: bytes) -> int:
+        """
+        Append a revision unless the content matches the current head
+        
+        Args:
+            category: Category name
+            content: Raw category file content
+            
+        Returns:
+            Head revision number after recording
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        category_dir = self._category_dir(category)
+        category_dir.mkdir(exist_ok=True)
+        
+        with self._lock, open(category_dir / "revisions.jsonl", 'a+', encoding='utf-8') as revisions_file:
+            # Serialize writers across processes sharing the history directory
+            fcntl.flock(revisions_file, fcntl.LOCK_EX)
+            
+            head_meta, head_lines = self._load_head(category, revisions_file)
+            if head_meta is not None and head_meta["hash"] == digest:
+                return head_meta["revision"]
+            
+            revision = head_meta["revision"] + 1 if head_meta else 1
+            lines = content.decode('utf-8').splitlines(keepends=True)
+            
+            if revision == self._segment_start(revision):
+                record = {"revision": revision, "keyframe": lines}
+            else:
+                record = {"revision": revision, "delta": compute_delta(head_lines, lines)}
+            
+            with open(self._segment_path(category, revision), 'a', encoding='utf-8') as segment:
+                segment.write(json.dumps(record, ensure_ascii=False) + "\n")
+            
+            metadata = {
+                "revision": revision,
+                "created_at": datetime.now().isoformat(),
+                "hash": digest,
+                "size": len(content),
+                "keyframe": "keyframe" in record
+            }
+            revisions_file.write(json.dumps(metadata) + "\n")
+            revisions_file.flush()
+            
+            self._heads[category] = (revisions_file.tell(), metadata, lines)
+        
+        logger.info(f"🕘 Recorded revision {revision} of {category}")
+        return revision
+    
+    def _load_head(self, category: str, revisions_file) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """Get the head revision, rebuilding it if another process appended since it was cached"""
+        revisions_file.seek(0, 2)
+        size = revisions_file.tell()
+        
+        cached = self._heads.get(category)
+        if cached is not None and cached[0] == size:
+            return cached[1], cached[2]
+        
+        revisions_file.seek(0)
+        revisions = [json.loads(line) for line in revisions_file if line.strip()]
+        if not revisions:
+            return None, []
+        
+        head_meta = revisions[-1]
+        head_lines = self._read_lines(category, head_meta["revision"]) or []
+        self._heads[category] = (size, head_meta, head_lines)
+        return head_meta, head_lines
@@ -0,0 +1,388 @@
+"""
+Prompt Studio - Metrics
+Prometheus text-format metrics backed by per-thread counter shards
+"""
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Request latencies, in seconds
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Storage operations, mostly answered from memory, in seconds
+OPERATION_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _ShardedMetric(ABC):
+    """
+    Base for metrics whose values live in per-thread shards
+    
+    Each thread updates only its own shard, so the hot path takes no lock;
+    a scrape sums the shards of every thread that ever recorded a value.
+    """
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        
+        self._local = threading.local()
+        self._shards: List[Dict[LabelValues, Any]] = []
+        self._shards_lock = threading.Lock()
+    
+    def _shard(self) -> Dict[LabelValues, Any]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+    
+    def _snapshot(self) -> List[List[Tuple[LabelValues, Any]]]:
+        """Copy every shard's items (list() of a dict is atomic under the GIL)"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [list(shard.items()) for shard in shards]
+    
+    @abstractmethod
+    def collect(self) -> List[str]:
+        """Render the metric's samples as Prometheus text-format lines"""
+
+
+class Counter(_ShardedMetric):
+    """Monotonic counter"""
+    
+    kind = "counter"
+    
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+    
+    def values(self) -> Dict[LabelValues, float]:
+        """Totals across all threads, keyed by label values"""
+        totals: Dict[LabelValues, float] = {}
+        for items in self._snapshot():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+    
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, such as requests in flight"""
+    
+    kind = "gauge"
+    
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_ShardedMetric):
+    """Distribution of observed values over fixed buckets"""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = REQUEST_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # Per-bucket counts (the last one is +Inf), then sum and count
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+    
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labels)
+    
+    def series(self) -> Dict[LabelValues, List]:
+        """
+        Merge the shards of every thread
+        
+        Returns:
+            Per label values: the count of each bucket (non-cumulative, the
+            last one being +Inf), followed by the sum and count of observations
+        """
+        merged: Dict[LabelValues, List] = {}
+        for items in self._snapshot():
+            for labels, series in items:
+                series = list(series)
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = series
+                else:
+                    merged[labels] = [a + b for a, b in zip(total, series)]
+        return merged
+    
+    def quantile(self, series: List, q: float) -> float:
+        """
+        Estimate a quantile from merged bucket counts
+        
+        Interpolates linearly within the bucket holding the quantile, like
+        Prometheus' histogram_quantile; values past the last bucket are
+        reported as its upper bound.
+        """
+        count = series[-1]
+        if not count:
+            return 0.0
+        
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(series[:len(self.buckets)]):
+            upper = self.buckets[index]
+            if bucket_count and cumulative + bucket_count >= rank:
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = upper
+        return self.buckets[-1]
+    
+    def collect(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for labels, series in sorted(self.series().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                bucket = _format_labels(self.labelnames, labels, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(float(series[-2]))}")
+            lines.append(f"{self.name}_count{label_text} {series[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: LabelValues):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class CallbackMetric:
+    """Metric read from a function at scrape time, such as cache statistics"""
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: Iterable[str],
+        func: Callable[[], Dict[LabelValues, float]]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.func = func
+    
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.func().items())
+        ]
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: Any) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = REQUEST_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: Iterable[str],
+        func: Callable[[], Dict[LabelValues, float]]
+    ) -> CallbackMetric:
+        """Register a metric computed by func, replacing any previous one of the same name"""
+        metric = CallbackMetric(name, documentation, kind, labelnames, func)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "prompt_studio_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "prompt_studio_http_requests_in_flight",
+    "HTTP requests currently being served",
+    ("method",)
+)
+STORAGE_OPERATION_SECONDS = REGISTRY.histogram(
+    "prompt_studio_storage_operation_duration_seconds",
+    "PromptStorage operation latency",
+    ("operation",),
+    OPERATION_BUCKETS
+)
+STORAGE_BYTES = REGISTRY.counter(
+    "prompt_studio_storage_bytes_total",
+    "Bytes read from and written to the persistence backend",
+    ("backend", "direction")
+)
+
+
+def timed(operation: str, histogram: Histogram = STORAGE_OPERATION_SECONDS) -> Callable:
+    """Decorator observing a function's duration under an operation label"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, operation)
+        return wrapper
+    return decorator
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """
+    Route template of a handled request, keeping label cardinality bounded
+    
+    Path parameters stay as placeholders ("/api/prompts/{category}"); requests
+    served by a mounted app are labelled with its prefix.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "other")
+    
+    root_path = scope.get("root_path", "")
+    mount = root_path[len(scope.get("app_root_path", "")):]
+    return f"{mount}/{{path}}" if mount else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency and requests in flight
+    
+    Latency is measured until the response body is fully sent and labelled
+    with the route template matched by the router.
+    """
+    
+    def __init__(self, app: Callable, excluded_paths: Iterable[str] = ("/metrics",)):
+        """
+        Initialize the middleware
+        
+        Args:
+            app: ASGI application to wrap
+            excluded_paths: Paths that are not measured
+        """
+        self.app = app
+        self.excluded_paths = set(excluded_paths)
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status = "500"
+        
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+        
+        HTTP_REQUESTS_IN_FLIGHT.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method, route_label(scope), status)
+            HTTP_REQUESTS_IN_FLIGHT.dec(method)
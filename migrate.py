@@ -0,0 +1,43 @@
+"""
+Prompt Studio - Storage Migration
+Imports prompts/*.json into the SQLite backend
+
+Usage:
+    python migrate.py [--prompts-dir prompts] [--db prompts/prompts.db]
+"""
+
+import os
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+from backends import migrate_json_to_sqlite
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import JSON prompt categories into SQLite")
+    parser.add_argument("--prompts-dir", default="prompts", help="Directory containing prompt JSON files")
+    parser.add_argument(
+        "--db",
+        default=os.getenv("PROMPT_STUDIO_SQLITE_PATH", "prompts/prompts.db"),
+        help="SQLite database to create or update"
+    )
+    args = parser.parse_args()
+    
+    stats = migrate_json_to_sqlite(Path(args.prompts_dir), Path(args.db))
+    logger.info(
+        f"✅ Imported {stats['categories']} categories ({stats['templates']} templates) "
+        f"into {args.db}, {stats['failed']} failed"
+    )
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
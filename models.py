@@ -39,12 +39,43 @@ class PromptTestResponse(BaseModel):
     missing_variables: List[str] = Field(default_factory=list)
 
 
+class PromptBatchRenderRequest(PromptTestRequest):
+    """Request model for rendering many variable sets against one template"""
+    items: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class PromptBatchRenderResponse(BaseModel):
+    """Response model for batch prompt rendering"""
+    success: bool
+    error: Optional[str] = None
+    results: List[PromptTestResponse] = Field(default_factory=list)
+    total: int = 0
+
+
 class PromptListResponse(BaseModel):
     """Response model for listing all prompts"""
     success: bool
     categories: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
     total_categories: int = 0
     total_templates: int = 0
+    revision: int = 0  # Catalog revision the listing reflects (pass as since_revision to get later changes)
+    next_cursor: Optional[str] = None  # Cursor for the next page, None on the last page
+    deleted: List[str] = Field(default_factory=list)  # Categories removed after since_revision
+    resync_required: bool = False  # since_revision is too old to report every removal
+
+
+class PromptBulkRequest(BaseModel):
+    """Request model for fetching several templates at once"""
+    refs: List[str]  # "category.template"
+    fields: Optional[List[str]] = None  # Template fields to return (all when omitted)
+
+
+class PromptBulkResponse(BaseModel):
+    """Response model for bulk template fetches"""
+    success: bool
+    templates: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    errors: Dict[str, str] = Field(default_factory=dict)
+    total: int = 0
 
 
 class PromptUpdateRequest(BaseModel):
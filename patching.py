@@ -0,0 +1,243 @@
+"""
+Prompt Studio - Partial Updates
+Merge patches for single templates and JSON Patch (RFC 6902) for categories
+"""
+
+import copy
+from typing import Any, Dict, List, Set
+
+from pydantic import ValidationError
+
+from models import PromptCategory, PromptTemplate
+from backends import TEMPLATE_FIELDS
+
+TEMPLATE_FIELD_NAMES = set(TEMPLATE_FIELDS)
+CATEGORY_FIELD_NAMES = {"version", "category", "description"}
+
+
+class PatchError(ValueError):
+    """A patch that cannot be applied or produces an invalid category"""
+
+
+def merge_template(template: PromptTemplate, changes: Dict[str, Any]) -> PromptTemplate:
+    """
+    Apply a merge patch (RFC 7386) to a template
+    
+    Only the patched template is validated. A null value resets the field
+    to its default.
+    
+    Args:
+        template: Current template
+        changes: Field values to change
+    
+    Returns:
+        The updated template
+    """
+    if not isinstance(changes, dict):
+        raise PatchError("Merge patch must be a JSON object")
+    
+    unknown = set(changes) - TEMPLATE_FIELD_NAMES
+    if unknown:
+        raise PatchError(f"Unknown template fields: {', '.join(sorted(unknown))}")
+    
+    data = template.dict()
+    for field, value in changes.items():
+        if value is None:
+            data.pop(field)
+        else:
+            data[field] = value
+    
+    try:
+        return PromptTemplate(**data)
+    except ValidationError as e:
+        raise PatchError(f"Invalid template: {e}")
+
+
+def _decode_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _list_index(container: List, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise PatchError(f"Invalid list index: {token}")
+    
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"List index out of range: {token}")
+    return index
+
+
+class _CategoryDocument:
+    """
+    A category as a JSON document that materializes templates on first touch
+    
+    Templates stay PromptTemplate objects until an operation reaches into
+    them, so applying a patch (and validating the result) costs in
+    proportion to the templates it changes, not the size of the category.
+    """
+    
+    def __init__(self, category: PromptCategory):
+        self.root = {
+            "version": category.version,
+            "category": category.category,
+            "description": category.description,
+            "templates": dict(category.templates)
+        }
+        self.changed: Set[str] = set()
+    
+    def _parent(self, tokens: List[str]) -> Any:
+        """Resolve the container holding the last token"""
+        node = self.root
+        for depth, token in enumerate(tokens[:-1]):
+            if isinstance(node, dict):
+                if token not in node:
+                    raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+                
+                child = node[token]
+                # Descending into a template: switch it to a mutable dict
+                if depth == 1 and tokens[0] == "templates" and isinstance(child, PromptTemplate):
+                    child = node[token] = child.dict()
+                    self.changed.add(token)
+                node = child
+            elif isinstance(node, list):
+                node = node[_list_index(node, token)]
+            else:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        
+        return node
+    
+    def _touch(self, tokens: List[str]) -> None:
+        if len(tokens) >= 2 and tokens[0] == "templates":
+            self.changed.add(tokens[1])
+    
+    def get(self, pointer: str) -> Any:
+        tokens = _decode_pointer(pointer)
+        if not tokens:
+            raise PatchError("Operations on the whole document are not supported")
+        
+        parent = self._parent(tokens)
+        token = tokens[-1]
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise PatchError(f"Path not found: {pointer}")
+            value = parent[token]
+        elif isinstance(parent, list):
+            value = parent[_list_index(parent, token)]
+        else:
+            raise PatchError(f"Path not found: {pointer}")
+        
+        return value.dict() if isinstance(value, PromptTemplate) else value
+    
+    def add(self, pointer: str, value: Any) -> None:
+        tokens = _decode_pointer(pointer)
+        if not tokens:
+            raise PatchError("Operations on the whole document are not supported")
+        
+        parent = self._parent(tokens)
+        if isinstance(parent, dict):
+            parent[tokens[-1]] = copy.deepcopy(value)
+        elif isinstance(parent, list):
+            parent.insert(_list_index(parent, tokens[-1], allow_end=True), copy.deepcopy(value))
+        else:
+            raise PatchError(f"Path not found: {pointer}")
+        self._touch(tokens)
+    
+    def remove(self, pointer: str) -> Any:
+        value = self.get(pointer)
+        tokens = _decode_pointer(pointer)
+        parent = self._parent(tokens)
+        if isinstance(parent, dict):
+            del parent[tokens[-1]]
+        else:
+            del parent[_list_index(parent, tokens[-1])]
+        self._touch(tokens)
+        return value
+    
+    def replace(self, pointer: str, value: Any) -> None:
+        self.get(pointer)
+        self.add(pointer, value)
+    
+    def build(self) -> PromptCategory:
+        """Validate the touched templates and the category fields"""
+        templates = self.root.get("templates")
+        if not isinstance(templates, dict):
+            raise PatchError("'templates' must be an object")
+        
+        for name in self.changed:
+            if name in templates and not isinstance(templates[name], PromptTemplate):
+                try:
+                    templates[name] = PromptTemplate(**templates[name])
+                except (TypeError, ValidationError) as e:
+                    raise PatchError(f"Invalid template '{name}': {e}")
+        
+        unknown = set(self.root) - CATEGORY_FIELD_NAMES - {"templates"}
+        if unknown:
+            raise PatchError(f"Unknown category fields: {', '.join(sorted(unknown))}")
+        
+        try:
+            # Template instances are reused as-is; only the category fields are validated
+            return PromptCategory(**self.root)
+        except ValidationError as e:
+            raise PatchError(f"Invalid category: {e}")
+
+
+def apply_json_patch(category: PromptCategory, operations: List[Dict[str, Any]]) -> PromptCategory:
+    """
+    Apply a JSON Patch to a category
+    
+    Supports add, remove, replace, move, copy and test. The patch is applied
+    atomically: any failing operation leaves the category unchanged.
+    
+    Args:
+        category: Current category
+        operations: JSON Patch operations
+    
+    Returns:
+        The patched category
+    """
+    if not isinstance(operations, list):
+        raise PatchError("JSON Patch must be an array of operations")
+    
+    document = _CategoryDocument(category)
+    
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError("Each operation needs 'op' and 'path'")
+        
+        op, path = operation["op"], operation["path"]
+        if not isinstance(op, str) or not isinstance(path, str):
+            raise PatchError("'op' and 'path' must be strings")
+        
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"'{op}' operation needs a 'value'")
+        if op in ("move", "copy"):
+            if "from" not in operation:
+                raise PatchError(f"'{op}' operation needs a 'from'")
+            if not isinstance(operation["from"], str):
+                raise PatchError("'from' must be a string")
+        
+        if op == "add":
+            document.add(path, operation["value"])
+        elif op == "remove":
+            document.remove(path)
+        elif op == "replace":
+            document.replace(path, operation["value"])
+        elif op == "move":
+            if path.startswith(operation["from"] + "/"):
+                raise PatchError("Cannot move a value into itself")
+            document.add(path, document.remove(operation["from"]))
+        elif op == "copy":
+            document.add(path, document.get(operation["from"]))
+        elif op == "test":
+            if document.get(path) != operation["value"]:
+                raise PatchError(f"Test failed at {path}")
+        else:
+            raise PatchError(f"Unsupported operation: {op}")
+    
+    return document.build()
@@ -0,0 +1,269 @@
+"""
+Prompt Studio - Profiling
+Time-boxed sampling profiles of a running worker and opt-in per-request cProfile
+"""
+
+import os
+import sys
+import asyncio
+import time
+import uuid
+import marshal
+import pstats
+import cProfile
+import threading
+import contextvars
+from collections import Counter, deque
+from io import StringIO
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Upper bound on a sampling or cProfile window, in seconds
+MAX_PROFILE_SECONDS = 60.0
+
+# Frames where threads wait for work; stacks ending in them are idle time
+IDLE_FRAMES = {
+    ("thread.py", "_worker"),
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get")
+}
+
+# Only one profile at a time: cProfile hooks and sampling would skew each other
+_profile_lock = threading.Lock()
+
+_request_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.01, include_idle: bool = False) -> Counter:
+    """
+    Sample the stacks of every thread at a fixed interval
+    
+    Runs on the calling thread, which is left out of the samples.
+    
+    Args:
+        seconds: How long to sample for
+        interval: Time between samples, in seconds
+        include_idle: Keep stacks of threads waiting for work
+    
+    Returns:
+        Sample counts per collapsed stack ("thread;outer;...;inner")
+    """
+    stacks: Counter = Counter()
+    own_id = threading.get_ident()
+    deadline = time.monotonic() + min(seconds, MAX_PROFILE_SECONDS)
+    
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            
+            leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+            if not include_idle and leaf in IDLE_FRAMES:
+                continue
+            
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, str(thread_id)))
+            stacks[";".join(reversed(labels))] += 1
+        
+        time.sleep(interval)
+    
+    return stacks
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """Render sample counts in the collapsed format read by flamegraph.pl and speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def dump_stats(stats: pstats.Stats) -> bytes:
+    """Serialize profile statistics in the format written by cProfile's dump_stats"""
+    return marshal.dumps(stats.stats)
+
+
+def format_stats(stats: pstats.Stats, limit: int = 50) -> str:
+    """Render the functions with the highest cumulative time as text"""
+    output = StringIO()
+    stats.stream = output
+    stats.sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+
+async def profile_event_loop(seconds: float) -> pstats.Stats:
+    """
+    cProfile the event loop thread for a while
+    
+    Covers route handlers, middleware and cached reads answered on the loop;
+    storage calls running on I/O threads only show up as awaits.
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        await asyncio.sleep(min(seconds, MAX_PROFILE_SECONDS))
+    finally:
+        profile.disable()
+    return pstats.Stats(profile)
+
+
+def try_acquire() -> bool:
+    """Claim the worker's profiler, returning False if a profile is already running"""
+    return _profile_lock.acquire(blocking=False)
+
+
+def release() -> None:
+    _profile_lock.release()
+
+
+class RequestProfile:
+    """
+    cProfile statistics of a single request
+    
+    The event loop thread is profiled while the request runs (so coroutines
+    of concurrent requests show up too), and each storage call made on the
+    request's behalf is profiled on its I/O thread and merged in.
+    """
+    
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.started = time.time()
+        self.duration_ms: Optional[float] = None
+        self.stats: Optional[pstats.Stats] = None
+        
+        self._calls: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+    
+    def runcall(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a storage call under its own profiler"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows a single active profiler per process
+            return func(*args, **kwargs)
+        
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                self._calls.append(profile)
+    
+    def finish(self, loop_profile: cProfile.Profile, duration: float) -> None:
+        """Merge the event loop and storage call profiles"""
+        self.duration_ms = duration * 1000
+        stats = pstats.Stats(loop_profile)
+        with self._lock:
+            for profile in self._calls:
+                stats.add(profile)
+        self.stats = stats
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started": self.started,
+            "duration_ms": self.duration_ms
+        }
+
+
+def current_request_profile() -> Optional[RequestProfile]:
+    """The profile of the request being handled, if it asked for one"""
+    return _request_profile.get()
+
+
+class RequestProfileStore:
+    """The most recent per-request profiles of this worker"""
+    
+    def __init__(self, keep: int = 20):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=keep)
+        self._lock = threading.Lock()
+    
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+    
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            for profile in self._profiles:
+                if profile.id == profile_id:
+                    return profile
+        return None
+    
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the kept profiles, newest first"""
+        with self._lock:
+            return [profile.summary() for profile in reversed(self._profiles)]
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling requests that send an X-Profile header
+    
+    Only authorized requests are profiled, and only one at a time per
+    worker; others run normally. A profiled response carries an
+    X-Profile-Id header naming the profile kept in the store.
+    """
+    
+    def __init__(
+        self,
+        app: Callable,
+        store: RequestProfileStore,
+        authorize: Callable[[Dict[str, Any]], bool]
+    ):
+        """
+        Initialize the middleware
+        
+        Args:
+            app: ASGI application to wrap
+            store: Where finished profiles are kept
+            authorize: Check whether a request (its ASGI scope) may be profiled
+        """
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not any(name == b"x-profile" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        
+        if not self.authorize(scope) or not try_acquire():
+            await self.app(scope, receive, send)
+            return
+        
+        request_profile = RequestProfile(scope["method"], scope["path"])
+        
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", request_profile.id.encode("ascii")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        token = _request_profile.set(request_profile)
+        loop_profile = cProfile.Profile()
+        start = time.perf_counter()
+        loop_profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            loop_profile.disable()
+            _request_profile.reset(token)
+            release()
+            request_profile.finish(loop_profile, time.perf_counter() - start)
+            self.store.add(request_profile)
@@ -0,0 +1,84 @@
+"""
+Prompt Studio - Template Rendering
+Precompiled render plans for string.Template prompts
+"""
+
+from string import Template
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+class CompiledTemplate:
+    """
+    A prompt template compiled once into a render plan
+    
+    The content is split into literal chunks and variable slots using the same
+    pattern as string.Template, so rendering matches Template.safe_substitute:
+    provided variables are substituted and missing ones are left as-is.
+    """
+    
+    def __init__(self, content: str, template_key: Optional[Tuple[str, str]] = None):
+        """
+        Compile template content into a render plan
+        
+        Args:
+            content: Template content with $name / ${name} placeholders
+            template_key: (category, template name) the plan was compiled from,
+                used to attribute render statistics
+        """
+        chunks: List[str] = []
+        slots: List[tuple] = []
+        literal: List[str] = []
+        position = 0
+        
+        for match in Template.pattern.finditer(content):
+            literal.append(content[position:match.start()])
+            position = match.end()
+            
+            if match.group('escaped') is not None:
+                literal.append(Template.delimiter)
+                continue
+            
+            name = match.group('named') or match.group('braced')
+            if name is None:
+                # Invalid placeholder, kept verbatim like safe_substitute does
+                literal.append(match.group())
+                continue
+            
+            chunks.append(''.join(literal))
+            literal = []
+            slots.append((len(chunks), name))
+            # Placeholder text stays in the plan so missing variables render as-is
+            chunks.append(match.group())
+        
+        literal.append(content[position:])
+        chunks.append(''.join(literal))
+        
+        self.chunks = chunks
+        self.slots = slots
+        self.identifiers = list(dict.fromkeys(name for _, name in slots))
+        self.identifier_set = frozenset(self.identifiers)
+        self.template_key = template_key
+    
+    def render(self, variables: Mapping[str, Any]) -> str:
+        """Render the plan with the provided variables"""
+        if not self.slots:
+            return self.chunks[0]
+        
+        parts = self.chunks.copy()
+        for index, name in self.slots:
+            if name in variables:
+                parts[index] = '%s' % (variables[name],)
+        
+        return ''.join(parts)
+    
+    def missing_variables(self, variables: Mapping[str, Any]) -> List[str]:
+        """List template variables that are not provided"""
+        return [name for name in self.identifiers if name not in variables]
+
+
+def compile_templates(templates: Dict[str, Any], category: Optional[str] = None) -> Dict[str, CompiledTemplate]:
+    """Compile every PromptTemplate of a category into render plans"""
+    return {
+        name: CompiledTemplate(template.content, (category, name) if category is not None else None)
+        for name, template in templates.items()
+    }
@@ -0,0 +1,119 @@
+"""
+Prompt Studio - Render Statistics
+Per-template render counters for finding hot and oversized templates
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from metrics import Counter, Histogram
+
+# Render time, from 1µs doubling up to ~1s
+RENDER_TIME_BUCKETS = tuple(1e-6 * 2 ** power for power in range(21))
+
+# Rendered prompt length in characters, from 16 doubling up to 4M
+OUTPUT_SIZE_BUCKETS = tuple(float(2 ** power) for power in range(4, 23))
+
+SORT_KEYS = ("renders", "render_time", "p99_render_time", "output_size", "missing")
+
+
+class RenderStats:
+    """
+    Render count, time, output size and missing variables per template
+    
+    Values are kept in per-thread shards like the /metrics counters, so
+    recording a render takes no lock. The statistics stay out of the
+    Prometheus registry, whose label cardinality they would blow up.
+    """
+    
+    def __init__(self):
+        labels = ("category", "template")
+        self.durations = Histogram("render_duration_seconds", "Render time", labels, RENDER_TIME_BUCKETS)
+        self.sizes = Histogram("render_output_chars", "Rendered prompt length", labels, OUTPUT_SIZE_BUCKETS)
+        self.incomplete = Counter("renders_missing_variables", "Renders with missing variables", labels)
+        self.missing = Counter("missing_variables", "Missing variables", labels + ("variable",))
+    
+    def record(
+        self,
+        template_key: Tuple[str, str],
+        seconds: float,
+        output_chars: int,
+        missing_variables: List[str]
+    ) -> None:
+        """
+        Record one render of a template
+        
+        Args:
+            template_key: (category, template name)
+            seconds: Render time
+            output_chars: Length of the rendered prompt
+            missing_variables: Template variables that were not provided
+        """
+        self.durations.observe(seconds, *template_key)
+        self.sizes.observe(output_chars, *template_key)
+        if missing_variables:
+            self.incomplete.inc(*template_key)
+            for name in missing_variables:
+                self.missing.inc(*template_key, name)
+    
+    def top(self, limit: int = 10, sort: str = "renders", category: Optional[str] = None) -> List[Dict]:
+        """
+        List the templates ranking highest on a statistic
+        
+        Args:
+            limit: Number of templates to list
+            sort: One of SORT_KEYS
+            category: Only list templates of this category
+        
+        Returns:
+            Per-template statistics, highest first
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        
+        sizes = self.sizes.series()
+        incomplete = self.incomplete.values()
+        missing: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for (category_name, template_name, variable), count in self.missing.values().items():
+            missing.setdefault((category_name, template_name), {})[variable] = count
+        
+        stats = []
+        for key, durations in self.durations.series().items():
+            if category is not None and key[0] != category:
+                continue
+            
+            renders = durations[-1]
+            if not renders:
+                continue
+            
+            size_series = sizes.get(key)
+            incomplete_renders = incomplete.get(key, 0)
+            stats.append({
+                "category": key[0],
+                "template": key[1],
+                "renders": renders,
+                "render_time_ms": {
+                    "total": durations[-2] * 1000,
+                    "mean": durations[-2] * 1000 / renders,
+                    "p50": self.durations.quantile(durations, 0.5) * 1000,
+                    "p99": self.durations.quantile(durations, 0.99) * 1000
+                },
+                "output_chars": {
+                    "mean": size_series[-2] / renders,
+                    "p50": self.sizes.quantile(size_series, 0.5),
+                    "p99": self.sizes.quantile(size_series, 0.99)
+                } if size_series else None,
+                "renders_missing_variables": incomplete_renders,
+                "missing_ratio": incomplete_renders / renders,
+                "missing_variables": dict(sorted(missing.get(key, {}).items(), key=lambda item: -item[1]))
+            })
+        
+        sort_value = {
+            "renders": lambda item: item["renders"],
+            "render_time": lambda item: item["render_time_ms"]["total"],
+            "p99_render_time": lambda item: item["render_time_ms"]["p99"],
+            "output_size": lambda item: item["output_chars"]["p99"] if item["output_chars"] else 0,
+            "missing": lambda item: item["renders_missing_variables"]
+        }[sort]
+        
+        stats.sort(key=sort_value, reverse=True)
+        return stats[:limit]
@@ -0,0 +1,120 @@
+"""
+Prompt Studio - Response Cache
+Pre-serialized (and pre-compressed) response bodies for prompt reads
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from content_encoding import compress
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize a response body exactly like FastAPI's default JSONResponse"""
+    with span("serialize"):
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":")
+        ).encode("utf-8")
+
+
+class ResponseCache:
+    """
+    Byte-bounded LRU of final response bodies
+    
+    Keys start with the content hash of the category a body was built
+    from, so a saved category can never be served from a stale body;
+    saves also call invalidate() to drop the old revision's bodies right away.
+    Compressed variants are built once from the cached identity body.
+    """
+    
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize the response cache
+        
+        Args:
+            max_bytes: Total size of cached bodies (0 disables caching)
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._bodies: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple, encoding: Optional[str] = None) -> Optional[bytes]:
+        """Get a cached body without building it"""
+        with span("response_cache.lookup"), self._lock:
+            body = self._bodies.get((key, encoding))
+            if body is not None:
+                self._bodies.move_to_end((key, encoding))
+                self.hits += 1
+            return body
+    
+    def get_or_build(self, key: Tuple, encoding: Optional[str], build: Callable[[], bytes]) -> bytes:
+        """
+        Get a cached body, serializing and compressing it on a miss
+        
+        Args:
+            key: (content hash, ...) identifying the body
+            encoding: Content-Encoding of the variant, or None for identity
+            build: Returns the uncompressed body
+        """
+        body = self.get(key, encoding)
+        if body is not None:
+            return body
+        
+        with self._lock:
+            self.misses += 1
+        
+        if encoding is None:
+            body = build()
+        else:
+            identity = self.get_or_build(key, None, build)
+            with span("compress", encoding=encoding):
+                body = compress(identity, encoding)
+        
+        self._store((key, encoding), body)
+        return body
+    
+    def _store(self, cache_key: Tuple, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        
+        with self._lock:
+            previous = self._bodies.pop(cache_key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            
+            self._bodies[cache_key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._bodies.popitem(last=False)
+                self.size -= len(evicted)
+    
+    def invalidate(self, digest: str) -> None:
+        """Drop every body built from a category revision"""
+        with self._lock:
+            for cache_key in [cache_key for cache_key in self._bodies if cache_key[0][0] == digest]:
+                self.size -= len(self._bodies.pop(cache_key))
+    
+    def stats(self) -> Dict[str, float]:
+        """Get response cache size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._bodies),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
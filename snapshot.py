@@ -0,0 +1,402 @@
+"""
+Prompt Studio - Shared Prompt Snapshot
+Immutable memory-mapped catalog snapshot shared by worker processes
+"""
+
+import os
+import mmap
+import json
+import fcntl
+import struct
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backends import ContentKey
+
+from coherence import GenerationTable
+from models import PromptCategory
+from render import CompiledTemplate
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"PSSNAP01"
+HEADER = struct.Struct("<8sQQ")        # magic, generation, entry count
+TABLE_ENTRY = struct.Struct("<QQQQ")   # key offset, key length, record offset, record length
+
+
+def _key(category: str, template_name: str = "") -> bytes:
+    return category.encode('utf-8') + b"\0" + template_name.encode('utf-8')
+
+
+def encode_category(
+    name: str,
+    category: PromptCategory,
+    digest: str,
+    content_key: ContentKey
+) -> List[Tuple[bytes, bytes]]:
+    """
+    Encode a category as snapshot entries
+    
+    Keys are "category\\0template" for templates and "category\\0" for the
+    category metadata (including its content hash and backend content key);
+    records are UTF-8 JSON.
+    
+    Returns:
+        (key, record) pairs
+    """
+    metadata = {
+        "version": category.version,
+        "category": category.category,
+        "description": category.description,
+        "hash": digest,
+        "key": list(content_key)
+    }
+    entries = [(_key(name), json.dumps(metadata, ensure_ascii=False).encode('utf-8'))]
+    for template_name, template in category.templates.items():
+        entries.append((
+            _key(name, template_name),
+            json.dumps(template.dict(), ensure_ascii=False).encode('utf-8')
+        ))
+    return entries
+
+
+def write_snapshot(path: Path, generation: int, entries: List[Tuple[bytes, bytes]]) -> int:
+    """
+    Write a snapshot file and swap it into place atomically
+    
+    Args:
+        path: Snapshot file
+        generation: Global generation the content corresponds to
+        entries: (key, record) pairs as produced by encode_category
+    
+    Layout: header, a table of fixed-size entries sorted by key, then the
+    keys and records.
+    
+    Returns:
+        Size of the snapshot in bytes
+    """
+    entries = sorted(entries, key=lambda item: item[0])
+    
+    offset = HEADER.size + TABLE_ENTRY.size * len(entries)
+    table = []
+    data = []
+    
+    for key, encoded in entries:
+        table.append(TABLE_ENTRY.pack(offset, len(key), offset + len(key), len(encoded)))
+        data.append(key)
+        data.append(encoded)
+        offset += len(key) + len(encoded)
+    
+    content = b"".join([HEADER.pack(SNAPSHOT_MAGIC, generation, len(entries))] + table + data)
+    
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    
+    return len(content)
+
+
+class PromptSnapshot:
+    """Read-only view of a mapped snapshot; lookups binary-search the offsets table"""
+    
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, self.generation, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC:
+            self._map.close()
+            raise ValueError(f"Not a prompt snapshot: {path}")
+    
+    def _find(self, key: bytes) -> Optional[Tuple[int, int]]:
+        low, high = 0, self.count
+        
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, record_offset, record_length = TABLE_ENTRY.unpack_from(
+                self._map, HEADER.size + middle * TABLE_ENTRY.size
+            )
+            candidate = self._map[key_offset:key_offset + key_length]
+            if candidate == key:
+                return record_offset, record_length
+            if candidate < key:
+                low = middle + 1
+            else:
+                high = middle
+        
+        return None
+    
+    def _record(self, key: bytes) -> Optional[Dict[str, Any]]:
+        location = self._find(key)
+        if location is None:
+            return None
+        offset, length = location
+        return json.loads(self._map[offset:offset + length])
+    
+    def has_category(self, category: str) -> bool:
+        return self._find(_key(category)) is not None
+    
+    def category_digest(self, category: str) -> Optional[str]:
+        """Content hash of a category, or None if it is not in the snapshot"""
+        record = self._record(_key(category))
+        return record.get("hash") if record else None
+    
+    def content_key(self, category: str) -> Optional[ContentKey]:
+        """Backend content key the category was read at, or None if it is not in the snapshot"""
+        record = self._record(_key(category))
+        return tuple(record["key"]) if record and "key" in record else None
+    
+    def get_template(self, category: str, template_name: str) -> Optional[Dict[str, Any]]:
+        """Get a template's fields, or None if it is not in the snapshot"""
+        return self._record(_key(category, template_name))
+    
+    def categories(self) -> Dict[str, Tuple[Optional[ContentKey], List[Tuple[bytes, bytes]]]]:
+        """
+        Read every category in one pass over the table, for copying into a new snapshot
+        
+        Returns:
+            Per category name: its backend content key and raw (key, record) pairs
+        """
+        categories: Dict[str, Tuple[Optional[ContentKey], List[Tuple[bytes, bytes]]]] = {}
+        
+        # One copy of the file; slicing bytes is much cheaper than slicing the mapping
+        data = self._map[:]
+        table = TABLE_ENTRY.iter_unpack(data[HEADER.size:HEADER.size + self.count * TABLE_ENTRY.size])
+        
+        current: Optional[List[Tuple[bytes, bytes]]] = None
+        for key_offset, key_length, record_offset, record_length in table:
+            key = data[key_offset:key_offset + key_length]
+            record = data[record_offset:record_offset + record_length]
+            
+            # "\0" sorts first, so each category's metadata entry precedes its templates
+            if key.endswith(b"\0"):
+                metadata = json.loads(record)
+                content_key = tuple(metadata["key"]) if "key" in metadata else None
+                current = [(key, record)]
+                categories[key[:-1].decode('utf-8')] = (content_key, current)
+            elif current is not None:
+                current.append((key, record))
+        
+        return categories
+    
+    def close(self) -> None:
+        self._map.close()
+
+
+class SnapshotStore:
+    """
+    Builds, swaps and maps the shared prompt snapshot
+    
+    A snapshot is current while its generation equals the global save
+    generation in the shared GenerationTable. Any worker that saves rebuilds
+    it; the leader (the worker holding snapshot.leader's flock) also builds it
+    at startup and after external file changes. Edits made outside a save
+    (a deploy, a sync, a database import) do not bump the generation, so each
+    lookup also checks the category's content key against the backend unless
+    a watcher is reporting such edits. While a snapshot or one of its
+    categories is stale, lookups return None and callers fall back to regular
+    storage reads.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        generations: GenerationTable,
+        stat: Callable[[str], Optional[ContentKey]],
+        plan_cache_size: int = 256
+    ):
+        """
+        Initialize the snapshot store
+        
+        Args:
+            path: Snapshot file shared by all workers
+            generations: Shared generation table the snapshot is validated against
+            stat: Returns a category's current backend content key (None if it does not exist)
+            plan_cache_size: Compiled templates kept per worker
+        """
+        self.path = Path(path)
+        self.generations = generations
+        self.stat = stat
+        self.plan_cache_size = plan_cache_size
+        
+        # Cleared while a watcher pushes outside edits, so lookups skip stat()
+        self.verify = True
+        
+        self._snapshot: Optional[PromptSnapshot] = None
+        self._lock = threading.Lock()
+        self._plans: "OrderedDict[Tuple[int, str, str], CompiledTemplate]" = OrderedDict()
+        
+        self._leader_file = open(self.path.with_name("snapshot.leader"), 'a')
+        try:
+            fcntl.flock(self._leader_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.is_leader = True
+        except BlockingIOError:
+            self.is_leader = False
+    
+    def current(self) -> Optional[PromptSnapshot]:
+        """Get the mapped snapshot if it is current, remapping a newer file when needed"""
+        generation = self.generations.global_generation()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+        
+        with self._lock:
+            if self._snapshot is not None and self._snapshot.generation == generation:
+                return self._snapshot
+            
+            try:
+                fresh = PromptSnapshot(self.path)
+            except (OSError, ValueError):
+                return None
+            
+            if fresh.generation != generation:
+                fresh.close()
+                return None
+            
+            # The old mapping is left to the garbage collector; readers may still hold it
+            self._snapshot = fresh
+            self._plans.clear()
+            return fresh
+    
+    def rebuild(
+        self,
+        scan: Callable[[], Iterable[Tuple[str, ContentKey]]],
+        load_category: Callable[[str], Optional[Tuple[PromptCategory, str, ContentKey]]]
+    ) -> bool:
+        """
+        Build a snapshot for the current global generation
+        
+        Categories whose backend content key still matches the previous
+        snapshot are copied from it as-is; only changed ones are loaded.
+        
+        Args:
+            scan: Yields every category to include with its backend content key
+            load_category: Returns a category with its content hash and key, or None if it is gone
+        
+        Returns:
+            True if a snapshot was written
+        """
+        with open(self.path.with_name("snapshot.lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            
+            # Read before loading, so saves during the build leave the snapshot stale, not wrong
+            generation = self.generations.global_generation()
+            
+            try:
+                previous = PromptSnapshot(self.path)
+            except (OSError, ValueError):
+                previous = None
+            
+            try:
+                if previous is not None and previous.generation >= generation:
+                    return False
+                
+                reusable = previous.categories() if previous is not None else {}
+                entries = []
+                loaded = 0
+                for name, content_key in scan():
+                    previous_key, previous_entries = reusable.get(name, (None, None))
+                    if previous_key == tuple(content_key):
+                        entries.extend(previous_entries)
+                        continue
+                    
+                    found = load_category(name)
+                    if found is not None:
+                        entries.extend(encode_category(name, *found))
+                        loaded += 1
+                
+                size = write_snapshot(self.path, generation, entries)
+            finally:
+                if previous is not None:
+                    previous.close()
+        
+        logger.info(f"🗺️ Built prompt snapshot for generation {generation} ({size} bytes, {loaded} categories loaded)")
+        return True
+    
+    def _current_for(self, category: str) -> Optional[PromptSnapshot]:
+        """Get the current snapshot if its copy of a category matches the backend"""
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        
+        # A category missing from both the snapshot and the backend is consistently absent
+        if self.verify and snapshot.content_key(category) != self.stat(category):
+            return None
+        return snapshot
+    
+    def category_digest(self, category: str) -> Optional[str]:
+        """Content hash of a category from the current snapshot, or None if unknown"""
+        snapshot = self._current_for(category)
+        return snapshot.category_digest(category) if snapshot else None
+    
+    def get_template(
+        self,
+        category: str,
+        template_name: str
+    ) -> Optional[Tuple[Optional[Dict], Optional[str], Optional[str]]]:
+        """
+        Look up a template in the current snapshot
+        
+        Returns:
+            (template fields, None, category content hash), (None, error message, None),
+            or None if the snapshot or its copy of the category is not current
+        """
+        snapshot = self._current_for(category)
+        if snapshot is None:
+            return None
+        
+        template = snapshot.get_template(category, template_name)
+        if template is not None:
+            return template, None, snapshot.category_digest(category)
+        if not snapshot.has_category(category):
+            return None, f"Category '{category}' not found", None
+        return None, f"Template '{template_name}' not found in category '{category}'", None
+    
+    def resolve_plan(
+        self,
+        category: str,
+        template_name: str
+    ) -> Optional[Tuple[Optional[CompiledTemplate], Optional[str]]]:
+        """
+        Resolve a render plan from the current snapshot
+        
+        Returns:
+            (plan, None), (None, error message), or None if the snapshot or its
+            copy of the category is not current
+        """
+        snapshot = self._current_for(category)
+        if snapshot is None:
+            return None
+        
+        plan_key = (snapshot.generation, category, template_name)
+        with self._lock:
+            plan = self._plans.get(plan_key)
+            if plan is not None:
+                self._plans.move_to_end(plan_key)
+                return plan, None
+        
+        template = snapshot.get_template(category, template_name)
+        if template is None:
+            if not snapshot.has_category(category):
+                return None, f"Category '{category}' not found"
+            return None, f"Template '{template_name}' not found in category '{category}'"
+        
+        plan = CompiledTemplate(template["content"], (category, template_name))
+        with self._lock:
+            self._plans[plan_key] = plan
+            while len(self._plans) > self.plan_cache_size:
+                self._plans.popitem(last=False)
+        
+        return plan, None
+    
+    def close(self) -> None:
+        """Release leadership and unmap the current snapshot"""
+        self._leader_file.close()
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot.close()
+                self._snapshot = None
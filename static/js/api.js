@@ -59,6 +59,35 @@ export const ApiService = {
     });
   },
 
+  /**
+   * JSON Patch로 카테고리의 변경된 부분만 업데이트합니다.
+   * @param {string} categoryName - 업데이트할 카테고리 이름
+   * @param {Array<object>} operations - JSON Patch 연산 목록
+   * @param {string} apiKey - API 키
+   */
+  async patchCategory(categoryName, operations, apiKey) {
+    return this.request(`/api/prompts/${categoryName}`, apiKey, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json-patch+json' },
+      body: JSON.stringify(operations)
+    });
+  },
+
+  /**
+   * 단일 템플릿의 필드를 업데이트합니다.
+   * @param {string} categoryName - 카테고리 이름
+   * @param {string} templateName - 템플릿 이름
+   * @param {object} changes - 변경할 필드 ({ content, description, ... })
+   * @param {string} apiKey - API 키
+   */
+  async patchTemplate(categoryName, templateName, changes, apiKey) {
+    return this.request(`/api/prompts/${categoryName}/${templateName}`, apiKey, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/merge-patch+json' },
+      body: JSON.stringify(changes)
+    });
+  },
+
   /**
    * 프롬프트 템플릿을 테스트합니다.
    * @param {object} payload - 테스트 데이터 ({ category, template_name, variables })
@@ -10,6 +10,7 @@ class PromptStudio {
         this.currentCategory = null;
         this.currentTemplate = null;
         this.categories = {};
+        this.loadedCategory = null; // 마지막으로 불러오거나 저장한 카테고리 (변경분 계산용)
         this.unsavedChanges = false;
         
         // 의존성 주입
@@ -156,6 +157,7 @@ class PromptStudio {
 
             this.currentCategory = categoryName;
             this.currentTemplate = templateName;
+            this.loadedCategory = data.category;
             
             const fullContent = JSON.stringify(data.category, null, 2);
             this.editor.setValue(fullContent);
@@ -187,7 +189,16 @@ class PromptStudio {
             const editorContent = this.editor.getValue();
             const categoryData = JSON.parse(editorContent);
             
-            await this.api.updateCategory(this.currentCategory, categoryData, this.apiKey);
+            // 변경된 템플릿만 JSON Patch로 전송하고, 비교할 원본이 없으면 전체 카테고리를 저장
+            if (this.loadedCategory) {
+                const operations = this.diffCategory(this.loadedCategory, categoryData);
+                if (operations.length > 0) {
+                    await this.api.patchCategory(this.currentCategory, operations, this.apiKey);
+                }
+            } else {
+                await this.api.updateCategory(this.currentCategory, categoryData, this.apiKey);
+            }
+            this.loadedCategory = categoryData;
 
             this.unsavedChanges = false;
             this.ui.showToast('Prompt saved successfully!', 'success');
@@ -204,6 +215,58 @@ class PromptStudio {
         }
     }
 
+    /**
+     * 두 카테고리를 비교해 JSON Patch 연산 목록을 만듭니다.
+     * 템플릿은 변경된 필드 단위로, 추가/삭제된 템플릿은 통째로 전송합니다.
+     */
+    diffCategory(before, after) {
+        const operations = [];
+        const escape = (key) => key.replace(/~/g, '~0').replace(/\//g, '~1');
+        const same = (a, b) => JSON.stringify(a) === JSON.stringify(b);
+
+        for (const key of Object.keys(after)) {
+            if (key === 'templates') continue;
+            if (!(key in before)) {
+                operations.push({ op: 'add', path: `/${escape(key)}`, value: after[key] });
+            } else if (!same(before[key], after[key])) {
+                operations.push({ op: 'replace', path: `/${escape(key)}`, value: after[key] });
+            }
+        }
+        for (const key of Object.keys(before)) {
+            if (key !== 'templates' && !(key in after)) {
+                operations.push({ op: 'remove', path: `/${escape(key)}` });
+            }
+        }
+
+        const oldTemplates = before.templates || {};
+        const newTemplates = after.templates || {};
+        for (const [name, template] of Object.entries(newTemplates)) {
+            const path = `/templates/${escape(name)}`;
+            const previous = oldTemplates[name];
+            if (!previous || typeof template !== 'object' || typeof previous !== 'object') {
+                operations.push({ op: previous ? 'replace' : 'add', path, value: template });
+                continue;
+            }
+            for (const [field, value] of Object.entries(template)) {
+                if (!same(previous[field], value)) {
+                    operations.push({ op: field in previous ? 'replace' : 'add', path: `${path}/${escape(field)}`, value });
+                }
+            }
+            for (const field of Object.keys(previous)) {
+                if (!(field in template)) {
+                    operations.push({ op: 'remove', path: `${path}/${escape(field)}` });
+                }
+            }
+        }
+        for (const name of Object.keys(oldTemplates)) {
+            if (!(name in newTemplates)) {
+                operations.push({ op: 'remove', path: `/templates/${escape(name)}` });
+            }
+        }
+
+        return operations;
+    }
+
     async testCurrentPrompt() {
         if (!this.currentCategory || !this.currentTemplate) return;
 
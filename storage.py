@@ -4,157 +4,813 @@ JSON file-based storage for prompt templates
 """
 
 import json
-import os
+import fcntl
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
-from string import Template
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from models import PromptCategory, PromptTemplate
+from models import PromptCategory
+from render import CompiledTemplate, compile_templates
+from catalog import CatalogIndex
+from backups import BackupStore
+from history import VersionHistory
+from backends import (
+    ContentKey,
+    JsonFileBackend,
+    PromptBackend,
+    category_from_data,
+    serialize_category
+)
+from coherence import GenerationTable
+from snapshot import SnapshotStore
+from response_cache import ResponseCache, render_json
+from metrics import STORAGE_BYTES, timed
+from render_stats import RenderStats
+from profiler import current_request_profile
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
 
+class _CachedCategory:
+    """Parsed category cached together with its compiled render plans"""
+    
+    def __init__(
+        self,
+        file_key: Tuple[int, int],
+        category: PromptCategory,
+        digest: str,
+        generation: int = 0,
+        name: Optional[str] = None
+    ):
+        self.file_key = file_key
+        self.category = category
+        self.digest = digest
+        self.generation = generation
+        self.plans = compile_templates(category.templates, name)
+    
+    def summary(self) -> Dict:
+        """Catalog summary of the cached category"""
+        return category_summary(self.category, self.file_key, self.digest)
+
+
+def catalog_digest(entries: Dict[str, Dict]) -> str:
+    """Hash identifying a catalog listing, stable across worker processes"""
+    listing = sorted((name, summary["hash"]) for name, summary in entries.items())
+    return hashlib.sha256(json.dumps(listing).encode('utf-8')).hexdigest()
+
+
+# Summary fields a category listing can return, and those returned by default
+LIST_FIELDS = ("version", "description", "template_count", "template_names", "revision")
+DEFAULT_LIST_FIELDS = ("version", "description", "template_count", "template_names")
+
+
+def category_summary(category: PromptCategory, file_key: Tuple[int, int], digest: str) -> Dict:
+    """Build the catalog index entry for a category file"""
+    return {
+        "version": category.version,
+        "description": category.description,
+        "template_count": len(category.templates),
+        "template_names": list(category.templates.keys()),
+        "mtime_ns": file_key[0],
+        "size": file_key[1],
+        "hash": digest
+    }
+
+
 class PromptStorage:
-    """File-based storage manager for prompts"""
+    """Storage manager for prompts, layered over a persistence backend"""
     
-    def __init__(self, prompts_dir: str = "prompts"):
+    def __init__(
+        self,
+        prompts_dir: str = "prompts",
+        cache_size: int = 128,
+        backup_dir: Optional[str] = None,
+        backup_keep_last: int = 20,
+        backup_max_age_days: Optional[float] = None,
+        history_keyframe_interval: int = 20,
+        fsync_interval: float = 1.0,
+        coherence: bool = True,
+        snapshot: bool = False,
+        backend: Optional[PromptBackend] = None,
+        response_cache_bytes: int = 32 * 1024 * 1024
+    ):
         """
         Initialize storage manager
         
         Args:
             prompts_dir: Directory containing prompt JSON files
+            cache_size: Maximum number of parsed categories kept in memory (0 disables caching)
+            backup_dir: Directory for category backups (defaults to prompts_dir/.studio/backups)
+            backup_keep_last: Number of backups kept per category (0 keeps all)
+            backup_max_age_days: Drop backups older than this many days (None keeps all)
+            history_keyframe_interval: Revisions between full keyframes in the version history
+            fsync_interval: Seconds between batched directory fsyncs of saved categories
+                (0 fsyncs every save); file data is always flushed before the rename
+            coherence: Share save generations with other worker processes through
+                prompts_dir/.studio/generations so their caches drop stale categories
+            snapshot: Serve template reads and renders from a memory-mapped snapshot
+                shared by all workers (requires coherence)
+            backend: Where categories are persisted (defaults to one JSON file per
+                category in prompts_dir); state such as backups stays in prompts_dir
+            response_cache_bytes: Memory for pre-serialized response bodies (0 disables it)
         """
         self.prompts_dir = Path(prompts_dir)
         self.prompts_dir.mkdir(exist_ok=True)
+        self.backend = backend or JsonFileBackend(self.prompts_dir, fsync_interval)
+        
+        # Parsed categories keyed by name, validated against the backend's content key
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: "OrderedDict[str, _CachedCategory]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Final response bytes of category and template reads, per revision and encoding
+        self.responses = ResponseCache(response_cache_bytes)
+        
+        # Per-template render counters for the admin render-stats endpoint
+        self.render_stats = RenderStats()
+        
+        # Persistent per-category summaries used for listings
+        self.state_dir = self.prompts_dir / ".studio"
+        self.catalog = CatalogIndex(self.state_dir / "catalog.json")
+        
+        # Backups are kept out of the prompts directory so they are never listed as categories
+        self.backups = BackupStore(
+            Path(backup_dir) if backup_dir else self.state_dir / "backups",
+            keep_last=backup_keep_last,
+            max_age_days=backup_max_age_days
+        )
+        self.backups.import_legacy(self.prompts_dir)
+        
+        # Every saved revision, stored as deltas between periodic keyframes
+        self.history = VersionHistory(
+            self.state_dir / "history",
+            keyframe_interval=history_keyframe_interval
+        )
+        
+        # Generation counters shared by all workers; a cached category is only
+        # used while its generation matches, so saves elsewhere invalidate it
+        self.generations = GenerationTable(self.state_dir / "generations") if coherence else None
+        
+        # Single-writer group commit per category: concurrent saves of the same
+        # category are coalesced and written by whichever thread holds the slot
+        self._write_cond = threading.Condition()
+        self._write_ticket = 0
+        self._pending_writes: Dict[str, Tuple[int, PromptCategory, bytes]] = {}
+        self._active_writers: set = set()
+        self._committed: Dict[str, Tuple[int, bool]] = {}
+        self.coalesced_writes = 0
+        
+        # Set while a PromptWatcher pushes file changes, so cached reads skip stat()
+        # and the catalog only re-indexes categories reported as changed
+        self.watching = False
+        self._catalog_dirty: set = set()
+        self._catalog_synced = False
+        self._catalog_generation = 0
+        
+        # Change events are numbered so a load that raced one is not cached:
+        # the event found nothing to evict, and no later event would evict it
+        self._change_epoch = 0
+        self._changed_at: Dict[str, int] = {}
+        self._invalidated_at = 0
         
-        logger.info(f"✅ Prompt storage initialized: {self.prompts_dir}")
+        # Read-only snapshot of every template, mapped by all workers; the leader
+        # rebuilds it at startup in case files changed while no worker was running
+        self.snapshots = None
+        if snapshot and self.generations:
+            self.snapshots = SnapshotStore(self.state_dir / "snapshot.bin", self.generations, self.backend.stat)
+            if self.snapshots.is_leader:
+                self.generations.bump_global()
+            if self.snapshots.current() is None:
+                self.snapshots.rebuild(self.backend.scan, self._snapshot_category)
+        
+        logger.info(f"✅ Prompt storage initialized: {self.prompts_dir} ({self.backend.name} backend)")
     
+    @timed("list_categories")
     def list_categories(self) -> List[str]:
         """List all available prompt categories"""
-        categories = []
-        
-        for json_file in self.prompts_dir.glob("*.json"):
-            categories.append(json_file.stem)
-        
-        return sorted(categories)
+        return self.backend.list_categories()
     
+    @timed("get_category")
     def get_category(self, category: str) -> Optional[PromptCategory]:
         """
         Load a specific prompt category
         
+        Parsed categories are cached and revalidated with a single stat() call
+        (or an indexed lookup for database backends),
+        so the returned object is shared and must not be mutated.
+        
         Args:
             category: Category name
-            
+        
         Returns:
             PromptCategory or None if not found
         """
-        file_path = self.prompts_dir / f"{category}.json"
+        entry = self._load_entry(category)
+        return entry.category if entry else None
+    
+    def get_category_with_digest(self, category: str) -> Tuple[Optional[PromptCategory], Optional[str]]:
+        """Load a category together with the content hash of the same read"""
+        entry = self._load_entry(category)
+        return (entry.category, entry.digest) if entry else (None, None)
+    
+    @timed("get_category_response")
+    def get_category_response(
+        self,
+        category: str,
+        encoding: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Get the serialized GET response body of a category
+        
+        Args:
+            category: Category name
+            encoding: Content-Encoding of the body, or None for identity
+        
+        Returns:
+            (body, category content hash), or (None, None) if not found
+        """
+        digest = self.category_digest(category)
+        if digest is not None:
+            body = self.responses.get((digest, "category", category), encoding)
+            if body is not None:
+                return body, digest
+        
+        prompt_category, digest = self.get_category_with_digest(category)
+        if prompt_category is None:
+            return None, None
+        
+        body = self.responses.get_or_build(
+            (digest, "category", category),
+            encoding,
+            lambda: render_json({
+                "success": True,
+                "category": prompt_category.dict()
+            })
+        )
+        return body, digest
+    
+    @timed("get_template_response")
+    def get_template_response(
+        self,
+        category: str,
+        template_name: str,
+        encoding: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+        """
+        Get the serialized GET response body of a single template
         
-        if not file_path.exists():
-            logger.warning(f"Category file not found: {category}")
+        Args:
+            category: Category name
+            template_name: Template name
+            encoding: Content-Encoding of the body, or None for identity
+        
+        Returns:
+            (body, None, category content hash), or (None, error message, None) if not found
+        """
+        digest = self.category_digest(category)
+        if digest is not None:
+            body = self.responses.get((digest, "template", category, template_name), encoding)
+            if body is not None:
+                return body, None, digest
+        
+        template, error, digest = self.get_template(category, template_name)
+        if template is None:
+            return None, error, None
+        
+        body = self.responses.get_or_build(
+            (digest, "template", category, template_name),
+            encoding,
+            lambda: render_json({
+                "success": True,
+                "category": category,
+                "template_name": template_name,
+                "template": template
+            })
+        )
+        return body, None, digest
+    
+    def category_digest(self, category: str) -> Optional[str]:
+        """
+        Content hash of a category if it is known without reading the category
+        
+        Answered from the snapshot, the category cache or the catalog index;
+        None means the category has to be loaded (or does not exist).
+        """
+        if self.snapshots:
+            digest = self.snapshots.category_digest(category)
+            if digest is not None:
+                return digest
+        
+        entry = self._peek_entry(category)
+        if entry is not None:
+            return entry.digest
+        
+        content_key = self.backend.stat(category)
+        if content_key is not None and self.catalog.is_current(category, content_key):
+            return self.catalog.get(category)["hash"]
+        return None
+    
+    def _peek_entry(self, category: str) -> Optional[_CachedCategory]:
+        """Return a category from the cache if it is current, without loading it on a miss"""
+        generation = self._generation(category)
+        
+        if self.watching:
+            return self._cache_lookup(category, None, generation, count_miss=False)
+        
+        content_key = self.backend.stat(category)
+        if content_key is None:
+            return None
+        
+        return self._cache_lookup(category, content_key, generation, count_miss=False)
+    
+    def _load_entry(self, category: str) -> Optional[_CachedCategory]:
+        """
+        Load a category and its render plans
+        
+        Cached entries are revalidated against the backend's content key, or
+        trusted as-is while a watcher is pushing invalidations.
+        """
+        # Read before the content, so a concurrent save leaves the entry stale rather than wrong
+        generation = self._generation(category)
+        epoch = self._change_epoch
+        
+        if self.watching:
+            cached = self._cache_lookup(category, None, generation, count_miss=False)
+            if cached is not None:
+                return cached
+        
+        content_key = self.backend.stat(category)
+        if content_key is None:
+            self.invalidate_cache(category)
+            logger.warning(f"Category not found: {category}")
             return None
         
+        cached = self._cache_lookup(category, content_key, generation)
+        if cached is not None:
+            return cached
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Convert templates to PromptTemplate objects
-            templates = {}
-            for name, template_data in data.get('templates', {}).items():
-                templates[name] = PromptTemplate(**template_data)
-            
-            prompt_category = PromptCategory(
-                version=data.get('version', '1.0.0'),
-                category=data.get('category', category),
-                description=data.get('description', ''),
-                templates=templates
-            )
+            found = self.backend.read(category)
+            if found is None:
+                self.invalidate_cache(category)
+                logger.warning(f"Category not found: {category}")
+                return None
             
-            logger.debug(f"📂 Loaded category: {category}")
-            return prompt_category
+            content_key, data, digest = found
+            STORAGE_BYTES.inc(self.backend.name, "read", amount=content_key[1])
+            
+            with span("validate", category=category):
+                prompt_category = category_from_data(data, category)
+            with span("compile", category=category):
+                entry = _CachedCategory(content_key, prompt_category, digest, generation, name=category)
+            self._cache_store(category, entry, epoch)
             
+            logger.debug(f"📂 Loaded category: {category}")
+            return entry
+        
         except Exception as e:
             logger.error(f"❌ Failed to load category {category}: {str(e)}")
             return None
     
+    @timed("save_category")
     def save_category(self, category: str, prompt_category: PromptCategory) -> bool:
         """
-        Save a prompt category to file
+        Save a prompt category
+        
+        The category is replaced atomically, so concurrent readers never see a
+        partial write, and the previous content is backed up first. Saves of
+        the same category that arrive while one is being written are coalesced
+        into a single write of the newest content. Saving content identical
+        to what is on disk writes nothing.
         
         Args:
             category: Category name
             prompt_category: PromptCategory object to save
-            
+        
         Returns:
             Success status
         """
-        file_path = self.prompts_dir / f"{category}.json"
+        try:
+            content = self._serialize_category(prompt_category)
+        except Exception as e:
+            logger.error(f"❌ Failed to save category {category}: {str(e)}")
+            return False
         
+        with self._write_cond:
+            self._write_ticket += 1
+            ticket = self._write_ticket
+            
+            if category in self._pending_writes:
+                self.coalesced_writes += 1
+            self._pending_writes[category] = (ticket, prompt_category, content)
+            
+            if category in self._active_writers:
+                # The active writer picks up this content (or newer) on its next pass
+                while self._committed.get(category, (0, False))[0] < ticket:
+                    self._write_cond.wait()
+                return self._committed[category][1]
+            
+            self._active_writers.add(category)
+        
+        result = None
         try:
-            # Create backup if file exists
-            if file_path.exists():
-                backup_path = file_path.with_suffix('.json.backup')
-                with open(file_path, 'r', encoding='utf-8') as src:
-                    with open(backup_path, 'w', encoding='utf-8') as dst:
-                        dst.write(src.read())
-                logger.info(f"💾 Created backup: {backup_path}")
-            
-            # Convert to JSON-serializable format
-            data = {
-                "version": prompt_category.version,
-                "category": prompt_category.category,
-                "description": prompt_category.description,
-                "templates": {}
-            }
+            while True:
+                with self._write_cond:
+                    pending = self._pending_writes.pop(category, None)
+                    if pending is None:
+                        self._active_writers.discard(category)
+                        return bool(result)
+                
+                pending_ticket, pending_category, pending_content = pending
+                success = self._write_category(category, pending_category, pending_content)
+                if result is None:
+                    result = success
+                
+                with self._write_cond:
+                    self._committed[category] = (pending_ticket, success)
+                    self._write_cond.notify_all()
+        
+        except BaseException:
+            with self._write_cond:
+                self._active_writers.discard(category)
+                self._write_cond.notify_all()
+            raise
+    
+    @timed("update_category")
+    def update_category(
+        self,
+        category: str,
+        mutate: Callable[[PromptCategory], PromptCategory]
+    ) -> Optional[bool]:
+        """
+        Read-modify-write a category under a per-category lock
+        
+        The lock is an flock shared by all workers, so concurrent partial
+        updates of the same category never lose each other's changes.
+        Exceptions raised by mutate propagate and nothing is saved.
+        
+        Args:
+            category: Category name
+            mutate: Returns the updated category given the current one
+        
+        Returns:
+            Save success, or None if the category does not exist
+        """
+        lock_path = self.state_dir / "locks" / f"{category}.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
             
-            for name, template in prompt_category.templates.items():
-                data["templates"][name] = {
-                    "content": template.content,
-                    "description": template.description,
-                    "variables": template.variables,
-                    "model": template.model,
-                    "max_tokens": template.max_tokens
-                }
+            entry = self._load_entry(category)
+            if entry is None:
+                return None
+            
+            return self.save_category(category, mutate(entry.category))
+    
+    def _serialize_category(self, prompt_category: PromptCategory) -> bytes:
+        """Serialize a category to the pretty-printed file format"""
+        return serialize_category(prompt_category)
+    
+    def _write_category(self, category: str, prompt_category: PromptCategory, content: bytes) -> bool:
+        """Write serialized category content (called by the category's single writer)"""
+        try:
+            digest = hashlib.sha256(content).hexdigest()
+            
+            current_digest = self._current_digest(category)
+            if current_digest == digest:
+                logger.info(f"✅ Category unchanged, nothing to save: {category}")
+                return True
+            
+            # Back up the current content unless it is already the latest backup
+            if current_digest is not None:
+                latest_backup = self.backups.latest(category)
+                needs_backup = latest_backup is None or latest_backup["hash"] != current_digest
+                seed_history = not self.history.has_history(category)
+                
+                current_content = self.backend.read_bytes(category) if needs_backup or seed_history else None
+                if current_content is not None:
+                    STORAGE_BYTES.inc(self.backend.name, "read", amount=len(current_content))
+                    if needs_backup:
+                        self.backups.create(category, current_content, kind="pre-save")
+                    
+                    # Seed the history with the version that predates it
+                    if seed_history:
+                        self.history.record(category, current_content)
             
-            # Save to file with pretty formatting
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with span("backend.write", category=category, backend=self.backend.name):
+                content_key = self.backend.write(category, prompt_category, content, digest)
+            STORAGE_BYTES.inc(self.backend.name, "written", amount=len(content))
+            
+            # Other workers drop their cached copy on their next lookup
+            if self.generations:
+                self.generations.bump(category)
+            self.invalidate_cache(category)
+            if current_digest is not None:
+                self.responses.invalidate(current_digest)
+            
+            # Keep the catalog index in step with the content just written
+            with self.catalog.transaction() as catalog:
+                catalog.update(category, category_summary(prompt_category, content_key, digest))
+            
+            self.history.record(category, content)
+            
+            if self.snapshots:
+                self.snapshots.rebuild(self.backend.scan, self._snapshot_category)
             
             logger.info(f"✅ Saved category: {category}")
             return True
-            
+        
         except Exception as e:
             logger.error(f"❌ Failed to save category {category}: {str(e)}")
             return False
     
-    def get_all_prompts(self) -> Dict[str, Dict]:
+    def flush(self) -> int:
+        """Flush pending fsyncs of saved categories"""
+        return self.backend.flush()
+    
+    def close(self) -> None:
+        """Flush outstanding writes before shutdown"""
+        self.backend.close()
+        if self.snapshots:
+            self.snapshots.close()
+    
+    def _snapshot_category(self, category: str) -> Optional[Tuple[PromptCategory, str, ContentKey]]:
+        """Load a category with its content hash and key for a snapshot build"""
+        entry = self._load_entry(category)
+        return (entry.category, entry.digest, entry.file_key) if entry else None
+    
+    def _current_digest(self, category: str) -> Optional[str]:
+        """
+        Content hash of a category, or None if it does not exist
+        
+        Taken from the cache or catalog index when they match the backend's
+        content key, so the content is only read when neither is current.
         """
-        Get all prompts from all categories
+        content_key = self.backend.stat(category)
+        if content_key is None:
+            return None
+        
+        with self._cache_lock:
+            entry = self._cache.get(category)
+        if entry is not None and entry.file_key == content_key:
+            return entry.digest
+        
+        if self.catalog.is_current(category, content_key):
+            return self.catalog.get(category)["hash"]
+        
+        found = self.backend.read(category)
+        if found is None:
+            return None
+        STORAGE_BYTES.inc(self.backend.name, "read", amount=found[0][1])
+        return found[2]
+    
+    def invalidate_cache(self, category: str) -> None:
+        """Drop a category from the in-memory cache"""
+        with self._cache_lock:
+            self._cache.pop(category, None)
+    
+    def _generation(self, category: str) -> int:
+        """Shared save generation of a category (0 without coherence)"""
+        return self.generations.get(category) if self.generations else 0
+    
+    def set_watching(self, watching: bool) -> None:
+        """Switch between stat-validated reads and watcher-driven invalidation"""
+        with self._cache_lock:
+            self.watching = watching
+            self._catalog_synced = False
+            self._catalog_dirty.clear()
+        if self.snapshots:
+            self.snapshots.verify = not watching
+    
+    def on_file_changed(self, category: str) -> None:
+        """
+        Drop cached state of a category whose file changed on disk
+        
+        The cached category (with its compiled templates) is kept if it still
+        matches the file, e.g. after this process's own save.
+        """
+        file_key = self.backend.stat(category)
+        
+        with self._cache_lock:
+            self._change_epoch += 1
+            self._changed_at[category] = self._change_epoch
+            entry = self._cache.get(category)
+            if entry is not None and entry.file_key != file_key:
+                del self._cache[category]
+            self._catalog_dirty.add(category)
+        
+        # Saves rebuild the snapshot themselves; the leader picks up outside edits
+        if self.snapshots and self.snapshots.is_leader and not self.catalog.is_current(category, file_key):
+            self.generations.bump_global()
+            self.snapshots.rebuild(self.backend.scan, self._snapshot_category)
+        
+        logger.debug(f"👀 Category file changed: {category}")
+    
+    def invalidate_all(self) -> None:
+        """Drop every cached category and force a full catalog rescan"""
+        with self._cache_lock:
+            self._change_epoch += 1
+            self._invalidated_at = self._change_epoch
+            self._cache.clear()
+            self._catalog_synced = False
+    
+    def cache_stats(self) -> Dict[str, float]:
+        """Get category cache size and hit/miss counters"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_ratio": self.cache_hits / lookups if lookups else 0.0
+        }
+    
+    def _cache_lookup(
+        self,
+        category: str,
+        file_key: Optional[ContentKey],
+        generation: int = 0,
+        count_miss: bool = True
+    ) -> Optional[_CachedCategory]:
+        """
+        Return a cached category if its content key and generation are unchanged
+        
+        A file_key of None trusts the entry's content key (watcher mode).
+        """
+        with span("cache.lookup", category=category), self._cache_lock:
+            entry = self._cache.get(category)
+            if (
+                entry is not None
+                and entry.generation == generation
+                and (file_key is None or entry.file_key == file_key)
+            ):
+                self._cache.move_to_end(category)
+                self.cache_hits += 1
+                return entry
+            if count_miss:
+                self.cache_misses += 1
+            return None
+    
+    def _cache_store(self, category: str, entry: _CachedCategory, epoch: Optional[int] = None) -> None:
+        """
+        Store a parsed category, evicting the least recently used entries
+        
+        Args:
+            category: Category name
+            entry: Parsed category
+            epoch: Change epoch read before the content; the entry is not
+                stored if a change event for the category arrived since
+        """
+        if self.cache_size <= 0:
+            return
+        
+        with self._cache_lock:
+            if epoch is not None and max(self._changed_at.get(category, 0), self._invalidated_at) > epoch:
+                return
+            self._cache[category] = entry
+            self._cache.move_to_end(category)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    @timed("refresh_catalog")
+    def refresh_catalog(self) -> Dict[str, Dict]:
+        """
+        Bring the catalog index up to date with the backend
+        
+        Only categories whose content key changed since they were indexed
+        are parsed again; unreadable categories are left out of the index.
+        While a watcher is running, only categories it reported are checked.
         
         Returns:
-            Dictionary with category summary information
+            Catalog entries keyed by category name
         """
-        all_prompts = {}
-        total_templates = 0
+        global_generation = self.generations.global_generation() if self.generations else 0
+        
+        with self._cache_lock:
+            watched = self.watching
+            # Saves by other workers may not have reached this worker's watcher yet
+            if watched and self._catalog_synced and self._catalog_generation == global_generation:
+                dirty, self._catalog_dirty = self._catalog_dirty, set()
+            else:
+                dirty = None
+                self._catalog_dirty.clear()
+        
+        if dirty is not None:
+            with self.catalog.transaction() as catalog:
+                for category_name in dirty:
+                    self._reindex_category(category_name)
+                return catalog.entries()
         
-        for category_name in self.list_categories():
-            category = self.get_category(category_name)
-            if category:
-                template_count = len(category.templates)
-                total_templates += template_count
+        with self.catalog.transaction() as catalog:
+            seen = set()
+            
+            for category_name, content_key in self.backend.scan():
+                seen.add(category_name)
                 
-                all_prompts[category_name] = {
-                    "version": category.version,
-                    "description": category.description,
-                    "template_count": template_count,
-                    "template_names": list(category.templates.keys())
-                }
+                if catalog.is_current(category_name, content_key):
+                    continue
+                
+                self._reindex_category(category_name)
+            
+            for category_name in catalog.names():
+                if category_name not in seen:
+                    catalog.remove(category_name)
+            
+            entries = catalog.entries()
+        
+        with self._cache_lock:
+            if watched and self.watching:
+                self._catalog_synced = True
+                self._catalog_generation = global_generation
+        
+        return entries
+    
+    def _reindex_category(self, category: str) -> None:
+        """Rebuild one category's catalog entry from the backend (inside a catalog transaction)"""
+        content_key = self.backend.stat(category)
+        if content_key is None:
+            self.catalog.remove(category)
+            return
+        
+        if self.catalog.is_current(category, content_key):
+            return
+        
+        entry = self._load_entry(category)
+        if entry:
+            self.catalog.update(category, entry.summary())
+        else:
+            self.catalog.remove(category)
+    
+    @timed("get_all_prompts")
+    def get_all_prompts(
+        self,
+        fields: Optional[List[str]] = None,
+        since_revision: Optional[int] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Get summary information for all categories, or a page or delta of them
+        
+        Categories are listed in name order. Totals always describe the whole
+        catalog, whatever is selected.
+        
+        Args:
+            fields: Summary fields to return (DEFAULT_LIST_FIELDS when None)
+            since_revision: Only list categories changed after this catalog revision,
+                and report those removed after it under "deleted"
+            after: Only list categories whose name sorts after this one
+            limit: Maximum number of categories to list
+        
+        Returns:
+            Dictionary with category summary information, the catalog revision,
+            the name to continue after (None on the last page) and a digest of
+            the whole listing
+        """
+        fields = fields or DEFAULT_LIST_FIELDS
+        
+        with self.catalog.transaction() as catalog:
+            entries = self.refresh_catalog()
+            revision = catalog.revision
+            if since_revision is not None:
+                names, deleted, complete = catalog.changes_since(since_revision)
+            else:
+                names, deleted, complete = list(entries), [], True
+        
+        if after is not None:
+            names = [name for name in names if name > after]
+        
+        next_after = None
+        if limit is not None and len(names) > limit:
+            names = names[:limit]
+            next_after = names[-1]
+        
+        all_prompts = {}
+        for category_name in names:
+            summary = entries[category_name]
+            all_prompts[category_name] = {field: summary.get(field) for field in fields}
         
         return {
             "categories": all_prompts,
-            "total_categories": len(all_prompts),
-            "total_templates": total_templates
+            "total_categories": len(entries),
+            "total_templates": sum(summary["template_count"] for summary in entries.values()),
+            "revision": revision,
+            "deleted": deleted,
+            "complete": complete,
+            "next_after": next_after,
+            "digest": catalog_digest(entries)
         }
     
     def test_prompt_rendering(self, category: str, template_name: str, variables: Dict) -> Dict:
@@ -165,46 +821,42 @@ class PromptStorage:
             category: Category name
             template_name: Template name
             variables: Variables to substitute
-            
+        
         Returns:
             Test result dictionary
         """
+        plan, error = self.resolve_plan(category, template_name)
+        return self._test_rendering(plan, error, variables)
+    
+    @timed("render")
+    def _test_rendering(
+        self,
+        plan: Optional[CompiledTemplate],
+        error: Optional[str],
+        variables: Dict
+    ) -> Dict:
+        """Test prompt rendering with an already resolved plan"""
         try:
-            prompt_category = self.get_category(category)
-            if not prompt_category:
+            if plan is None:
                 return {
                     "success": False,
-                    "error": f"Category '{category}' not found"
+                    "error": error
                 }
             
-            if template_name not in prompt_category.templates:
-                return {
-                    "success": False,
-                    "error": f"Template '{template_name}' not found in category '{category}'"
-                }
-            
-            template_obj = prompt_category.templates[template_name]
-            template_content = template_obj.content
-            
-            # Use Python string Template for safe substitution
-            template = Template(template_content)
-            
-            # Find missing variables
-            template_vars = set(template.get_identifiers())
-            provided_vars = set(variables.keys())
-            missing_vars = list(template_vars - provided_vars)
-            
-            # Render with safe_substitute (leaves missing vars as-is)
-            rendered_prompt = template.safe_substitute(**variables)
+            # Render from the precompiled plan (same semantics as safe_substitute)
+            start = time.perf_counter()
+            rendered_prompt = plan.render(variables)
+            missing_vars = plan.missing_variables(variables)
+            self._record_render(plan, time.perf_counter() - start, rendered_prompt, missing_vars)
             
             return {
                 "success": True,
                 "rendered_prompt": rendered_prompt,
                 "missing_variables": missing_vars,
-                "template_variables": list(template_vars),
-                "provided_variables": list(provided_vars)
+                "template_variables": list(plan.identifiers),
+                "provided_variables": list(variables.keys())
             }
-            
+        
         except Exception as e:
             logger.error(f"❌ Prompt rendering test failed: {str(e)}")
             return {
@@ -212,29 +864,483 @@ class PromptStorage:
                 "error": f"Rendering failed: {str(e)}"
             }
     
-    def get_category_file_path(self, category: str) -> Path:
-        """Get the file path for a category"""
-        return self.prompts_dir / f"{category}.json"
+    def _record_render(
+        self,
+        plan: CompiledTemplate,
+        seconds: float,
+        rendered_prompt: str,
+        missing_vars: List[str]
+    ) -> None:
+        """Add a render to the statistics of the template the plan was compiled from"""
+        if plan.template_key is not None:
+            self.render_stats.record(plan.template_key, seconds, len(rendered_prompt), missing_vars)
     
-    def backup_category(self, category: str) -> bool:
-        """Create a timestamped backup of a category"""
-        from datetime import datetime
+    @timed("render_batch")
+    def render_batch(
+        self,
+        category: str,
+        template_name: str,
+        items: Iterable[Dict],
+        defaults: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Render many variable sets against one template
         
-        file_path = self.get_category_file_path(category)
-        if not file_path.exists():
-            return False
+        The template is resolved and compiled once for the whole batch.
+        
+        Args:
+            category: Category name
+            template_name: Template name
+            items: Variable sets, one per rendered prompt
+            defaults: Variables shared by every item (item values take precedence)
+        
+        Returns:
+            Batch result dictionary with one result per item
+        """
+        plan, error = self.resolve_plan(category, template_name)
+        if plan is None:
+            return {
+                "success": False,
+                "error": error
+            }
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = file_path.with_name(f"{category}_{timestamp}.backup.json")
+        results = [self.render_with_plan(plan, variables, defaults) for variables in items]
         
+        return {
+            "success": True,
+            "results": results
+        }
+    
+    @timed("render")
+    def render_with_plan(
+        self,
+        plan: CompiledTemplate,
+        variables: Dict,
+        defaults: Optional[Dict] = None
+    ) -> Dict:
+        """Render one variable set with an already resolved plan"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as src:
-                with open(backup_path, 'w', encoding='utf-8') as dst:
-                    dst.write(src.read())
+            if defaults:
+                variables = {**defaults, **variables}
             
-            logger.info(f"📦 Created timestamped backup: {backup_path}")
-            return True
+            start = time.perf_counter()
+            rendered_prompt = plan.render(variables)
+            missing_vars = plan.missing_variables(variables)
+            self._record_render(plan, time.perf_counter() - start, rendered_prompt, missing_vars)
             
+            return {
+                "success": True,
+                "rendered_prompt": rendered_prompt,
+                "missing_variables": missing_vars
+            }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Rendering failed: {str(e)}"
+            }
+    
+    def resolve_plan(
+        self,
+        category: str,
+        template_name: str
+    ) -> Tuple[Optional[CompiledTemplate], Optional[str]]:
+        """
+        Resolve a template's render plan
+        
+        Args:
+            category: Category name
+            template_name: Template name
+        
+        Returns:
+            (plan, None) on success, or (None, error message) if not found
+        """
+        resolved = self._cached_plan(category, template_name)
+        if resolved is not None:
+            return resolved
+        return self._plan_from_entry(self._load_entry(category), category, template_name)
+    
+    def _cached_plan(
+        self,
+        category: str,
+        template_name: str
+    ) -> Optional[Tuple[Optional[CompiledTemplate], Optional[str]]]:
+        """Resolve a render plan from the snapshot or category cache, or None if that needs file I/O"""
+        if self.snapshots:
+            resolved = self.snapshots.resolve_plan(category, template_name)
+            if resolved is not None:
+                return resolved
+        
+        entry = self._peek_entry(category)
+        if entry is not None:
+            return self._plan_from_entry(entry, category, template_name)
+        return None
+    
+    @timed("get_template")
+    def get_template(
+        self,
+        category: str,
+        template_name: str
+    ) -> Tuple[Optional[Dict], Optional[str], Optional[str]]:
+        """
+        Get a single template's fields
+        
+        Args:
+            category: Category name
+            template_name: Template name
+        
+        Returns:
+            (template fields, None, category content hash) on success,
+            or (None, error message, None) if not found
+        """
+        found = self._cached_template(category, template_name)
+        if found is not None:
+            return found
+        
+        # An indexed lookup for database backends, a full category read for files
+        found = self.backend.read_template(category, template_name)
+        if found is not None:
+            template, digest = found
+            return dict(template), None, digest
+        if self.backend.stat(category) is None:
+            return None, f"Category '{category}' not found", None
+        return None, f"Template '{template_name}' not found in category '{category}'", None
+    
+    @timed("get_templates")
+    def get_templates(
+        self,
+        refs: Iterable[Tuple[str, str]],
+        fields: Optional[List[str]] = None,
+        cached_only: bool = False
+    ) -> Optional[Dict[str, Dict]]:
+        """
+        Fetch many templates, loading each category at most once
+        
+        Args:
+            refs: (category, template name) pairs
+            fields: Template fields to return (all when None)
+            cached_only: Return None instead of loading a category that is not cached
+        
+        Returns:
+            {"templates": {"category.template": fields}, "errors": {"category.template": message}}
+        """
+        refs = list(refs)
+        entries: Dict[str, Optional[_CachedCategory]] = {}
+        found: Dict[Tuple[str, str], Tuple] = {}
+        
+        for category, template_name in refs:
+            if (category, template_name) in found:
+                continue
+            
+            result = self.snapshots.get_template(category, template_name) if self.snapshots else None
+            if result is None:
+                if category not in entries:
+                    entries[category] = self._peek_entry(category) if cached_only else self._load_entry(category)
+                    if entries[category] is None and cached_only:
+                        return None
+                result = self._template_from_entry(entries[category], category, template_name)
+            
+            found[(category, template_name)] = result
+        
+        templates = {}
+        errors = {}
+        for category, template_name in refs:
+            template, error, _ = found[(category, template_name)]
+            ref = f"{category}.{template_name}"
+            if template is None:
+                errors[ref] = error
+            elif fields is None:
+                templates[ref] = template
+            else:
+                templates[ref] = {field: template[field] for field in fields}
+        
+        return {
+            "templates": templates,
+            "errors": errors
+        }
+    
+    def _cached_template(
+        self,
+        category: str,
+        template_name: str
+    ) -> Optional[Tuple[Optional[Dict], Optional[str], Optional[str]]]:
+        """Get a template from the snapshot or category cache, or None if that needs file I/O"""
+        if self.snapshots:
+            found = self.snapshots.get_template(category, template_name)
+            if found is not None:
+                return found
+        
+        entry = self._peek_entry(category)
+        if entry is not None:
+            return self._template_from_entry(entry, category, template_name)
+        return None
+    
+    def _template_from_entry(
+        self,
+        entry: Optional[_CachedCategory],
+        category: str,
+        template_name: str
+    ) -> Tuple[Optional[Dict], Optional[str], Optional[str]]:
+        """Get a template's fields from an already loaded category"""
+        if not entry:
+            return None, f"Category '{category}' not found", None
+        
+        template = entry.category.templates.get(template_name)
+        if template is None:
+            return None, f"Template '{template_name}' not found in category '{category}'", None
+        
+        return template.dict(), None, entry.digest
+    
+    def _plan_from_entry(
+        self,
+        entry: Optional[_CachedCategory],
+        category: str,
+        template_name: str
+    ) -> Tuple[Optional[CompiledTemplate], Optional[str]]:
+        """Resolve a render plan from an already loaded category"""
+        if not entry:
+            return None, f"Category '{category}' not found"
+        
+        plan = entry.plans.get(template_name)
+        if plan is None:
+            return None, f"Template '{template_name}' not found in category '{category}'"
+        
+        return plan, None
+    
+    @timed("backup_category")
+    def backup_category(self, category: str) -> bool:
+        """Create a timestamped backup of a category (a no-op if it matches the latest backup)"""
+        try:
+            content = self.backend.read_bytes(category)
+            if content is None:
+                return False
+            STORAGE_BYTES.inc(self.backend.name, "read", amount=len(content))
+            
+            self.backups.create(category, content, kind="manual")
+            return True
+        
         except Exception as e:
             logger.error(f"❌ Backup creation failed: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+    
+    def list_backups(self, category: Optional[str] = None) -> List[Dict]:
+        """List backups from the backup store, newest first"""
+        return self.backups.list(category)
+    
+    def list_revisions(self, category: str) -> List[Dict]:
+        """List the saved revisions of a category, oldest first"""
+        return self.history.list(category)
+    
+    def get_revision(self, category: str, revision: int) -> Optional[Dict]:
+        """
+        Get a historical revision of a category
+        
+        Args:
+            category: Category name
+            revision: Revision number
+        
+        Returns:
+            Revision metadata with the parsed category under "data", or None if not found
+        """
+        historical = self.history.get(category, revision)
+        if historical is None:
+            return None
+        
+        content = historical.pop("content")
+        historical["data"] = json.loads(content)
+        return historical
+    
+    def compact_backups(self) -> Dict[str, int]:
+        """Apply the backup retention policy and delete orphaned blobs"""
+        return self.backups.compact()
+
+
+class AsyncPromptStorage:
+    """
+    Non-blocking facade over PromptStorage for async routes
+    
+    Blocking file I/O runs on a bounded thread pool so slow disk reads never
+    stall the event loop. Reads served from the shared snapshot or the category
+    cache (a stat() and a dictionary lookup) return directly without an
+    executor hop.
+    """
+    
+    def __init__(self, storage: PromptStorage, max_workers: int = 8):
+        """
+        Initialize the async facade
+        
+        Args:
+            storage: Underlying synchronous storage
+            max_workers: Size of the I/O thread pool
+        """
+        self.storage = storage
+        self.prompts_dir = storage.prompts_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage-io")
+    
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking storage call on the I/O thread pool
+        
+        The call runs in a copy of the caller's context, so the request's
+        trace (and profile, if any) follow it onto the I/O thread.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        
+        # A request being profiled also profiles the work done on its behalf
+        request_profile = current_request_profile()
+        if request_profile is not None:
+            return await loop.run_in_executor(
+                self._executor,
+                partial(context.run, request_profile.runcall, func, *args, **kwargs)
+            )
+        
+        return await loop.run_in_executor(self._executor, partial(context.run, func, *args, **kwargs))
+    
+    async def list_categories(self) -> List[str]:
+        return await self._run(self.storage.list_categories)
+    
+    async def get_category(self, category: str) -> Optional[PromptCategory]:
+        entry = self.storage._peek_entry(category)
+        if entry is not None:
+            return entry.category
+        return await self._run(self.storage.get_category, category)
+    
+    async def get_category_with_digest(self, category: str) -> Tuple[Optional[PromptCategory], Optional[str]]:
+        entry = self.storage._peek_entry(category)
+        if entry is not None:
+            return entry.category, entry.digest
+        return await self._run(self.storage.get_category_with_digest, category)
+    
+    def category_digest(self, category: str) -> Optional[str]:
+        return self.storage.category_digest(category)
+    
+    async def get_category_response(
+        self,
+        category: str,
+        encoding: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        digest = self.storage.category_digest(category)
+        if digest is not None:
+            body = self.storage.responses.get((digest, "category", category), encoding)
+            if body is not None:
+                return body, digest
+        return await self._run(self.storage.get_category_response, category, encoding)
+    
+    async def get_template_response(
+        self,
+        category: str,
+        template_name: str,
+        encoding: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+        digest = self.storage.category_digest(category)
+        if digest is not None:
+            body = self.storage.responses.get((digest, "template", category, template_name), encoding)
+            if body is not None:
+                return body, None, digest
+        return await self._run(self.storage.get_template_response, category, template_name, encoding)
+    
+    async def save_category(self, category: str, prompt_category: PromptCategory) -> bool:
+        return await self._run(self.storage.save_category, category, prompt_category)
+    
+    async def update_category(
+        self,
+        category: str,
+        mutate: Callable[[PromptCategory], PromptCategory]
+    ) -> Optional[bool]:
+        return await self._run(self.storage.update_category, category, mutate)
+    
+    async def refresh_catalog(self) -> Dict[str, Dict]:
+        return await self._run(self.storage.refresh_catalog)
+    
+    async def get_all_prompts(
+        self,
+        fields: Optional[List[str]] = None,
+        since_revision: Optional[int] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return await self._run(self.storage.get_all_prompts, fields, since_revision, after, limit)
+    
+    async def resolve_plan(
+        self,
+        category: str,
+        template_name: str
+    ) -> Tuple[Optional[CompiledTemplate], Optional[str]]:
+        resolved = self.storage._cached_plan(category, template_name)
+        if resolved is not None:
+            return resolved
+        return await self._run(self.storage.resolve_plan, category, template_name)
+    
+    async def get_template(
+        self,
+        category: str,
+        template_name: str
+    ) -> Tuple[Optional[Dict], Optional[str], Optional[str]]:
+        found = self.storage._cached_template(category, template_name)
+        if found is not None:
+            return found
+        return await self._run(self.storage.get_template, category, template_name)
+    
+    async def get_templates(
+        self,
+        refs: Iterable[Tuple[str, str]],
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Dict]:
+        refs = list(refs)
+        result = self.storage.get_templates(refs, fields, cached_only=True)
+        if result is not None:
+            return result
+        return await self._run(self.storage.get_templates, refs, fields)
+    
+    async def test_prompt_rendering(self, category: str, template_name: str, variables: Dict) -> Dict:
+        resolved = self.storage._cached_plan(category, template_name)
+        if resolved is not None:
+            return self.storage._test_rendering(*resolved, variables)
+        return await self._run(self.storage.test_prompt_rendering, category, template_name, variables)
+    
+    async def render_batch(
+        self,
+        category: str,
+        template_name: str,
+        items: Iterable[Dict],
+        defaults: Optional[Dict] = None
+    ) -> Dict:
+        return await self._run(self.storage.render_batch, category, template_name, items, defaults)
+    
+    def render_with_plan(self, plan: CompiledTemplate, variables: Dict, defaults: Optional[Dict] = None) -> Dict:
+        return self.storage.render_with_plan(plan, variables, defaults)
+    
+    async def backup_category(self, category: str) -> bool:
+        return await self._run(self.storage.backup_category, category)
+    
+    async def list_backups(self, category: Optional[str] = None) -> List[Dict]:
+        return await self._run(self.storage.list_backups, category)
+    
+    async def compact_backups(self) -> Dict[str, int]:
+        return await self._run(self.storage.compact_backups)
+    
+    async def list_revisions(self, category: str) -> List[Dict]:
+        return await self._run(self.storage.list_revisions, category)
+    
+    async def get_revision(self, category: str, revision: int) -> Optional[Dict]:
+        return await self._run(self.storage.get_revision, category, revision)
+    
+    def cache_stats(self) -> Dict[str, float]:
+        return self.storage.cache_stats()
+    
+    def response_cache_stats(self) -> Dict[str, float]:
+        return self.storage.responses.stats()
+    
+    def top_rendered_templates(
+        self,
+        limit: int = 10,
+        sort: str = "renders",
+        category: Optional[str] = None
+    ) -> List[Dict]:
+        return self.storage.render_stats.top(limit, sort, category)
+    
+    def close(self) -> None:
+        """Finish queued I/O and flush the underlying storage"""
+        self._executor.shutdown(wait=True)
+        self.storage.close()
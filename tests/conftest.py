@@ -0,0 +1,63 @@
+"""
+Prompt Studio - Test Fixtures
+"""
+
+import os
+import sys
+import shutil
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from storage import AsyncPromptStorage, PromptStorage  # noqa: E402
+
+API_KEY = "prompt-studio-dev-key"
+
+
+@pytest.fixture
+def prompts_dir(tmp_path: Path) -> Path:
+    """A copy of the bundled prompt categories"""
+    target = tmp_path / "prompts"
+    target.mkdir()
+    for path in (ROOT / "prompts").glob("*.json"):
+        shutil.copy(path, target / path.name)
+    return target
+
+
+@pytest.fixture
+def storage(prompts_dir: Path) -> PromptStorage:
+    """A PromptStorage over the copied categories, fsyncing every save"""
+    prompt_storage = PromptStorage(prompts_dir=str(prompts_dir), fsync_interval=0)
+    yield prompt_storage
+    prompt_storage.close()
+
+
+@pytest.fixture
+def app_module():
+    """The app module, importable from any working directory (static files are relative)"""
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    return app
+
+
+@pytest.fixture
+def client(app_module, storage: PromptStorage, monkeypatch: pytest.MonkeyPatch):
+    """A test client whose routes use the fixture storage, authenticated by default"""
+    from fastapi.testclient import TestClient
+    
+    async_storage = AsyncPromptStorage(storage, max_workers=2)
+    monkeypatch.setattr(app_module, "storage", async_storage)
+    
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        yield TestClient(app_module.app, headers={"Authorization": f"Bearer {API_KEY}"})
+    finally:
+        os.chdir(cwd)
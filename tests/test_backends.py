@@ -0,0 +1,103 @@
+"""
+Prompt Studio - Storage Backend Tests
+"""
+
+import pytest
+
+from backends import PromptBackend, SqliteBackend, migrate_json_to_sqlite
+from storage import PromptStorage
+
+
+@pytest.fixture
+def sqlite_storage(prompts_dir, tmp_path):
+    db_path = tmp_path / "prompts.db"
+    migrate_json_to_sqlite(prompts_dir, db_path)
+    
+    storage = PromptStorage(prompts_dir=str(tmp_path / "state"), backend=SqliteBackend(db_path), fsync_interval=0)
+    yield storage
+    storage.close()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def any_storage(request, storage, sqlite_storage):
+    return storage if request.param == "json" else sqlite_storage
+
+
+def test_backends_list_the_same_categories(storage, sqlite_storage):
+    assert sqlite_storage.list_categories() == storage.list_categories()
+    assert sorted(dict(sqlite_storage.backend.scan())) == storage.list_categories()
+
+
+def test_backends_read_the_same_content(storage, sqlite_storage):
+    for category in storage.list_categories():
+        assert sqlite_storage.get_category(category) == storage.get_category(category)
+        
+        for name in storage.get_category(category).templates:
+            assert sqlite_storage.get_template(category, name)[0] == storage.get_template(category, name)[0]
+            assert sqlite_storage.backend.read_template(category, name) == (
+                storage.get_template(category, name)[0], sqlite_storage.category_digest(category)
+            )
+
+
+def test_saved_content_hashes_match_across_backends(storage, sqlite_storage):
+    category = storage.get_category("guides").copy(update={"description": "Saved by the studio"})
+    
+    assert storage.save_category("guides", category)
+    assert sqlite_storage.save_category("guides", category)
+    
+    assert sqlite_storage.category_digest("guides") == storage.category_digest("guides")
+    assert sqlite_storage.backend.read_bytes("guides") == storage.backend.read_bytes("guides")
+
+
+def test_save_round_trip(any_storage):
+    category = any_storage.get_category("guides")
+    templates = dict(category.templates)
+    removed = next(iter(templates))
+    del templates[removed]
+    updated = category.copy(update={"description": "Saved by the studio", "templates": templates})
+    key = any_storage.backend.stat("guides")
+    
+    assert any_storage.save_category("guides", updated)
+    
+    assert any_storage.backend.stat("guides") != key
+    assert any_storage.get_category("guides") == updated
+    assert any_storage.get_template("guides", removed)[0] is None
+
+
+def test_missing_category(any_storage):
+    assert any_storage.get_category("missing") is None
+    assert any_storage.backend.stat("missing") is None
+    assert any_storage.backend.read_bytes("missing") is None
+    assert any_storage.backend.read_template("missing", "anything") is None
+
+
+def test_migrate_reports_and_skips_unreadable_files(prompts_dir, tmp_path):
+    (prompts_dir / "broken.json").write_text("{not json", encoding="utf-8")
+    db_path = tmp_path / "prompts.db"
+    
+    stats = migrate_json_to_sqlite(prompts_dir, db_path)
+    categories = sorted(path.stem for path in prompts_dir.glob("*.json") if path.stem != "broken")
+    
+    assert stats["categories"] == len(categories)
+    assert stats["failed"] == 1
+    
+    # Re-running overwrites rather than duplicating
+    assert migrate_json_to_sqlite(prompts_dir, db_path)["templates"] == stats["templates"]
+    backend = SqliteBackend(db_path)
+    try:
+        assert backend.list_categories() == categories
+        count = backend._connection().execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+        assert count == stats["templates"]
+    finally:
+        backend.close()
+
+
+def test_backends_must_implement_the_interface():
+    class ListingOnlyBackend(PromptBackend):
+        def list_categories(self):
+            return []
+    
+    with pytest.raises(TypeError):
+        ListingOnlyBackend()
+    with pytest.raises(TypeError):
+        PromptBackend()
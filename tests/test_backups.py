@@ -0,0 +1,95 @@
+"""
+Prompt Studio - Backup Store Tests
+"""
+
+import hashlib
+import json
+
+from backups import BackupStore
+from models import PromptCategory
+
+
+def _blobs(store):
+    return sorted(path.stem for path in store.blobs_dir.glob("*/*.json"))
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = BackupStore(tmp_path / "backups")
+    
+    first = store.create("guides", b'{"v": 1}')
+    second = store.create("guides", b'{"v": 1}')
+    store.create("classification", b'{"v": 1}')
+    
+    assert second["id"] == first["id"]
+    assert len(store.list("guides")) == 1
+    assert _blobs(store) == [hashlib.sha256(b'{"v": 1}').hexdigest()]
+
+
+def test_keep_last_prunes_oldest_backups_and_their_blobs(tmp_path):
+    store = BackupStore(tmp_path / "backups", keep_last=2)
+    
+    for version in range(4):
+        store.create("guides", f'{{"v": {version}}}'.encode())
+    
+    assert [store.read(record["id"]) for record in store.list("guides")] == [b'{"v": 3}', b'{"v": 2}']
+    assert len(_blobs(store)) == 2
+
+
+def test_max_age_keeps_newest_backup(tmp_path):
+    store = BackupStore(tmp_path / "backups", keep_last=0, max_age_days=0)
+    
+    for version in range(3):
+        store.create("guides", f'{{"v": {version}}}'.encode())
+    
+    assert [store.read(record["id"]) for record in store.list("guides")] == [b'{"v": 2}']
+
+
+def test_pruning_keeps_blobs_shared_with_other_categories(tmp_path):
+    store = BackupStore(tmp_path / "backups", keep_last=1)
+    
+    store.create("guides", b'{"shared": true}')
+    store.create("classification", b'{"shared": true}')
+    store.create("guides", b'{"v": 2}')
+    
+    record = store.list("classification")[0]
+    assert store.read(record["id"]) == b'{"shared": true}'
+
+
+def test_compact_sweeps_orphaned_blobs(tmp_path):
+    store = BackupStore(tmp_path / "backups")
+    store.create("guides", b'{"v": 1}')
+    
+    orphan = store.blobs_dir / "00" / f"{'0' * 64}.json"
+    orphan.parent.mkdir(parents=True)
+    orphan.write_bytes(b"{}")
+    
+    result = store.compact()
+    assert result["deleted_blobs"] == 1
+    assert not orphan.exists()
+    assert result["remaining_backups"] == 1
+
+
+def test_save_backs_up_previous_content_for_restore(storage, prompts_dir):
+    path = prompts_dir / "guides.json"
+    category = storage.get_category("guides")
+    assert storage.save_category("guides", category.copy(update={"description": "first"}))
+    saved = path.read_bytes()
+    assert storage.save_category("guides", category.copy(update={"description": "second"}))
+    
+    backup = storage.list_backups("guides")[0]
+    assert backup["kind"] == "pre-save"
+    content = storage.backups.read(backup["id"])
+    assert content == saved
+    
+    restored = PromptCategory(**json.loads(content))
+    assert storage.save_category("guides", restored)
+    assert path.read_bytes() == saved
+
+
+def test_backup_endpoints(client):
+    assert client.post("/api/admin/backup/guides").status_code == 200
+    assert client.post("/api/admin/backup/missing").status_code == 404
+    
+    listing = client.get("/api/admin/backups", params={"category": "guides"}).json()
+    assert listing["count"] == 1
+    assert listing["backups"][0]["kind"] == "manual"
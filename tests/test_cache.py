@@ -0,0 +1,64 @@
+"""
+Prompt Studio - Category Cache Tests
+"""
+
+import json
+import os
+
+from storage import PromptStorage
+
+
+def _edit_description(path, description):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["description"] = description
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def test_unchanged_category_is_served_from_cache(storage):
+    first = storage.get_category("guides")
+    
+    assert storage.get_category("guides") is first
+    assert storage.cache_stats()["hits"] == 1
+    assert storage.cache_stats()["misses"] == 1
+
+
+def test_external_edit_is_picked_up(storage, prompts_dir):
+    storage.get_category("guides")
+    
+    _edit_description(prompts_dir / "guides.json", "Edited outside the studio")
+    
+    assert storage.get_category("guides").description == "Edited outside the studio"
+
+
+def test_same_size_edit_is_picked_up_by_mtime(storage, prompts_dir):
+    path = prompts_dir / "guides.json"
+    _edit_description(path, "aaaa")
+    assert storage.get_category("guides").description == "aaaa"
+    stat = path.stat()
+    
+    _edit_description(path, "bbbb")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    
+    assert path.stat().st_size == stat.st_size
+    assert storage.get_category("guides").description == "bbbb"
+
+
+def test_deleted_category_is_dropped(storage, prompts_dir):
+    storage.get_category("guides")
+    
+    (prompts_dir / "guides.json").unlink()
+    
+    assert storage.get_category("guides") is None
+    assert "guides" not in storage._cache
+
+
+def test_least_recently_used_category_is_evicted(prompts_dir):
+    storage = PromptStorage(prompts_dir=str(prompts_dir), cache_size=1, fsync_interval=0)
+    try:
+        guides = storage.get_category("guides")
+        storage.get_category("classification")
+        
+        assert list(storage._cache) == ["classification"]
+        assert storage.get_category("guides") is not guides
+    finally:
+        storage.close()
@@ -0,0 +1,160 @@
+"""
+Prompt Studio - Catalog Index Tests
+"""
+
+import json
+
+import catalog as catalog_module
+from catalog import CatalogIndex
+from storage import PromptStorage
+
+
+def _category_files(prompts_dir):
+    return sorted(path.stem for path in prompts_dir.glob("*.json"))
+
+
+def test_listing_summarizes_every_category(storage, prompts_dir):
+    listing = storage.get_all_prompts()
+    
+    assert list(listing["categories"]) == _category_files(prompts_dir)
+    assert listing["total_categories"] == len(listing["categories"])
+    
+    guides = storage.get_category("guides")
+    assert listing["categories"]["guides"]["template_count"] == len(guides.templates)
+    assert listing["categories"]["guides"]["template_names"] == list(guides.templates)
+    assert listing["total_templates"] == sum(
+        summary["template_count"] for summary in listing["categories"].values()
+    )
+
+
+def test_persisted_index_is_reused_without_parsing(storage, prompts_dir, monkeypatch):
+    storage.get_all_prompts()
+    storage.close()
+    
+    reopened = PromptStorage(prompts_dir=str(prompts_dir), fsync_interval=0)
+    try:
+        reindexed = []
+        monkeypatch.setattr(reopened, "_reindex_category", reindexed.append)
+        
+        assert list(reopened.get_all_prompts()["categories"]) == _category_files(prompts_dir)
+        assert reindexed == []
+    finally:
+        reopened.close()
+
+
+def test_only_edited_category_is_reindexed(storage, prompts_dir, monkeypatch):
+    storage.get_all_prompts()
+    
+    path = prompts_dir / "guides.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["description"] = "Edited outside the studio"
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    
+    reindex = storage._reindex_category
+    reindexed = []
+    
+    def record(category):
+        reindexed.append(category)
+        reindex(category)
+    
+    monkeypatch.setattr(storage, "_reindex_category", record)
+    
+    assert storage.get_all_prompts()["categories"]["guides"]["description"] == "Edited outside the studio"
+    assert reindexed == ["guides"]
+
+
+def test_save_updates_index(storage):
+    storage.get_all_prompts()
+    
+    category = storage.get_category("guides")
+    storage.save_category("guides", category.copy(update={"description": "Saved by the studio"}))
+    
+    assert storage.catalog.get("guides")["description"] == "Saved by the studio"
+    assert storage.get_all_prompts()["categories"]["guides"]["description"] == "Saved by the studio"
+
+
+def test_removed_category_leaves_listing(storage, prompts_dir):
+    storage.get_all_prompts()
+    
+    (prompts_dir / "guides.json").unlink()
+    
+    assert "guides" not in storage.get_all_prompts()["categories"]
+    assert storage.catalog.get("guides") is None
+
+
+def _summary(digest):
+    return {"mtime_ns": 0, "size": 0, "hash": digest, "template_count": 0}
+
+
+def test_since_revision_lists_changes_and_tombstones(storage, prompts_dir):
+    revision = storage.get_all_prompts()["revision"]
+    
+    category = storage.get_category("guides")
+    storage.save_category("guides", category.copy(update={"description": "Saved by the studio"}))
+    (prompts_dir / "sql_generation.json").unlink()
+    
+    delta = storage.get_all_prompts(since_revision=revision)
+    assert list(delta["categories"]) == ["guides"]
+    assert delta["deleted"] == ["sql_generation"]
+    assert delta["complete"]
+    assert delta["revision"] == revision + 2
+    
+    assert storage.get_all_prompts(since_revision=delta["revision"])["categories"] == {}
+
+
+def test_recreated_category_clears_its_tombstone(tmp_path):
+    catalog = CatalogIndex(tmp_path / "catalog.json")
+    catalog.update("guides", _summary("a"))
+    catalog.remove("guides")
+    catalog.update("guides", _summary("b"))
+    
+    changed, deleted, complete = catalog.changes_since(0)
+    assert changed == ["guides"]
+    assert deleted == []
+    assert complete
+
+
+def test_dropped_tombstones_require_resync(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_module, "MAX_TOMBSTONES", 1)
+    catalog = CatalogIndex(tmp_path / "catalog.json")
+    for name in ("a", "b", "c"):
+        catalog.update(name, _summary(name))
+    catalog.remove("a")
+    catalog.remove("b")
+    
+    assert catalog.changes_since(3) == ([], ["b"], False)
+    assert catalog.changes_since(4) == ([], ["b"], True)
+
+
+def test_tombstones_survive_reload(tmp_path):
+    catalog = CatalogIndex(tmp_path / "catalog.json")
+    catalog.update("guides", _summary("a"))
+    catalog.remove("guides")
+    catalog.save()
+    
+    reloaded = CatalogIndex(tmp_path / "catalog.json")
+    assert reloaded.revision == 2
+    assert reloaded.changes_since(1) == ([], ["guides"], True)
+
+
+def test_listing_pages_and_field_selection(client, prompts_dir):
+    names = _category_files(prompts_dir)
+    seen = []
+    params = {"limit": 2, "fields": "template_count,revision"}
+    
+    while True:
+        page = client.get("/api/prompts", params=params).json()
+        assert page["total_categories"] == len(names)
+        for summary in page["categories"].values():
+            assert set(summary) == {"template_count", "revision"}
+        seen.extend(page["categories"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+    
+    assert seen == names
+
+
+def test_listing_rejects_unknown_fields_and_bad_cursor(client):
+    assert client.get("/api/prompts", params={"fields": "secret"}).status_code == 400
+    assert client.get("/api/prompts", params={"cursor": "not-a-cursor"}).status_code == 400
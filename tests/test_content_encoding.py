@@ -0,0 +1,72 @@
+"""
+Prompt Studio - Response Compression Tests
+"""
+
+from content_encoding import negotiate_encoding
+
+STATIC_FILE = "/static/js/main.js"
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("compress, x-unknown") is None
+
+
+def test_static_file_is_compressed_with_tagged_etag(client):
+    response = client.get(STATIC_FILE, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_compressed_static_file_revalidates(client):
+    etag = client.get(STATIC_FILE, headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    
+    response = client.get(STATIC_FILE, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_identity_static_file_revalidates(client):
+    etag = client.get(STATIC_FILE, headers={"Accept-Encoding": "identity"}).headers["etag"]
+    
+    response = client.get(STATIC_FILE, headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_range_request_is_not_compressed(client):
+    response = client.get(STATIC_FILE, headers={"Accept-Encoding": "gzip", "Range": "bytes=0-99"})
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-range"].startswith("bytes 0-99/")
+    assert len(response.content) == 100
+
+
+def test_category_response_encoding_negotiation(client):
+    plain = client.get("/api/prompts/classification", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/api/prompts/classification", headers={"Accept-Encoding": "gzip"})
+    
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == plain.json()
+    assert compressed.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+
+
+def test_small_bodies_are_sent_uncompressed(client):
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+def test_large_dynamic_body_is_compressed(client):
+    plain = client.get("/api/prompts", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/api/prompts", headers={"Accept-Encoding": "gzip"})
+    
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == plain.json()
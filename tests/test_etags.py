@@ -0,0 +1,82 @@
+"""
+Prompt Studio - Conditional GET Tests
+"""
+
+import json
+
+import pytest
+
+CATEGORY = "/api/prompts/guides"
+TEMPLATE = "/api/prompts/guides/usage_guide"
+LISTING = "/api/prompts"
+
+
+def _revalidate(client, url, etag, **headers):
+    return client.get(url, headers={"If-None-Match": etag, "Accept-Encoding": "identity", **headers})
+
+
+@pytest.mark.parametrize("url", [CATEGORY, TEMPLATE, LISTING])
+def test_unchanged_resource_revalidates(client, url):
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+    
+    not_modified = _revalidate(client, url, etag)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
+
+
+@pytest.mark.parametrize("header", ['W/{etag}', '"other", {etag}', "*"])
+def test_if_none_match_forms(client, header):
+    etag = client.get(CATEGORY, headers={"Accept-Encoding": "identity"}).headers["etag"]
+    
+    assert _revalidate(client, CATEGORY, header.format(etag=etag)).status_code == 304
+
+
+def test_stale_etag_gets_full_response(client):
+    response = client.get(CATEGORY, headers={"Accept-Encoding": "identity"})
+    etag = response.headers["etag"]
+    
+    category = response.json()["category"]
+    category["description"] = "Saved by the studio"
+    assert client.put(CATEGORY, json={"data": category}).status_code == 200
+    
+    fresh = _revalidate(client, CATEGORY, etag)
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert fresh.json()["category"]["description"] == "Saved by the studio"
+
+
+def test_external_edit_changes_etag(client, prompts_dir):
+    etag = client.get(CATEGORY, headers={"Accept-Encoding": "identity"}).headers["etag"]
+    
+    path = prompts_dir / "guides.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["description"] = "Edited outside the studio"
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    
+    assert _revalidate(client, CATEGORY, etag).status_code == 200
+
+
+def test_templates_and_queries_have_distinct_etags(client):
+    etags = {
+        client.get(url).headers["etag"]
+        for url in (CATEGORY, TEMPLATE, "/api/prompts/guides/out_of_scope", LISTING, LISTING + "?limit=1")
+    }
+    assert len(etags) == 5
+
+
+def test_missing_resource_is_not_answered_with_304(client):
+    assert client.get("/api/prompts/missing", headers={"If-None-Match": "*"}).status_code == 404
+
+
+def test_compressed_category_revalidates_with_tagged_etag(client):
+    response = client.get(CATEGORY, headers={"Accept-Encoding": "gzip"})
+    etag = response.headers["etag"]
+    assert response.headers["content-encoding"] == "gzip"
+    assert etag.endswith('-gzip"')
+    
+    not_modified = client.get(CATEGORY, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
@@ -0,0 +1,78 @@
+"""
+Prompt Studio - Version History Tests
+"""
+
+import json
+
+from history import VersionHistory, apply_delta, compute_delta
+
+
+def _version(number):
+    lines = [f'  "line {i}": {i * number},\n' for i in range(10)]
+    return ("{\n" + "".join(lines) + f'  "version": {number}\n}}').encode()
+
+
+def test_delta_round_trip():
+    old = ["a\n", "b\n", "c\n", "d"]
+    for new in (["a\n", "x\n", "c\n", "d"], [], ["d"], ["z\n"] + old + ["e"]):
+        assert apply_delta(old, compute_delta(old, new)) == new
+
+
+def test_every_revision_is_reconstructed_across_keyframes(tmp_path):
+    history = VersionHistory(tmp_path / "history", keyframe_interval=3)
+    versions = [_version(number) for number in range(1, 9)]
+    
+    for number, content in enumerate(versions, start=1):
+        assert history.record("guides", content) == number
+    
+    assert [r["revision"] for r in history.list("guides") if r["keyframe"]] == [1, 4, 7]
+    for number, content in enumerate(versions, start=1):
+        assert history.get("guides", number)["content"].encode() == content
+
+
+def test_unchanged_content_is_not_recorded(tmp_path):
+    history = VersionHistory(tmp_path / "history")
+    
+    history.record("guides", _version(1))
+    assert history.record("guides", _version(1)) == 1
+    assert len(history.list("guides")) == 1
+
+
+def test_reopened_history_continues_from_head(tmp_path):
+    VersionHistory(tmp_path / "history", keyframe_interval=3).record("guides", _version(1))
+    history = VersionHistory(tmp_path / "history", keyframe_interval=3)
+    
+    assert history.record("guides", _version(1)) == 1
+    assert history.record("guides", _version(2)) == 2
+    assert history.get("guides", 2)["content"].encode() == _version(2)
+
+
+def test_missing_revisions(tmp_path):
+    history = VersionHistory(tmp_path / "history")
+    history.record("guides", _version(1))
+    
+    assert history.get("guides", 0) is None
+    assert history.get("guides", 2) is None
+    assert history.get("missing", 1) is None
+    assert not history.has_history("missing")
+
+
+def test_first_save_seeds_history_with_previous_content(storage, prompts_dir):
+    original = json.loads((prompts_dir / "guides.json").read_text(encoding="utf-8"))
+    category = storage.get_category("guides")
+    
+    assert storage.save_category("guides", category.copy(update={"description": "Saved by the studio"}))
+    
+    assert [r["revision"] for r in storage.list_revisions("guides")] == [1, 2]
+    assert storage.get_revision("guides", 1)["data"] == original
+    assert storage.get_revision("guides", 2)["data"]["description"] == "Saved by the studio"
+
+
+def test_history_endpoints(client):
+    category = client.get("/api/prompts/guides").json()["category"]
+    category["description"] = "Saved by the studio"
+    assert client.put("/api/prompts/guides", json={"data": category}).status_code == 200
+    
+    assert client.get("/api/admin/history/guides").json()["count"] == 2
+    assert client.get("/api/admin/history/guides/2").json()["data"]["description"] == "Saved by the studio"
+    assert client.get("/api/admin/history/guides/3").status_code == 404
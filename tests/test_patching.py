@@ -0,0 +1,132 @@
+"""
+Prompt Studio - Partial Update Tests
+"""
+
+import pytest
+
+JSON_PATCH = {"Content-Type": "application/json-patch+json"}
+MERGE_PATCH = {"Content-Type": "application/merge-patch+json"}
+
+
+def patch(client, operations, category="classification"):
+    return client.patch(f"/api/prompts/{category}", json=operations, headers=JSON_PATCH)
+
+
+def template(client, name, category="classification"):
+    return client.get(f"/api/prompts/{category}/{name}").json()["template"]
+
+
+def test_json_patch_add_remove_replace(client):
+    response = patch(client, [
+        {"op": "add", "path": "/templates/extra", "value": {"content": "Hello ${name}", "variables": ["name"]}},
+        {"op": "replace", "path": "/description", "value": "Patched"},
+        {"op": "add", "path": "/templates/extra/variables/-", "value": "tone"},
+        {"op": "remove", "path": "/templates/user_prompt"}
+    ])
+    assert response.status_code == 200
+    
+    category = client.get("/api/prompts/classification").json()["category"]
+    assert category["description"] == "Patched"
+    assert "user_prompt" not in category["templates"]
+    assert category["templates"]["extra"]["variables"] == ["name", "tone"]
+    assert category["templates"]["extra"]["model"] == "claude-3-5-sonnet-20241022"
+
+
+def test_json_patch_move_and_copy(client):
+    original = template(client, "system_prompt")
+    
+    response = patch(client, [
+        {"op": "copy", "from": "/templates/system_prompt", "path": "/templates/system_copy"},
+        {"op": "move", "from": "/templates/user_prompt", "path": "/templates/user_moved"}
+    ])
+    assert response.status_code == 200
+    
+    templates = client.get("/api/prompts/classification").json()["category"]["templates"]
+    assert templates["system_copy"] == original
+    assert templates["system_prompt"] == original
+    assert "user_prompt" not in templates
+    assert "user_moved" in templates
+
+
+def test_json_patch_test_op(client):
+    description = template(client, "system_prompt")["description"]
+    
+    response = patch(client, [
+        {"op": "test", "path": "/templates/system_prompt/description", "value": description},
+        {"op": "replace", "path": "/templates/system_prompt/description", "value": "Checked"}
+    ])
+    assert response.status_code == 200
+    assert template(client, "system_prompt")["description"] == "Checked"
+
+
+def test_failed_test_op_leaves_category_unchanged(client):
+    before = client.get("/api/prompts/classification").json()["category"]
+    
+    response = patch(client, [
+        {"op": "replace", "path": "/description", "value": "Not applied"},
+        {"op": "test", "path": "/version", "value": "9.9.9"}
+    ])
+    assert response.status_code == 422
+    assert "Test failed" in response.json()["detail"]
+    assert client.get("/api/prompts/classification").json()["category"] == before
+
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "replace", "path": "description", "value": "x"}],
+    [{"op": "remove", "path": "/templates/missing"}],
+    [{"op": "add", "path": "/templates/system_prompt/variables/7", "value": "x"}],
+    [{"op": "add", "path": "/templates/system_prompt/variables/01", "value": "x"}],
+    [{"op": "replace", "path": "", "value": {}}],
+    [{"op": "add", "path": 5, "value": "x"}],
+    [{"op": 1, "path": "/description", "value": "x"}],
+    [{"op": "copy", "from": 5, "path": "/templates/copy"}],
+    [{"op": "move", "from": ["templates"], "path": "/templates/moved"}],
+    [{"op": "move", "from": "/templates", "path": "/templates/nested"}],
+    [{"op": "frobnicate", "path": "/description"}],
+    [{"path": "/description"}],
+    {"op": "add", "path": "/description", "value": "x"}
+])
+def test_invalid_json_patch_is_rejected(client, operations):
+    response = patch(client, operations)
+    assert response.status_code == 422
+
+
+def test_json_patch_requires_its_media_type(client):
+    response = client.patch("/api/prompts/classification", json=[], headers=MERGE_PATCH)
+    assert response.status_code == 415
+
+
+def test_json_patch_unknown_category(client):
+    assert patch(client, [], category="missing").status_code == 404
+
+
+def test_merge_patch_updates_fields(client):
+    response = client.patch(
+        "/api/prompts/classification/system_prompt",
+        json={"description": "Merged", "max_tokens": 64},
+        headers=MERGE_PATCH
+    )
+    assert response.status_code == 200
+    
+    updated = template(client, "system_prompt")
+    assert updated["description"] == "Merged"
+    assert updated["max_tokens"] == 64
+
+
+def test_merge_patch_null_resets_field(client):
+    client.patch("/api/prompts/classification/system_prompt", json={"model": "custom"}, headers=MERGE_PATCH)
+    
+    response = client.patch("/api/prompts/classification/system_prompt", json={"model": None}, headers=MERGE_PATCH)
+    assert response.status_code == 200
+    assert template(client, "system_prompt")["model"] == "claude-3-5-sonnet-20241022"
+
+
+@pytest.mark.parametrize("changes", [{"unknown": 1}, {"max_tokens": "many"}, ["description"]])
+def test_invalid_merge_patch_is_rejected(client, changes):
+    response = client.patch("/api/prompts/classification/system_prompt", json=changes, headers=MERGE_PATCH)
+    assert response.status_code == 422
+
+
+def test_merge_patch_unknown_template(client):
+    response = client.patch("/api/prompts/classification/missing", json={"description": "x"}, headers=MERGE_PATCH)
+    assert response.status_code == 404
@@ -0,0 +1,108 @@
+"""
+Prompt Studio - Response Cache Tests
+"""
+
+import gzip
+import json
+
+from response_cache import ResponseCache, render_json
+
+CATEGORY = "/api/prompts/guides"
+
+
+def _builder(body):
+    calls = []
+    
+    def build():
+        calls.append(1)
+        return body
+    
+    return build, calls
+
+
+def test_compressed_variant_is_built_from_cached_identity_body():
+    cache = ResponseCache()
+    build, calls = _builder(b'{"a": 1}' * 100)
+    
+    identity = cache.get_or_build(("digest", "category", "guides"), None, build)
+    compressed = cache.get_or_build(("digest", "category", "guides"), "gzip", build)
+    
+    assert calls == [1]
+    assert gzip.decompress(compressed) == identity
+    assert cache.get(("digest", "category", "guides"), "gzip") is compressed
+
+
+def test_encodings_are_cached_separately():
+    cache = ResponseCache()
+    build, calls = _builder(b"{}")
+    
+    cache.get_or_build(("digest",), "gzip", build)
+    cache.get_or_build(("digest",), "gzip", build)
+    
+    assert calls == [1]
+    assert cache.get(("digest",), None) == b"{}"
+    assert cache.stats()["entries"] == 2
+
+
+def test_invalidate_drops_every_encoding_of_a_revision():
+    cache = ResponseCache()
+    cache.get_or_build(("old", "category", "guides"), "gzip", lambda: b"{}")
+    cache.get_or_build(("new", "category", "guides"), None, lambda: b"{}")
+    
+    cache.invalidate("old")
+    
+    assert cache.get(("old", "category", "guides"), None) is None
+    assert cache.get(("old", "category", "guides"), "gzip") is None
+    assert cache.get(("new", "category", "guides"), None) == b"{}"
+    assert cache.size == 2
+
+
+def test_size_bound_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=10)
+    cache.get_or_build(("a",), None, lambda: b"12345")
+    cache.get_or_build(("b",), None, lambda: b"12345")
+    cache.get(("a",))
+    cache.get_or_build(("c",), None, lambda: b"12345")
+    
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None
+    assert cache.size == 10
+    
+    cache.get_or_build(("large",), None, lambda: b"x" * 11)
+    assert cache.get(("large",)) is None
+
+
+def test_render_json_matches_default_response_serialization(client):
+    response = client.get(CATEGORY, headers={"Accept-Encoding": "identity"})
+    
+    assert response.content == render_json(response.json())
+
+
+def test_category_is_served_in_negotiated_encoding(client, storage):
+    identity = client.get(CATEGORY, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(CATEGORY, headers={"Accept-Encoding": "gzip"})
+    
+    assert "content-encoding" not in identity.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == identity.json()
+    
+    refused = client.get(CATEGORY, headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in refused.headers
+    
+    hits = storage.responses.hits
+    assert client.get(CATEGORY, headers={"Accept-Encoding": "gzip"}).json() == identity.json()
+    assert storage.responses.hits > hits
+
+
+def test_saved_category_is_not_served_from_stale_body(client, storage):
+    category = client.get(CATEGORY).json()["category"]
+    digest = storage.category_digest("guides")
+    category["description"] = "Saved by the studio"
+    assert client.put(CATEGORY, json={"data": category}).status_code == 200
+    
+    assert storage.responses.get((digest, "category", "guides")) is None
+    for encoding in ("identity", "gzip"):
+        body = client.get(CATEGORY, headers={"Accept-Encoding": encoding}).json()
+        assert body["category"]["description"] == "Saved by the studio"
+    
+    assert json.loads(storage.responses.get((storage.category_digest("guides"), "category", "guides")))["success"]
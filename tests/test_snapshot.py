@@ -0,0 +1,99 @@
+"""
+Prompt Studio - Snapshot Tests
+"""
+
+import json
+
+from storage import PromptStorage
+
+
+def test_resolve_plan_compiles_and_caches(prompts_dir):
+    storage = PromptStorage(prompts_dir=str(prompts_dir), snapshot=True)
+    try:
+        resolved = storage.snapshots.resolve_plan("classification", "system_prompt")
+        assert resolved is not None
+        plan, error = resolved
+        assert error is None
+        assert plan.template_key == ("classification", "system_prompt")
+        
+        assert storage.snapshots.resolve_plan("classification", "system_prompt")[0] is plan
+        assert len(storage.snapshots._plans) == 1
+    finally:
+        storage.close()
+
+
+def test_resolve_plan_reports_missing_template(prompts_dir):
+    storage = PromptStorage(prompts_dir=str(prompts_dir), snapshot=True)
+    try:
+        plan, error = storage.snapshots.resolve_plan("classification", "missing")
+        assert plan is None
+        assert "not found" in error
+    finally:
+        storage.close()
+
+
+def test_render_is_served_from_snapshot(prompts_dir):
+    storage = PromptStorage(prompts_dir=str(prompts_dir), snapshot=True)
+    try:
+        result = storage.test_prompt_rendering("classification", "system_prompt", {})
+        assert result["success"]
+        assert storage.snapshots._plans
+    finally:
+        storage.close()
+
+
+def test_outside_edit_bypasses_stale_snapshot(prompts_dir):
+    storage = PromptStorage(prompts_dir=str(prompts_dir), snapshot=True)
+    try:
+        name = next(iter(storage.get_category("guides").templates))
+        _, _, digest = storage.get_template("guides", name)
+        assert storage.snapshots.get_template("guides", name) is not None
+        
+        path = prompts_dir / "guides.json"
+        data = json.loads(path.read_text(encoding="utf-8"))
+        data["templates"][name]["description"] = "Edited outside the studio"
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        
+        assert storage.snapshots.get_template("guides", name) is None
+        assert storage.category_digest("guides") != digest
+        
+        template, error, _ = storage.get_template("guides", name)
+        assert error is None
+        assert template["description"] == "Edited outside the studio"
+    finally:
+        storage.close()
+
+
+def test_category_added_outside_is_not_reported_missing(prompts_dir):
+    storage = PromptStorage(prompts_dir=str(prompts_dir), snapshot=True)
+    try:
+        source = json.loads((prompts_dir / "guides.json").read_text(encoding="utf-8"))
+        source["category"] = "added"
+        (prompts_dir / "added.json").write_text(json.dumps(source), encoding="utf-8")
+        
+        name = next(iter(source["templates"]))
+        template, error, _ = storage.get_template("added", name)
+        assert error is None
+        assert template["content"] == source["templates"][name]["content"]
+    finally:
+        storage.close()
+
+
+def test_save_rebuilds_only_the_saved_category(prompts_dir, monkeypatch):
+    storage = PromptStorage(prompts_dir=str(prompts_dir), snapshot=True)
+    try:
+        loaded = []
+        load_category = storage._snapshot_category
+        monkeypatch.setattr(storage, "_snapshot_category", lambda name: loaded.append(name) or load_category(name))
+        
+        category = storage.get_category("guides")
+        assert storage.save_category("guides", category.copy(update={"description": "Rebuilt"}))
+        assert loaded == ["guides"]
+        
+        snapshot = storage.snapshots.current()
+        assert snapshot is not None
+        assert storage.snapshots.category_digest("guides") == storage.catalog.get("guides")["hash"]
+        for name in storage.list_categories():
+            assert storage.snapshots.category_digest(name) is not None
+    finally:
+        storage.close()
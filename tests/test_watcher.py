@@ -0,0 +1,44 @@
+"""
+Prompt Studio - Watcher Tests
+"""
+
+import json
+
+
+def _edit_description(path, name, description):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["templates"][name]["description"] = description
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def test_change_event_evicts_cached_category(storage, prompts_dir):
+    storage.set_watching(True)
+    name = next(iter(storage.get_category("guides").templates))
+    
+    _edit_description(prompts_dir / "guides.json", name, "Edited outside the studio")
+    storage.on_file_changed("guides")
+    
+    assert storage.get_category("guides").templates[name].description == "Edited outside the studio"
+
+
+def test_load_racing_change_event_is_not_cached(storage, prompts_dir, monkeypatch):
+    storage.set_watching(True)
+    name = next(iter(storage.get_category("guides").templates))
+    original = storage.get_category("guides").templates[name].description
+    storage.invalidate_cache("guides")
+    
+    read = storage.backend.read
+    
+    def read_then_edit(category):
+        # The watcher reports the edit after the old content was read,
+        # but before the loader gets to cache it
+        found = read(category)
+        monkeypatch.setattr(storage.backend, "read", read)
+        _edit_description(prompts_dir / "guides.json", name, "Edited outside the studio")
+        storage.on_file_changed(category)
+        return found
+    
+    monkeypatch.setattr(storage.backend, "read", read_then_edit)
+    
+    assert storage.get_category("guides").templates[name].description == original
+    assert storage.get_category("guides").templates[name].description == "Edited outside the studio"
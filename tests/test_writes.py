@@ -0,0 +1,145 @@
+"""
+Prompt Studio - Write Path Tests
+"""
+
+import json
+import os
+import threading
+import time
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def _variant(storage, description):
+    return storage.get_category("guides").copy(update={"description": description})
+
+
+def _gate_writes(storage, monkeypatch, fail=False):
+    """Block backend writes until released, recording what each one writes"""
+    write = storage.backend.write
+    started = threading.Event()
+    release = threading.Event()
+    written = []
+    
+    def gated_write(category, prompt_category, content, digest):
+        written.append(prompt_category.description)
+        started.set()
+        release.wait(5)
+        if fail:
+            raise OSError("disk full")
+        return write(category, prompt_category, content, digest)
+    
+    monkeypatch.setattr(storage.backend, "write", gated_write)
+    return started, release, written
+
+
+def test_queued_saves_coalesce_into_one_write(storage, monkeypatch):
+    started, release, written = _gate_writes(storage, monkeypatch)
+    saves = {description: _variant(storage, description) for description in ("first", "second", "third", "fourth")}
+    results = {}
+    
+    def save(description):
+        results[description] = storage.save_category("guides", saves[description])
+    
+    threads = [threading.Thread(target=save, args=("first",))]
+    threads[0].start()
+    assert started.wait(5)
+    
+    for description in ("second", "third", "fourth"):
+        thread = threading.Thread(target=save, args=(description,))
+        thread.start()
+        threads.append(thread)
+        _wait_until(lambda: storage._pending_writes.get("guides", (0, None))[1] is saves[description])
+    
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert written == ["first", "fourth"]
+    assert results == {"first": True, "second": True, "third": True, "fourth": True}
+    assert storage.coalesced_writes == 2
+    assert storage.get_category("guides").description == "fourth"
+
+
+def test_waiters_wake_up_after_failed_write(storage, monkeypatch):
+    started, release, _ = _gate_writes(storage, monkeypatch, fail=True)
+    original = storage.get_category("guides").description
+    first = _variant(storage, "first")
+    queued = _variant(storage, "queued")
+    results = {}
+    
+    writer = threading.Thread(target=lambda: results.update(first=storage.save_category("guides", first)))
+    writer.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=lambda: results.update(queued=storage.save_category("guides", queued)))
+    waiter.start()
+    _wait_until(lambda: "guides" in storage._pending_writes)
+    
+    release.set()
+    writer.join(5)
+    waiter.join(5)
+    
+    assert not writer.is_alive() and not waiter.is_alive()
+    assert results == {"first": False, "queued": False}
+    assert storage.get_category("guides").description == original
+    
+    monkeypatch.undo()
+    assert storage.save_category("guides", _variant(storage, "after"))
+    assert storage.get_category("guides").description == "after"
+
+
+def test_failed_rename_leaves_no_temp_file(storage, prompts_dir, monkeypatch):
+    path = prompts_dir / "guides.json"
+    before = path.read_bytes()
+    replace = os.replace
+    
+    def failing_replace(src, dst):
+        if os.path.basename(dst) == "guides.json":
+            raise OSError("rename failed")
+        replace(src, dst)
+    
+    monkeypatch.setattr(os, "replace", failing_replace)
+    
+    assert not storage.save_category("guides", _variant(storage, "lost"))
+    assert path.read_bytes() == before
+    assert not [p.name for p in prompts_dir.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_concurrent_saves_never_expose_partial_file(storage, prompts_dir):
+    path = prompts_dir / "guides.json"
+    variants = [_variant(storage, "short"), _variant(storage, "long " * 2000)]
+    descriptions = {variant.description for variant in variants}
+    descriptions.add(storage.get_category("guides").description)
+    done = threading.Event()
+    errors = []
+    
+    def write():
+        try:
+            for i in range(40):
+                storage.save_category("guides", variants[i % 2])
+        finally:
+            done.set()
+    
+    def read():
+        while not done.is_set():
+            try:
+                data = json.loads(path.read_bytes())
+                assert data["description"] in descriptions
+                assert storage.get_category("guides").description in descriptions
+            except Exception as e:
+                errors.append(e)
+                return
+    
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    write()
+    for reader in readers:
+        reader.join(5)
+    
+    assert not errors
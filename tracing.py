@@ -0,0 +1,347 @@
+"""
+Prompt Studio - Request Tracing
+Trace IDs, span timings through storage calls, and structured trace logs
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+import contextvars
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+# Spans kept per trace; a batch of thousands of storage calls is summarized by the count
+MAX_SPANS = 500
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def parse_traceparent(header: str) -> Optional[tuple]:
+    """Extract (trace id, parent span id) from a W3C traceparent header"""
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2]
+
+
+class Span:
+    """A timed operation within a trace"""
+    
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "thread", "attributes")
+    
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.thread = threading.current_thread().name
+        self.attributes = attributes
+
+
+class Trace:
+    """Spans recorded while serving one request, from any thread"""
+    
+    def __init__(self, trace_id: Optional[str] = None, parent_id: Optional[str] = None):
+        self.trace_id = trace_id or _new_id(16)
+        self.start_ns = time.time_ns()
+        self.start = time.perf_counter()
+        self.root = Span("http.request", parent_id, {})
+        self.root.start = self.start
+        self.spans: List[Span] = []
+        self.dropped = 0
+    
+    def add(self, span: Span) -> None:
+        # list.append is atomic, so executor threads need no lock
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+    
+    @property
+    def duration_ms(self) -> float:
+        end = self.root.end if self.root.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+    
+    def to_record(self) -> Dict[str, Any]:
+        """Flat summary with the span breakdown, as logged for slow requests"""
+        spans = []
+        for span in [self.root] + list(self.spans):
+            if span.end is None:
+                continue
+            spans.append({
+                "name": span.name,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "start_ms": round((span.start - self.start) * 1000, 3),
+                "duration_ms": round((span.end - span.start) * 1000, 3),
+                "thread": span.thread,
+                **span.attributes
+            })
+        
+        return {
+            "trace_id": self.trace_id,
+            **self.root.attributes,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": spans,
+            "dropped_spans": self.dropped
+        }
+    
+    def to_otlp(self, service_name: str = "prompt-studio") -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+        def unix_nano(perf: float) -> str:
+            return str(self.start_ns + int((perf - self.start) * 1e9))
+        
+        def attributes(values: Dict[str, Any]) -> List[Dict]:
+            return [
+                {"key": key, "value": {"intValue": str(value)} if isinstance(value, int) else {"stringValue": str(value)}}
+                for key, value in values.items()
+            ]
+        
+        spans = [
+            {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id or "",
+                "name": span.name,
+                "kind": 2 if span is self.root else 1,  # SERVER / INTERNAL
+                "startTimeUnixNano": unix_nano(span.start),
+                "endTimeUnixNano": unix_nano(span.end),
+                "attributes": attributes({"thread.name": span.thread, **span.attributes})
+            }
+            for span in [self.root] + list(self.spans)
+            if span.end is not None
+        ]
+        
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": attributes({"service.name": service_name})},
+                "scopeSpans": [{"scope": {"name": "prompt-studio"}, "spans": spans}]
+            }]
+        }
+
+
+class span:
+    """
+    Context manager timing a block as a span of the current request's trace
+    
+    Outside a traced request it does nothing, so library code can be
+    instrumented unconditionally.
+    """
+    
+    __slots__ = ("name", "attributes", "_span", "_trace", "_token")
+    
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+    
+    def __enter__(self) -> "span":
+        self._trace = _current_trace.get()
+        if self._trace is not None:
+            self._span = Span(self.name, _current_span.get(), self.attributes)
+            self._token = _current_span.set(self._span.span_id)
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if self._trace is None:
+            return
+        
+        self._span.end = time.perf_counter()
+        if exc_type is not None:
+            self._span.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self._trace.add(self._span)
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the request being handled, if any"""
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+class TraceIdLogFilter(logging.Filter):
+    """Stamp log records with the trace ID of the request that emitted them"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id()
+        return True
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per log line, carrying the trace ID"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "trace_id": getattr(record, "trace_id", None)
+        }
+        if hasattr(record, "trace"):
+            entry["trace"] = record.trace
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SpanFileExporter:
+    """
+    Append traces as OTLP/JSON lines to a local file
+    
+    A stand-in for an OTLP collector: each line is an ExportTraceServiceRequest
+    that a collector's file receiver (or a script) can replay. Writes happen on
+    a background thread so request handling never waits on the disk.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+    
+    def export(self, trace: Trace) -> None:
+        self._queue.put(json.dumps(trace.to_otlp(), separators=(",", ":")))
+    
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    return
+                f.write(line + "\n")
+                if self._queue.empty():
+                    f.flush()
+    
+    def close(self) -> None:
+        """Write out queued traces and stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+class Tracer:
+    """Decides which finished traces are logged and exported"""
+    
+    def __init__(
+        self,
+        slow_threshold_ms: float = 500.0,
+        log_mode: str = "slow",
+        exporter: Optional[SpanFileExporter] = None
+    ):
+        """
+        Initialize the tracer
+        
+        Args:
+            slow_threshold_ms: Requests slower than this are logged with their spans
+            log_mode: "slow" (only slow requests), "all" or "off"
+            exporter: Optional exporter receiving every trace
+        """
+        if log_mode not in ("slow", "all", "off"):
+            raise ValueError(f"Unknown trace log mode: {log_mode}")
+        
+        self.slow_threshold_ms = slow_threshold_ms
+        self.log_mode = log_mode
+        self.exporter = exporter
+    
+    def finish(self, trace: Trace) -> None:
+        """Emit a finished trace"""
+        slow = trace.duration_ms >= self.slow_threshold_ms
+        
+        if self.log_mode == "all" or (self.log_mode == "slow" and slow):
+            record = trace.to_record()
+            record["slow"] = slow
+            
+            # Text logs get a one-line breakdown; JSON logs carry the whole record
+            attributes = trace.root.attributes
+            breakdown = ", ".join(f"{item['name']} {item['duration_ms']}ms" for item in record["spans"][1:])
+            message = (
+                f"{attributes.get('http.method')} {attributes.get('http.target')} "
+                f"{attributes.get('http.status_code', '-')} in {record['duration_ms']}ms "
+                f"[trace {trace.trace_id}]: {breakdown or 'no spans'}"
+            )
+            if slow:
+                logger.warning(f"🐢 Slow request {message}", extra={"trace": record})
+            else:
+                logger.info(f"🧭 Request {message}", extra={"trace": record})
+        
+        if self.exporter is not None:
+            self.exporter.export(trace)
+    
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware giving every request a trace
+    
+    An incoming W3C traceparent header is continued; otherwise a new trace
+    ID is generated. The ID is returned in an X-Trace-Id header and is
+    visible to everything running in the request's context, including
+    storage calls on the I/O thread pool.
+    """
+    
+    def __init__(self, app: Callable, tracer: Tracer):
+        """
+        Initialize the middleware
+        
+        Args:
+            app: ASGI application to wrap
+            tracer: Receives finished traces
+        """
+        self.app = app
+        self.tracer = tracer
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                incoming = parse_traceparent(value.decode("latin-1"))
+                break
+        
+        trace = Trace(*(incoming or ()))
+        trace.root.attributes.update({"http.method": scope["method"], "http.target": scope["path"]})
+        trace_header = (b"x-trace-id", trace.trace_id.encode("ascii"))
+        
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                trace.root.attributes["http.status_code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [trace_header]}
+            await send(message)
+        
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace.root.span_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            trace.root.end = time.perf_counter()
+            trace.root.attributes["http.route"] = route_label(scope)
+            try:
+                self.tracer.finish(trace)
+            finally:
+                _current_span.reset(span_token)
+                _current_trace.reset(trace_token)
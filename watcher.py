@@ -0,0 +1,205 @@
+"""
+Prompt Studio - Prompts Directory Watcher
+Pushes on-disk category changes into the storage cache
+"""
+
+import os
+import sys
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from backends import category_name_from_file
+from storage import PromptStorage
+
+logger = logging.getLogger(__name__)
+
+# inotify event flags (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyBackend:
+    """Directory change notifications through the Linux inotify API"""
+    
+    def __init__(self, directory: Path):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+        
+        self._wake_r, self._wake_w = os.pipe()
+    
+    def wait(self, on_change: Callable[[str], None], on_overflow: Callable[[], None]) -> bool:
+        """Block until events arrive and dispatch them; False once stopped"""
+        readable, _, _ = select.select([self._fd, self._wake_r], [], [])
+        if self._wake_r in readable:
+            return False
+        
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return True
+        
+        offset = 0
+        while offset < len(buffer):
+            _, mask, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF):
+                on_overflow()
+            elif name:
+                on_change(os.fsdecode(name))
+        
+        return True
+    
+    def stop(self) -> None:
+        os.write(self._wake_w, b"x")
+    
+    def close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class _PollingBackend:
+    """Directory change detection by periodic scans"""
+    
+    def __init__(self, directory: Path, interval: float):
+        self._directory = directory
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._snapshot = self._scan()
+    
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        with os.scandir(self._directory) as it:
+            for dir_entry in it:
+                if dir_entry.is_file():
+                    stat = dir_entry.stat()
+                    snapshot[dir_entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    def wait(self, on_change: Callable[[str], None], on_overflow: Callable[[], None]) -> bool:
+        if self._stopped.wait(self._interval):
+            return False
+        
+        snapshot = self._scan()
+        for name in set(snapshot) | set(self._snapshot):
+            if snapshot.get(name) != self._snapshot.get(name):
+                on_change(name)
+        self._snapshot = snapshot
+        
+        return True
+    
+    def stop(self) -> None:
+        self._stopped.set()
+    
+    def close(self) -> None:
+        pass
+
+
+class PromptWatcher:
+    """
+    Watches the prompts directory and invalidates storage state on change
+    
+    Uses inotify where available and falls back to polling. While running,
+    the storage trusts its cache without a stat() per read, and the catalog
+    only re-indexes the categories reported as changed.
+    """
+    
+    def __init__(self, storage: PromptStorage, mode: str = "auto", poll_interval: float = 1.0):
+        """
+        Initialize the watcher
+        
+        Args:
+            storage: Storage whose cache is kept in sync
+            mode: "inotify", "poll" or "auto" (inotify with polling fallback)
+            poll_interval: Seconds between scans in polling mode
+        """
+        self.storage = storage
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.backend_name: Optional[str] = None
+        
+        self._backend = None
+        self._thread: Optional[threading.Thread] = None
+    
+    def _create_backend(self):
+        if self.mode in ("auto", "inotify") and sys.platform.startswith("linux"):
+            try:
+                backend = _InotifyBackend(self.storage.prompts_dir)
+                self.backend_name = "inotify"
+                return backend
+            except (OSError, AttributeError) as e:
+                if self.mode == "inotify":
+                    raise
+                logger.warning(f"inotify unavailable, falling back to polling: {str(e)}")
+        elif self.mode == "inotify":
+            raise OSError("inotify is only available on Linux")
+        
+        self.backend_name = "poll"
+        return _PollingBackend(self.storage.prompts_dir, self.poll_interval)
+    
+    def start(self) -> None:
+        """Start watching in a background thread"""
+        if self._thread is not None:
+            return
+        
+        self._backend = self._create_backend()
+        
+        # Entries validated before the watch existed may have missed changes
+        self.storage.invalidate_all()
+        self.storage.set_watching(True)
+        
+        self._thread = threading.Thread(target=self._run, name="prompt-watcher", daemon=True)
+        self._thread.start()
+        
+        logger.info(f"👀 Watching {self.storage.prompts_dir} ({self.backend_name})")
+    
+    def _on_change(self, file_name: str) -> None:
+        category = category_name_from_file(file_name)
+        if category:
+            self.storage.on_file_changed(category)
+    
+    def _run(self) -> None:
+        try:
+            while self._backend.wait(self._on_change, self.storage.invalidate_all):
+                pass
+        except Exception as e:
+            logger.error(f"❌ Prompt watcher failed, reverting to stat-validated reads: {str(e)}")
+            self.storage.set_watching(False)
+    
+    def stop(self) -> None:
+        """Stop watching and return the storage to stat-validated reads"""
+        if self._thread is None:
+            return
+        
+        self.storage.set_watching(False)
+        self._backend.stop()
+        self._thread.join()
+        self._backend.close()
+        self._thread = None